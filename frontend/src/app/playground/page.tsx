@@ -106,14 +106,16 @@ export default function Playground() {
       });
     }
 
+    const inputs = input
+      .split("\n")
+      .map((x) => x.trim())
+      .filter(Boolean);
     const body = {
       prompts,
       judge_model: judgeModel,
-      inputs: input
-        .split("\n")
-        .map((x) => x.trim())
-        .filter(Boolean),
+      inputs,
       rubric: rubricObj,
+      stream: "ndjson",
     };
 
     try {
@@ -126,8 +128,30 @@ export default function Playground() {
         const err = await res.json().catch(() => ({}));
         throw new Error(err.detail || `HTTP ${res.status}`);
       }
-      const data = await res.json();
-      setResults(data.results || []);
+      if (!res.body) {
+        throw new Error("Streaming responses are not supported by this browser");
+      }
+
+      // Fill in each prompt x input cell as its result arrives
+      const grid = prompts.map((p) => ({ prompt: p, results: Array(inputs.length).fill(null) }));
+      setResults(grid.map((b) => ({ ...b, results: [...b.results] })));
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() || "";
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line);
+          if (event.event !== "result") continue;
+          grid[event.prompt_idx].results[event.case_idx] = event.result;
+        }
+        setResults(grid.map((b) => ({ ...b, results: [...b.results] })));
+      }
     } catch (e: any) {
       setError(e.message || "Failed to reach API. Is the backend running?");
     } finally {
@@ -1,39 +1,54 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 from contextlib import asynccontextmanager
-from typing import Any
+from typing import Any, AsyncIterator, Literal
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, field_validator
 
-from promptops.core.adapters import make_adapter
+from promptops.core.adapters import AdapterRegistry, BaseAdapter
+from promptops.jobs import Job, JobManager
 from promptops.core.prompt import Prompt
-from promptops.core.runner import run_dataset, run_prompt_detailed
+from promptops.core.runner import (
+    ProgressHook,
+    load_run_prompt,
+    resume_distributed,
+    resume_run,
+    run_dataset,
+    run_distributed,
+    run_prompt_detailed,
+    stream_dataset,
+)
 from promptops.opt.optimizer import optimize_prompt
 from promptops.tests.dataset import demo_dataset
 from promptops.tests.testcase import TestCase
-from promptops.store.db import (
-    top_runs,
-    recent_runs,
-    init_db,
-    get_run,
-    get_run_results,
-    list_suites,
-    get_suite,
-    create_suite,
-    delete_suite,
-    get_suite_cases,
-    add_suite_case,
-    remove_suite_case,
-)
+from promptops.store import aio as store
+from promptops.tracking import make_tracker
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
-    yield
+    await store.init_db()
+    # Adapters are shared across requests so connection pools and SDK clients survive
+    app.state.adapters = AdapterRegistry()
+    app.state.tracker = make_tracker()
+    app.state.jobs = JobManager()
+    app.state.jobs.register("run", _run_job)
+    app.state.jobs.register("optimize", _optimize_job)
+    # Jobs interrupted by a crash or restart are queued again
+    await app.state.jobs.start()
+    try:
+        yield
+    finally:
+        await app.state.jobs.close()
+        await app.state.adapters.aclose()
+        await app.state.tracker.aclose()
+        await store.close_db()
 
 
 app = FastAPI(title="PromptOps", lifespan=lifespan)
@@ -48,6 +63,10 @@ app.add_middleware(
 )
 
 
+def get_adapter(provider: str) -> BaseAdapter:
+    return app.state.adapters.get(provider)
+
+
 class PromptPayload(BaseModel):
     name: str = "demo_prompt"
     system: str = "You are a helpful assistant."
@@ -64,6 +83,25 @@ class RunRequest(BaseModel):
     prompt: PromptPayload
     judge_model: str = "llama3.1"
     suite_id: int | None = None
+    judge_mode: Literal["single", "batch"] = "single"
+    judge_batch_size: int = Field(default=8, ge=1, le=64)
+    judge_context_limit: int = Field(default=8192, ge=512)
+    # Cancel the remaining cases once more than this many have failed
+    max_errors: int | None = Field(default=None, ge=0)
+    # Reuse stored results for cases unchanged since an earlier run of this prompt
+    incremental: bool = False
+    # Respond with NDJSON: one line per case as it completes, then a summary line
+    stream: bool = False
+    # Queue the run as a background job and return the job right away
+    background: bool = False
+    # Leave the cases to `promptops worker` processes sharing the store
+    distributed: bool = False
+
+
+class ResumeRequest(BaseModel):
+    max_errors: int | None = Field(default=None, ge=0)
+    # Requeue the unfinished cases for `promptops worker` processes
+    distributed: bool = False
 
 
 class PreviewRequest(BaseModel):
@@ -72,6 +110,10 @@ class PreviewRequest(BaseModel):
     judge_model: str = "llama3.1"
     inputs: list[str] | None = None
     rubric: dict[str, Any] | None = None
+    # "ndjson" or "sse" stream each result as it completes; "json" waits for all of them
+    stream: Literal["json", "ndjson", "sse"] = "json"
+    # Prompt x case evaluations in flight at once
+    concurrency: int = Field(default=8, ge=1, le=64)
 
     @field_validator("inputs")
     @classmethod
@@ -92,6 +134,15 @@ class OptimizeRequest(BaseModel):
     iterations: int = 2
     use_rewriter: bool = True
     rewriter_model: str | None = None
+    strategy: Literal["full", "racing"] = "full"
+    racing_initial_cases: int = Field(default=4, ge=1)
+    racing_drop_fraction: float = Field(default=0.5, gt=0.0, lt=1.0)
+    racing_confidence_z: float = Field(default=1.0, ge=0.0)
+    racing_budget: int | None = Field(default=None, ge=1)
+    seed: int | None = None
+    trace: bool = False
+    # Queue the optimization as a background job and return the job right away
+    background: bool = False
 
     @field_validator("iterations")
     @classmethod
@@ -120,39 +171,150 @@ def root() -> dict[str, Any]:
 @app.get("/health")
 async def health(provider: str = "ollama") -> dict[str, Any]:
     try:
-        adapter = make_adapter(provider)
+        adapter = get_adapter(provider)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     ok = await adapter.health_check()
-    return {"status": "ok" if ok else "unreachable", "provider": provider}
+    circuit = adapter.stats().get("circuit", {})
+    return {
+        "status": "ok" if ok else "unreachable",
+        "provider": provider,
+        "circuit": circuit.get("state"),
+    }
 
 
-@app.post("/run")
-async def run(req: RunRequest) -> dict[str, Any]:
-    adapter = make_adapter(req.prompt.provider)
-    prompt = Prompt(**req.prompt.model_dump())
+async def _load_testcases(suite_id: int | None) -> list[TestCase]:
+    if suite_id is None:
+        return demo_dataset()
+    suite_cases = await store.get_suite_cases(suite_id)
+    if not suite_cases:
+        raise HTTPException(status_code=404, detail="Suite not found or has no cases")
+    return [
+        TestCase(
+            input=sc["input"],
+            expected=sc.get("expected"),
+            rubric=sc.get("rubric"),
+        )
+        for sc in suite_cases
+    ]
+
+
+def _run_options(req: RunRequest) -> dict[str, Any]:
+    return dict(
+        judge_mode=req.judge_mode,
+        judge_batch_size=req.judge_batch_size,
+        judge_context_limit=req.judge_context_limit,
+        max_errors=req.max_errors,
+        incremental=req.incremental,
+        tracker=app.state.tracker,
+    )
+
 
-    if req.suite_id is not None:
-        suite_cases = get_suite_cases(req.suite_id)
-        if not suite_cases:
-            raise HTTPException(status_code=404, detail="Suite not found or has no cases")
-        testcases = [
-            TestCase(
-                input=sc["input"],
-                expected=sc.get("expected"),
-                rubric=sc.get("rubric"),
+async def _run_job(job: Job) -> dict[str, Any]:
+    req = RunRequest(**job.request)
+    if job.run_id is not None:
+        # Recovered after a restart: finish the run the job had started
+        if req.distributed:
+            return await resume_distributed(
+                job.run_id,
+                max_errors=req.max_errors,
+                tracker=app.state.tracker,
+                on_progress=job.report,
             )
-            for sc in suite_cases
-        ]
-    else:
-        testcases = demo_dataset()
+        return await resume_run(
+            get_adapter(req.prompt.provider),
+            job.run_id,
+            max_errors=req.max_errors,
+            tracker=app.state.tracker,
+            on_progress=job.report,
+        )
+    testcases = await _load_testcases(req.suite_id)
+    if req.distributed:
+        return await run_distributed(
+            Prompt(**req.prompt.model_dump()),
+            testcases,
+            req.judge_model,
+            **_run_options(req),
+            on_progress=job.report,
+        )
+    adapter = get_adapter(req.prompt.provider)
+    return await run_dataset(
+        adapter,
+        Prompt(**req.prompt.model_dump()),
+        testcases,
+        req.judge_model,
+        **_run_options(req),
+        on_progress=job.report,
+    )
 
-    results = await run_dataset(adapter, prompt, testcases, req.judge_model)
+
+async def _submit(kind: str, req: BaseModel) -> JSONResponse:
+    job = await app.state.jobs.submit(kind, req.model_dump())
+    return JSONResponse(status_code=202, content=job)
+
+
+@app.post("/run", response_model=None)
+async def run(req: RunRequest) -> dict[str, Any] | StreamingResponse | JSONResponse:
+    adapter = get_adapter(req.prompt.provider)
+    prompt = Prompt(**req.prompt.model_dump())
+    testcases = await _load_testcases(req.suite_id)
+
+    if req.stream and (req.background or req.distributed):
+        raise HTTPException(
+            status_code=400, detail="stream cannot be combined with background or distributed"
+        )
+    if req.background:
+        return await _submit("run", req)
+
+    if req.distributed:
+        return await run_distributed(prompt, testcases, req.judge_model, **_run_options(req))
+
+    if req.stream:
+        events = stream_dataset(adapter, prompt, testcases, req.judge_model, **_run_options(req))
+        return StreamingResponse(
+            (json.dumps(event) + "\n" async for event in events),
+            media_type="application/x-ndjson",
+        )
+
+    results = await run_dataset(adapter, prompt, testcases, req.judge_model, **_run_options(req))
     return results
 
 
-@app.post("/preview")
-async def preview(req: PreviewRequest) -> dict[str, Any]:
+async def _preview_results(
+    adapters: list[BaseAdapter],
+    prompts: list[Prompt],
+    testcases: list[TestCase],
+    judge_model: str,
+    concurrency: int,
+) -> AsyncIterator[dict[str, Any]]:
+    """Evaluate every prompt x case pair, at most ``concurrency`` at a time,
+    yielding each result as it completes."""
+    slots = asyncio.Semaphore(concurrency)
+
+    async def _one(p_idx: int, c_idx: int) -> dict[str, Any]:
+        async with slots:
+            result = await run_prompt_detailed(
+                adapters[p_idx], prompts[p_idx], testcases[c_idx], judge_model
+            )
+        return {"event": "result", "prompt_idx": p_idx, "case_idx": c_idx, "result": result}
+
+    tasks = [
+        asyncio.ensure_future(_one(p_idx, c_idx))
+        for p_idx in range(len(prompts))
+        for c_idx in range(len(testcases))
+    ]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        # The client went away or a result failed: stop the remaining calls
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@app.post("/preview", response_model=None)
+async def preview(req: PreviewRequest) -> dict[str, Any] | StreamingResponse:
     prompt_payloads = req.prompts or ([req.prompt] if req.prompt else [])
     prompts = [Prompt(**p.model_dump()) for p in prompt_payloads]
 
@@ -161,22 +323,48 @@ async def preview(req: PreviewRequest) -> dict[str, Any]:
     else:
         testcases = demo_dataset()
 
-    all_results = []
-    for prompt in prompts:
-        adapter = make_adapter(prompt.provider)
-        prompt_results = []
-        for tc in testcases:
-            prompt_results.append(
-                await run_prompt_detailed(adapter, prompt, tc, req.judge_model)
-            )
-        all_results.append({"prompt": prompt.model_dump(), "results": prompt_results})
+    # Fail on an unknown provider before any response is started
+    try:
+        adapters = [get_adapter(prompt.provider) for prompt in prompts]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    events = _preview_results(adapters, prompts, testcases, req.judge_model, req.concurrency)
+
+    if req.stream == "ndjson":
+        async def _ndjson() -> AsyncIterator[str]:
+            async for event in events:
+                yield json.dumps(event) + "\n"
+            yield json.dumps({"event": "done"}) + "\n"
+
+        return StreamingResponse(_ndjson(), media_type="application/x-ndjson")
+
+    if req.stream == "sse":
+        async def _sse() -> AsyncIterator[str]:
+            async for event in events:
+                yield f"event: result\ndata: {json.dumps(event)}\n\n"
+            yield "event: done\ndata: {}\n\n"
+
+        return StreamingResponse(
+            _sse(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-    return {"results": all_results}
+    grid: list[list[dict[str, Any] | None]] = [[None] * len(testcases) for _ in prompts]
+    async for event in events:
+        grid[event["prompt_idx"]][event["case_idx"]] = event["result"]
+    return {
+        "results": [
+            {"prompt": prompt.model_dump(), "results": results}
+            for prompt, results in zip(prompts, grid)
+        ]
+    }
 
 
-@app.post("/optimize")
-async def optimize(req: OptimizeRequest) -> dict[str, Any]:
-    adapter = make_adapter(req.prompt.provider)
+async def _optimize(
+    req: OptimizeRequest, on_progress: ProgressHook | None = None
+) -> dict[str, Any]:
+    adapter = get_adapter(req.prompt.provider)
     prompt = Prompt(**req.prompt.model_dump())
     results = await optimize_prompt(
         adapter=adapter,
@@ -186,79 +374,154 @@ async def optimize(req: OptimizeRequest) -> dict[str, Any]:
         iterations=req.iterations,
         use_rewriter=req.use_rewriter,
         rewriter_model=req.rewriter_model,
+        strategy=req.strategy,
+        racing_initial_cases=req.racing_initial_cases,
+        racing_drop_fraction=req.racing_drop_fraction,
+        racing_confidence_z=req.racing_confidence_z,
+        racing_budget=req.racing_budget,
+        seed=req.seed,
+        trace=req.trace,
+        tracker=app.state.tracker,
+        on_progress=on_progress,
     )
     return {
         "best_prompt": results["best_prompt"].model_dump(),
         "best_result": results["best_result"],
+        "rungs": results["rungs"],
     }
 
 
+async def _optimize_job(job: Job) -> dict[str, Any]:
+    return await _optimize(OptimizeRequest(**job.request), on_progress=job.report)
+
+
+@app.post("/optimize", response_model=None)
+async def optimize(req: OptimizeRequest) -> dict[str, Any] | JSONResponse:
+    if req.background:
+        get_adapter(req.prompt.provider)
+        return await _submit("optimize", req)
+    return await _optimize(req)
+
+
+# --- Job endpoints ---
+
+
+@app.get("/jobs")
+async def list_jobs(limit: int = 50, status: str | None = None) -> dict[str, Any]:
+    return {"jobs": await app.state.jobs.list(limit, status)}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int) -> dict[str, Any]:
+    job = await app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="not_found")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: int) -> StreamingResponse:
+    """NDJSON stream of the job's state after every change, ending once it finishes."""
+    if await app.state.jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="not_found")
+    events = app.state.jobs.watch(job_id)
+    return StreamingResponse(
+        (json.dumps(event, default=str) + "\n" async for event in events),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: int) -> dict[str, Any]:
+    job = await app.state.jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="not_found")
+    return job
+
+
+@app.get("/stats")
+async def stats() -> dict[str, Any]:
+    # On the event loop, like the adapters whose counters and windows it reads
+    return app.state.adapters.stats()
+
+
 @app.get("/leaderboard")
-def leaderboard() -> dict[str, Any]:
-    return {"runs": top_runs(10)}
+async def leaderboard() -> dict[str, Any]:
+    return {"runs": await store.top_runs(10)}
 
 
 @app.get("/runs")
-def runs(limit: int = 200) -> dict[str, Any]:
-    return {"runs": recent_runs(limit)}
+async def runs(limit: int = 200) -> dict[str, Any]:
+    return {"runs": await store.recent_runs(limit)}
 
 
 @app.get("/runs/{run_id}")
-def run_detail(run_id: int) -> dict[str, Any]:
-    run = get_run(run_id)
+async def run_detail(run_id: int) -> dict[str, Any]:
+    run = await store.get_run(run_id)
     if not run:
         raise HTTPException(status_code=404, detail="not_found")
-    results = get_run_results(run_id)
+    results = await store.get_run_results(run_id)
     return {"run": run, "results": results}
 
 
+@app.post("/runs/{run_id}/resume")
+async def resume(run_id: int, req: ResumeRequest | None = None) -> dict[str, Any]:
+    if not await store.get_run(run_id):
+        raise HTTPException(status_code=404, detail="not_found")
+    try:
+        prompt = await load_run_prompt(run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    max_errors = req.max_errors if req else None
+    if req is not None and req.distributed:
+        return await resume_distributed(run_id, max_errors=max_errors, tracker=app.state.tracker)
+    adapter = get_adapter(prompt.provider)
+    return await resume_run(adapter, run_id, max_errors=max_errors, tracker=app.state.tracker)
+
+
 # --- Suite endpoints ---
 
 @app.get("/suites")
-def list_suites_endpoint() -> dict[str, Any]:
-    return {"suites": list_suites()}
+async def list_suites_endpoint() -> dict[str, Any]:
+    return {"suites": await store.list_suites()}
 
 
 @app.post("/suites")
-def create_suite_endpoint(req: SuiteCreateRequest) -> dict[str, Any]:
-    suite_id = create_suite(req.name, req.description)
-    for idx, case in enumerate(req.cases):
-        add_suite_case(
-            suite_id=suite_id,
-            input_data=case.get("input", {}),
-            expected=case.get("expected"),
-            rubric=case.get("rubric"),
-            order_idx=idx,
-        )
-    suite = get_suite(suite_id)
-    cases = get_suite_cases(suite_id)
+async def create_suite_endpoint(req: SuiteCreateRequest) -> dict[str, Any]:
+    suite_id = await store.create_suite(req.name, req.description)
+    await store.add_suite_cases(
+        suite_id,
+        [{**case, "order_idx": idx} for idx, case in enumerate(req.cases)],
+    )
+    suite = await store.get_suite(suite_id)
+    cases = await store.get_suite_cases(suite_id)
     return {"suite": suite, "cases": cases}
 
 
 @app.get("/suites/{suite_id}")
-def get_suite_endpoint(suite_id: int) -> dict[str, Any]:
-    suite = get_suite(suite_id)
+async def get_suite_endpoint(suite_id: int) -> dict[str, Any]:
+    suite = await store.get_suite(suite_id)
     if not suite:
         raise HTTPException(status_code=404, detail="not_found")
-    cases = get_suite_cases(suite_id)
+    cases = await store.get_suite_cases(suite_id)
     return {"suite": suite, "cases": cases}
 
 
 @app.delete("/suites/{suite_id}")
-def delete_suite_endpoint(suite_id: int) -> dict[str, Any]:
-    suite = get_suite(suite_id)
+async def delete_suite_endpoint(suite_id: int) -> dict[str, Any]:
+    suite = await store.get_suite(suite_id)
     if not suite:
         raise HTTPException(status_code=404, detail="not_found")
-    delete_suite(suite_id)
+    await store.delete_suite(suite_id)
     return {"deleted": suite_id}
 
 
 @app.post("/suites/{suite_id}/cases")
-def add_suite_case_endpoint(suite_id: int, req: SuiteCaseRequest) -> dict[str, Any]:
-    suite = get_suite(suite_id)
+async def add_suite_case_endpoint(suite_id: int, req: SuiteCaseRequest) -> dict[str, Any]:
+    suite = await store.get_suite(suite_id)
     if not suite:
         raise HTTPException(status_code=404, detail="not_found")
-    case_id = add_suite_case(
+    case_id = await store.add_suite_case(
         suite_id=suite_id,
         input_data=req.input,
         expected=req.expected,
@@ -269,6 +532,6 @@ def add_suite_case_endpoint(suite_id: int, req: SuiteCaseRequest) -> dict[str, A
 
 
 @app.delete("/suites/{suite_id}/cases/{case_id}")
-def remove_suite_case_endpoint(suite_id: int, case_id: int) -> dict[str, Any]:
-    remove_suite_case(case_id)
+async def remove_suite_case_endpoint(suite_id: int, case_id: int) -> dict[str, Any]:
+    await store.remove_suite_case(case_id)
     return {"deleted": case_id}
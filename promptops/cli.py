@@ -1,15 +1,23 @@
 from __future__ import annotations
 
 import asyncio
-import sys
+import json
 
 import typer
 
-from promptops.core.adapters import make_adapter
+from promptops.core.adapters import AdapterRegistry
 from promptops.core.prompt import Prompt
-from promptops.core.runner import run_dataset
+from promptops.core.runner import (
+    load_run_prompt,
+    resume_run,
+    run_dataset,
+    run_distributed,
+    stream_dataset,
+)
 from promptops.opt.optimizer import optimize_prompt
 from promptops.tests.dataset import demo_dataset
+from promptops.tracking import make_tracker
+from promptops.workers import LEASE_S, WORKER_CONCURRENCY, LocalWorkers, run_worker
 from promptops.store.db import (
     init_db,
     list_suites,
@@ -28,7 +36,27 @@ def run(
     model: str = "llama3.1",
     judge_model: str = "llama3.1",
     provider: str = "ollama",
+    judge_mode: str = typer.Option("single", help="single | batch"),
+    judge_batch_size: int = 8,
+    judge_context_limit: int = 8192,
+    max_errors: int | None = typer.Option(
+        None, help="Cancel remaining cases after this many failures"
+    ),
+    incremental: bool = typer.Option(False, help="Reuse stored results for unchanged cases"),
+    stream: bool = typer.Option(
+        False, help="Print each case as it completes (one JSON line per case)"
+    ),
+    distributed: bool = typer.Option(
+        False, help="Queue the cases for `promptops worker` processes"
+    ),
+    local_workers: int = typer.Option(
+        0, help="With --distributed, run this many local worker processes"
+    ),
 ):
+    if distributed and stream:
+        typer.echo("--distributed and --stream cannot be combined", err=True)
+        raise typer.Exit(code=1)
+
     prompt = Prompt(
         name="demo_prompt",
         system="You are a helpful assistant.",
@@ -39,11 +67,55 @@ def run(
     )
 
     async def _run():
-        adapter = make_adapter(provider)
-        results = await run_dataset(adapter, prompt, demo_dataset(), judge_model)
-        return results
+        if distributed:
+            async with make_tracker() as tracker:
+                return await run_distributed(
+                    prompt,
+                    demo_dataset(),
+                    judge_model,
+                    judge_mode=judge_mode,
+                    judge_batch_size=judge_batch_size,
+                    judge_context_limit=judge_context_limit,
+                    tracker=tracker,
+                    max_errors=max_errors,
+                    incremental=incremental,
+                )
+        async with AdapterRegistry() as registry, make_tracker() as tracker:
+            adapter = registry.get(provider)
+            if not stream:
+                return await run_dataset(
+                    adapter,
+                    prompt,
+                    demo_dataset(),
+                    judge_model,
+                    judge_mode=judge_mode,
+                    judge_batch_size=judge_batch_size,
+                    judge_context_limit=judge_context_limit,
+                    tracker=tracker,
+                    max_errors=max_errors,
+                    incremental=incremental,
+                )
+            async for event in stream_dataset(
+                adapter,
+                prompt,
+                demo_dataset(),
+                judge_model,
+                judge_mode=judge_mode,
+                judge_batch_size=judge_batch_size,
+                judge_context_limit=judge_context_limit,
+                tracker=tracker,
+                max_errors=max_errors,
+                incremental=incremental,
+            ):
+                if event["event"] == "summary":
+                    return event
+                typer.echo(json.dumps(event))
 
-    results = asyncio.run(_run())
+    if distributed and local_workers > 0:
+        with LocalWorkers(local_workers):
+            results = asyncio.run(_run())
+    else:
+        results = asyncio.run(_run())
 
     if results.get("regression"):
         typer.echo(
@@ -58,6 +130,63 @@ def run(
     typer.echo(results)
 
 
+@app.command()
+def resume(
+    run_id: int,
+    max_errors: int | None = typer.Option(
+        None, help="Cancel remaining cases after this many failures"
+    ),
+):
+    """Finish an interrupted run, executing only the cases without a result."""
+
+    async def _run():
+        prompt = await load_run_prompt(run_id)
+        async with AdapterRegistry() as registry, make_tracker() as tracker:
+            adapter = registry.get(prompt.provider)
+            return await resume_run(adapter, run_id, tracker=tracker, max_errors=max_errors)
+
+    try:
+        results = asyncio.run(_run())
+    except ValueError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(code=1)
+
+    if results.get("regression"):
+        typer.echo(
+            typer.style(
+                f"\n⚠  REGRESSION: {results['regression_warning']}",
+                fg=typer.colors.RED,
+                bold=True,
+            ),
+            err=True,
+        )
+
+    typer.echo(results)
+
+
+@app.command()
+def worker(
+    concurrency: int = typer.Option(WORKER_CONCURRENCY, help="Cases evaluated at once"),
+    lease_s: float = typer.Option(LEASE_S, help="Seconds a case stays claimed without a heartbeat"),
+    poll_interval_s: float = typer.Option(1.0, help="Seconds between polls of an empty queue"),
+    max_attempts: int = typer.Option(3, help="Give up on a case after this many leases"),
+    worker_id: str | None = typer.Option(None, help="Defaults to host-pid-random"),
+    exit_when_idle: bool = typer.Option(False, help="Exit once the queue is empty"),
+):
+    """Evaluate queued cases of distributed runs until stopped (SIGINT/SIGTERM)."""
+    stats = asyncio.run(
+        run_worker(
+            worker_id=worker_id,
+            concurrency=concurrency,
+            lease_s=lease_s,
+            poll_interval_s=poll_interval_s,
+            max_attempts=max_attempts,
+            stop_when_idle=exit_when_idle,
+        )
+    )
+    typer.echo(stats)
+
+
 @app.command()
 def optimize(
     model: str = "llama3.1",
@@ -66,6 +195,15 @@ def optimize(
     use_rewriter: bool = True,
     rewriter_model: str | None = None,
     provider: str = "ollama",
+    strategy: str = typer.Option("full", help="full | racing"),
+    racing_initial_cases: int = 4,
+    racing_budget: int | None = typer.Option(
+        None, help="Max (candidate, case) evaluations spent racing"
+    ),
+    seed: int | None = None,
+    trace: bool = typer.Option(
+        False, help="Persist every candidate evaluation, not just the winner"
+    ),
 ):
     prompt = Prompt(
         name="demo_prompt",
@@ -77,17 +215,23 @@ def optimize(
     )
 
     async def _run():
-        adapter = make_adapter(provider)
-        results = await optimize_prompt(
-            adapter,
-            prompt,
-            demo_dataset(),
-            judge_model,
-            iterations,
-            use_rewriter,
-            rewriter_model,
-        )
-        return results
+        async with AdapterRegistry() as registry, make_tracker() as tracker:
+            adapter = registry.get(provider)
+            return await optimize_prompt(
+                adapter,
+                prompt,
+                demo_dataset(),
+                judge_model,
+                iterations,
+                use_rewriter,
+                rewriter_model,
+                strategy=strategy,
+                racing_initial_cases=racing_initial_cases,
+                racing_budget=racing_budget,
+                seed=seed,
+                trace=trace,
+                tracker=tracker,
+            )
 
     results = asyncio.run(_run())
     typer.echo(results)
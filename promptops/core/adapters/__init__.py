@@ -4,6 +4,12 @@ from .base import BaseAdapter, ModelResponse
 from .ollama import OllamaAdapter
 from .openai import OpenAIAdapter
 from .anthropic import AnthropicAdapter
+from .breaker import BreakerPolicy, CircuitBreakerAdapter, CircuitOpenError
+from .cache import CachedAdapter, ResponseCache
+from .registry import AdapterRegistry
+from .retry import RetryingAdapter, RetryPolicy
+from .scheduler import ProviderLimits, RequestScheduler, ScheduledAdapter
+from .singleflight import SingleflightAdapter
 
 
 def make_adapter(provider: str, **kwargs) -> BaseAdapter:
@@ -19,10 +25,22 @@ def make_adapter(provider: str, **kwargs) -> BaseAdapter:
 
 
 __all__ = [
+    "AdapterRegistry",
     "BaseAdapter",
+    "BreakerPolicy",
+    "CachedAdapter",
+    "CircuitBreakerAdapter",
+    "CircuitOpenError",
     "ModelResponse",
     "OllamaAdapter",
     "OpenAIAdapter",
     "AnthropicAdapter",
+    "ProviderLimits",
+    "RequestScheduler",
+    "ResponseCache",
+    "RetryingAdapter",
+    "RetryPolicy",
+    "ScheduledAdapter",
+    "SingleflightAdapter",
     "make_adapter",
 ]
@@ -8,9 +8,33 @@ from .base import BaseAdapter, ModelResponse
 
 
 class AnthropicAdapter(BaseAdapter):
-    def __init__(self, api_key: str | None = None, timeout_s: float = 120.0):
+    """Adapter holding one ``anthropic.AsyncAnthropic`` client for its lifetime."""
+
+    provider = "anthropic"
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        timeout_s: float = 120.0,
+        base_url: str | None = None,
+    ):
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY", "")
         self.timeout_s = timeout_s
+        self.base_url = base_url
+        self._client: Any = None
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            import anthropic
+
+            self._client = anthropic.AsyncAnthropic(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout_s,
+                # RetryingAdapter owns retries; SDK retries would multiply them
+                max_retries=0,
+            )
+        return self._client
 
     async def generate(
         self,
@@ -19,9 +43,7 @@ class AnthropicAdapter(BaseAdapter):
         prompt: str,
         params: Dict[str, Any],
     ) -> ModelResponse:
-        import anthropic
-
-        client = anthropic.AsyncAnthropic(api_key=self.api_key, timeout=self.timeout_s)
+        client = self._get_client()
 
         max_tokens = params.get("max_tokens", 1024)
         kwargs: Dict[str, Any] = {"max_tokens": max_tokens}
@@ -60,15 +82,14 @@ class AnthropicAdapter(BaseAdapter):
 
     async def health_check(self) -> bool:
         try:
-            import anthropic
-
-            client = anthropic.AsyncAnthropic(api_key=self.api_key, timeout=5.0)
-            await client.messages.create(
-                model="claude-haiku-4-5-20251001",
-                system="ping",
-                messages=[{"role": "user", "content": "ping"}],
-                max_tokens=1,
-            )
+            client = self._get_client().with_options(timeout=5.0)
+            # Listing models checks reachability and credentials without a billed call
+            await client.models.list(limit=1)
             return True
         except Exception:
             return False
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
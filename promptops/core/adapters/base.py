@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict
 
@@ -13,9 +14,22 @@ class ModelResponse(BaseModel):
     total_tokens: int | None = None
     latency_ms: float | None = None
     raw: Dict[str, Any] = {}
+    # True when served from a response cache; latency_ms is then the original call's
+    cached: bool = False
+    # Retries spent on this response and whether a hedged duplicate was sent
+    retries: int = 0
+    hedged: bool = False
+    # True when this caller shared another caller's identical in-flight request
+    coalesced: bool = False
 
 
 class BaseAdapter(ABC):
+    provider: str = "custom"
+    # True when generate_many() can return n completions from a single request
+    supports_multi_sample: bool = False
+    # Independent backends the adapter spreads calls over (hosts of a pool)
+    hosts: int = 1
+
     @abstractmethod
     async def generate(
         self,
@@ -25,5 +39,37 @@ class BaseAdapter(ABC):
         params: Dict[str, Any],
     ) -> ModelResponse: ...
 
+    async def generate_many(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+        n: int,
+    ) -> list[ModelResponse]:
+        """Return ``n`` independent completions; by default one request each."""
+        return list(
+            await asyncio.gather(
+                *[
+                    self.generate(model=model, system=system, prompt=prompt, params=params)
+                    for _ in range(n)
+                ]
+            )
+        )
+
     @abstractmethod
     async def health_check(self) -> bool: ...
+
+    def stats(self) -> Dict[str, Any]:
+        """Runtime counters exposed by the adapter and any wrappers around it."""
+        return {}
+
+    async def aclose(self) -> None:
+        """Release any connections held by the adapter."""
+        return None
+
+    async def __aenter__(self) -> "BaseAdapter":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from pydantic import BaseModel
+
+from .base import BaseAdapter, ModelResponse
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class BreakerPolicy(BaseModel):
+    """Circuit-breaker and health-check settings for one adapter."""
+
+    # Consecutive failed calls that open the circuit
+    failure_threshold: int = 5
+    # How long the circuit stays open before a half-open probe is let through
+    reset_timeout_s: float = 30.0
+    # Concurrent probe calls allowed while half-open
+    half_open_max_calls: int = 1
+    # How long a health_check result is reused
+    health_ttl_s: float = 30.0
+
+
+def _is_failure(exc: BaseException) -> bool:
+    """Provider-side failures count against the circuit; request errors do not.
+
+    Timeouts, connection errors and 5xx/408/429 responses are failures. Other
+    4xx responses mean the request itself was bad and say nothing about the
+    provider's health.
+    """
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in (408, 429)
+    return True
+
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive failures; open →
+    half-open after ``reset_timeout_s``; half-open → closed on a successful
+    probe, or back to open on a failed one."""
+
+    def __init__(self, policy: BreakerPolicy | None = None):
+        self.policy = policy or BreakerPolicy()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self._probes = 0
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.state = state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        if state != HALF_OPEN:
+            self._probes = 0
+
+    def _admit(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.policy.reset_timeout_s:
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes >= self.policy.half_open_max_calls:
+                return False
+            self._probes += 1
+        return True
+
+    def _on_success(self) -> None:
+        self.consecutive_failures = 0
+        self._transition(CLOSED)
+
+    def _on_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.policy.failure_threshold:
+            self._transition(OPEN)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self._admit():
+            self.rejected += 1
+            raise CircuitOpenError(
+                f"Circuit open after {self.consecutive_failures} consecutive failures; "
+                f"retrying in {self.retry_in():.1f}s"
+            )
+        probe = self.state == HALF_OPEN
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            if probe:
+                self._probes -= 1
+            raise
+        except Exception as e:
+            if _is_failure(e):
+                self._on_failure()
+            elif probe:
+                self._probes -= 1
+            raise
+        self._on_success()
+        return result
+
+    def available(self) -> bool:
+        """Whether a call would be let through now, without claiming a probe."""
+        if self.state == OPEN:
+            return self.retry_in() == 0.0
+        if self.state == HALF_OPEN:
+            return self._probes < self.policy.half_open_max_calls
+        return True
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.policy.reset_timeout_s - (time.monotonic() - self.opened_at))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+        }
+
+
+class CircuitBreakerAdapter(BaseAdapter):
+    """Guards the wrapped adapter with a CircuitBreaker and caches health checks.
+
+    ``health_check`` results are reused for ``policy.health_ttl_s`` seconds and
+    concurrent checks share one probe. While the circuit is open the adapter
+    reports unhealthy without probing.
+    """
+
+    def __init__(self, inner: BaseAdapter, policy: BreakerPolicy | None = None):
+        self.inner = inner
+        self.breaker = CircuitBreaker(policy)
+        self.provider = inner.provider
+        self.supports_multi_sample = inner.supports_multi_sample
+        self._health: tuple[float, bool] | None = None
+        self._health_task: asyncio.Task[bool] | None = None
+
+    async def generate(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+    ) -> ModelResponse:
+        return await self.breaker.call(
+            lambda: self.inner.generate(model=model, system=system, prompt=prompt, params=params)
+        )
+
+    async def generate_many(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+        n: int,
+    ) -> list[ModelResponse]:
+        if not self.supports_multi_sample:
+            return await super().generate_many(model, system, prompt, params, n)
+        return await self.breaker.call(
+            lambda: self.inner.generate_many(
+                model=model, system=system, prompt=prompt, params=params, n=n
+            )
+        )
+
+    async def health_check(self) -> bool:
+        if self.breaker.state == OPEN and self.breaker.retry_in() > 0:
+            return False
+        if self._health is not None:
+            checked_at, ok = self._health
+            if time.monotonic() - checked_at < self.breaker.policy.health_ttl_s:
+                return ok
+        if self._health_task is None:
+            self._health_task = asyncio.ensure_future(self._probe())
+        return await asyncio.shield(self._health_task)
+
+    async def _probe(self) -> bool:
+        try:
+            ok = await self.inner.health_check()
+            self._health = (time.monotonic(), ok)
+            return ok
+        finally:
+            self._health_task = None
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        health = None
+        if self._health is not None:
+            checked_at, ok = self._health
+            health = {"ok": ok, "age_s": round(time.monotonic() - checked_at, 1)}
+        return {**self.inner.stats(), "circuit": {**self.breaker.stats(), "health": health}}
@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict
+
+from .base import BaseAdapter, ModelResponse
+
+CACHE_DB_PATH = Path(os.getenv("PROMPTOPS_CACHE_DB", "./promptops_cache.db"))
+# Milliseconds the cache connection waits on another process's lock before failing
+BUSY_TIMEOUT_MS = int(os.getenv("PROMPTOPS_DB_BUSY_TIMEOUT_MS", "5000"))
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(
+    provider: str,
+    model: str,
+    system: str,
+    prompt: str,
+    params: Dict[str, Any],
+) -> str:
+    raw = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "system": system,
+            "prompt": prompt,
+            "params": params,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(params: Dict[str, Any]) -> bool:
+    return params.get("temperature") == 0 or params.get("seed") is not None
+
+
+class ResponseCache:
+    """Two-tier response cache: an in-memory LRU in front of a SQLite file.
+
+    Entries expire after ``ttl_s`` seconds (``None`` keeps them forever); each
+    tier evicts least-recently-used entries beyond its size limit. Pass
+    ``path=None`` for a memory-only cache.
+
+    The LRU has its own lock and is only held for dictionary updates, so the
+    event loop never waits on disk I/O; SQLite is only touched from worker
+    threads, serialised by a separate lock.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | None = CACHE_DB_PATH,
+        max_memory_entries: int = 2048,
+        max_disk_entries: int = 100_000,
+        ttl_s: float | None = 7 * 24 * 3600.0,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Lookups and stores that failed on disk and were treated as misses
+        self.errors = 0
+        self._memory: OrderedDict[str, tuple[float, ModelResponse]] = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._puts_since_evict = 0
+
+    def _disk(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=BUSY_TIMEOUT_MS / 1000.0, check_same_thread=False
+            )
+            # Several processes (API, workers) share the cache file
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_s is not None and now - created_at > self.ttl_s
+
+    def _remember(self, key: str, created_at: float, resp: ModelResponse) -> None:
+        with self._memory_lock:
+            self._memory[key] = (created_at, resp)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+                self.evictions += 1
+
+    def _get_memory(self, key: str, now: float) -> ModelResponse | None:
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            created_at, resp = entry
+            if self._expired(created_at, now):
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            self.memory_hits += 1
+            return resp
+
+    def _get_disk(self, key: str, now: float) -> ModelResponse | None:
+        with self._disk_lock:
+            conn = self._disk()
+            with conn:
+                row = conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self._expired(row[1], now):
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                elif row is not None:
+                    conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        if row is None:
+            with self._memory_lock:
+                self.misses += 1
+            return None
+        resp = ModelResponse.model_validate_json(row[0])
+        self._remember(key, row[1], resp)
+        with self._memory_lock:
+            self.hits += 1
+        return resp
+
+    def _put_disk(self, key: str, resp: ModelResponse, now: float) -> None:
+        evicted = 0
+        with self._disk_lock:
+            conn = self._disk()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    # Provider payloads (e.g. Ollama's context tokens) are not worth persisting
+                    (key, resp.model_copy(update={"raw": {}}).model_dump_json(), now, now),
+                )
+                self._puts_since_evict += 1
+                # Amortise the eviction scan over many writes
+                if self._puts_since_evict >= 100:
+                    self._puts_since_evict = 0
+                    evicted = self._evict_disk(conn, now)
+        if evicted:
+            with self._memory_lock:
+                self.evictions += evicted
+
+    def _evict_disk(self, conn: sqlite3.Connection, now: float) -> int:
+        evicted = 0
+        if self.ttl_s is not None:
+            cur = conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,))
+            evicted += cur.rowcount
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            evicted += excess
+        return evicted
+
+    async def get(self, key: str) -> ModelResponse | None:
+        now = time.time()
+        resp = self._get_memory(key, now)
+        if resp is not None:
+            return resp
+        if self.path is None:
+            with self._memory_lock:
+                self.misses += 1
+            return None
+        return await asyncio.to_thread(self._get_disk, key, now)
+
+    async def put(self, key: str, resp: ModelResponse) -> None:
+        now = time.time()
+        self._remember(key, now, resp)
+        if self.path is not None:
+            await asyncio.to_thread(self._put_disk, key, resp, now)
+
+    def _failed(self, action: str, exc: sqlite3.Error) -> None:
+        with self._memory_lock:
+            self.errors += 1
+        logger.warning("Response cache %s failed: %s", action, exc)
+
+    def clear(self) -> None:
+        with self._memory_lock:
+            self._memory.clear()
+        if self.path is not None:
+            with self._disk_lock:
+                conn = self._disk()
+                conn.execute("DELETE FROM responses")
+                conn.commit()
+
+    def close(self) -> None:
+        with self._disk_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._memory_lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "errors": self.errors,
+            }
+
+
+class CachedAdapter(BaseAdapter):
+    """Serves repeated ``generate`` calls from a ResponseCache.
+
+    With ``policy="deterministic"`` (the default) only calls at temperature 0
+    or with a fixed seed are cached; ``"always"`` caches every call and
+    ``"never"`` disables the cache. Hits come back with ``cached=True``.
+    """
+
+    def __init__(self, inner: BaseAdapter, cache: ResponseCache, policy: str = "deterministic"):
+        if policy not in ("deterministic", "always", "never"):
+            raise ValueError(f"Unknown cache policy: {policy!r}")
+        self.inner = inner
+        self.cache = cache
+        self.policy = policy
+        self.provider = inner.provider
+        self.supports_multi_sample = inner.supports_multi_sample
+
+    def _cacheable(self, params: Dict[str, Any]) -> bool:
+        if self.policy == "always":
+            return True
+        if self.policy == "never":
+            return False
+        return is_deterministic(params)
+
+    async def generate(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+    ) -> ModelResponse:
+        if not self._cacheable(params):
+            return await self.inner.generate(
+                model=model, system=system, prompt=prompt, params=params
+            )
+
+        key = cache_key(self.provider, model, system, prompt, params)
+        try:
+            hit = await self.cache.get(key)
+        except sqlite3.Error as e:
+            # The cache is an optimisation; a locked or broken cache file is just a miss
+            self.cache._failed("lookup", e)
+            hit = None
+        if hit is not None:
+            return hit.model_copy(update={"cached": True, "retries": 0, "hedged": False})
+
+        resp = await self.inner.generate(model=model, system=system, prompt=prompt, params=params)
+        try:
+            await self.cache.put(key, resp)
+        except sqlite3.Error as e:
+            self.cache._failed("store", e)
+        return resp
+
+    async def generate_many(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+        n: int,
+    ) -> list[ModelResponse]:
+        if not self.supports_multi_sample:
+            return await super().generate_many(model, system, prompt, params, n)
+        # Multi-sample requests exist to get distinct completions; never cache them
+        return await self.inner.generate_many(
+            model=model, system=system, prompt=prompt, params=params, n=n
+        )
+
+    async def health_check(self) -> bool:
+        return await self.inner.health_check()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.inner.stats()
@@ -1,17 +1,180 @@
 from __future__ import annotations
 
+import asyncio
+import collections
 import os
+import time
 from typing import Any, Dict
 
 import httpx
 
 from .base import BaseAdapter, ModelResponse
+from .breaker import BreakerPolicy, CircuitBreaker
+
+
+def _model_key(name: str) -> str:
+    # /api/ps reports "llama3.1:latest" for a model requested as "llama3.1"
+    return name if ":" in name else f"{name}:latest"
+
+
+class _Endpoint:
+    """One Ollama host of the pool: its client, circuit, resident models and counters."""
+
+    def __init__(self, base_url: str, policy: BreakerPolicy, window_s: float):
+        self.base_url = base_url
+        self.breaker = CircuitBreaker(policy)
+        self.client: httpx.AsyncClient | None = None
+        # Updated from /api/ps; a failed probe takes the host out of rotation
+        self.healthy = True
+        self.resident: set[str] = set()
+        self.ps_checked_at: float | None = None
+        self.ps_task: asyncio.Task[None] | None = None
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.latency_ms: float | None = None
+        self.window_s = window_s
+        # (finished_at, completion_tokens) of the calls within the last window_s
+        self._recent: collections.deque[tuple[float, int]] = collections.deque()
+
+    def record(self, latency_ms: float, completion_tokens: int | None) -> None:
+        # Exponentially weighted so a host that slows down is noticed quickly
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms = 0.8 * self.latency_ms + 0.2 * latency_ms
+        now = time.monotonic()
+        self._recent.append((now, completion_tokens or 0))
+        self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._recent and now - self._recent[0][0] > self.window_s:
+            self._recent.popleft()
+
+    def stats(self) -> Dict[str, Any]:
+        self._trim(time.monotonic())
+        tokens = sum(n for _, n in self._recent)
+        return {
+            "state": self.breaker.state,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "requests_per_s": round(len(self._recent) / self.window_s, 3),
+            "tokens_per_s": round(tokens / self.window_s, 1),
+            "resident_models": sorted(self.resident),
+        }
 
 
 class OllamaAdapter(BaseAdapter):
-    def __init__(self, base_url: str | None = None, timeout_s: float = 120.0):
-        self.base_url = base_url or os.getenv("OLLAMA_URL", "http://localhost:11434")
+    """Ollama adapter over one or more hosts, each with a pooled ``httpx.AsyncClient``.
+
+    Clients are created lazily on first use and kept for the adapter's
+    lifetime, so generations and judge calls reuse keep-alive connections.
+    Call ``aclose()`` (or use the adapter as an async context manager) to
+    release the pools.
+
+    ``base_url`` may be a list of hosts (or ``OLLAMA_URL`` a comma-separated
+    one). Each call goes to the host with the fewest outstanding requests,
+    where a host that does not have the model loaded counts as
+    ``affinity_weight`` requests busier, so models stay where they are
+    resident unless those hosts fall behind. Resident models are read from
+    ``/api/ps`` every ``ps_ttl_s`` seconds; a host that fails that probe, or
+    whose circuit opens after ``endpoint_policy.failure_threshold``
+    consecutive failed calls, is left out until it recovers.
+    """
+
+    provider = "ollama"
+
+    def __init__(
+        self,
+        base_url: str | list[str] | None = None,
+        timeout_s: float = 120.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        affinity_weight: int = 4,
+        ps_ttl_s: float = 10.0,
+        endpoint_policy: BreakerPolicy | None = None,
+        stats_window_s: float = 60.0,
+    ):
+        urls = base_url or os.getenv("OLLAMA_URL", "http://localhost:11434")
+        if isinstance(urls, str):
+            urls = [u.strip() for u in urls.split(",") if u.strip()]
+        if not urls:
+            raise ValueError("OllamaAdapter needs at least one base URL")
+        self.base_urls = list(urls)
         self.timeout_s = timeout_s
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.affinity_weight = affinity_weight
+        self.ps_ttl_s = ps_ttl_s
+        policy = endpoint_policy or BreakerPolicy(failure_threshold=3, reset_timeout_s=10.0)
+        self.endpoints = [_Endpoint(url, policy, stats_window_s) for url in self.base_urls]
+        self.hosts = len(self.endpoints)
+
+    def _get_client(self, endpoint: _Endpoint) -> httpx.AsyncClient:
+        if endpoint.client is None or endpoint.client.is_closed:
+            # http2=True requires the optional ``h2`` package (pip install "httpx[http2]")
+            endpoint.client = httpx.AsyncClient(
+                base_url=endpoint.base_url,
+                timeout=self.timeout_s,
+                limits=self.limits,
+                http2=self.http2,
+            )
+        return endpoint.client
+
+    async def _refresh(self, endpoint: _Endpoint) -> None:
+        try:
+            resp = await self._get_client(endpoint).get("/api/ps", timeout=5.0)
+            resp.raise_for_status()
+            endpoint.resident = {
+                _model_key(m.get("model") or m.get("name", ""))
+                for m in resp.json().get("models", [])
+            }
+            endpoint.healthy = True
+        except Exception:
+            endpoint.healthy = False
+        finally:
+            endpoint.ps_checked_at = time.monotonic()
+            endpoint.ps_task = None
+
+    def _refresh_stale(self) -> list[asyncio.Task[None]]:
+        now = time.monotonic()
+        for ep in self.endpoints:
+            stale = ep.ps_checked_at is None or now - ep.ps_checked_at >= self.ps_ttl_s
+            if stale and ep.ps_task is None:
+                ep.ps_task = asyncio.ensure_future(self._refresh(ep))
+        return [ep.ps_task for ep in self.endpoints if ep.ps_task is not None]
+
+    async def _pick(self, model: str) -> _Endpoint:
+        if len(self.endpoints) == 1:
+            return self.endpoints[0]
+        pending = self._refresh_stale()
+        if any(ep.ps_checked_at is None for ep in self.endpoints):
+            # First call: learn where the model is loaded before placing it
+            await asyncio.gather(*(asyncio.shield(t) for t in pending))
+
+        key = _model_key(model)
+        usable = [ep for ep in self.endpoints if ep.healthy and ep.breaker.available()]
+        if not usable:
+            usable = [ep for ep in self.endpoints if ep.breaker.available()]
+        if not usable:
+            # Every circuit is open: the soonest to reopen raises CircuitOpenError
+            return min(self.endpoints, key=lambda ep: ep.breaker.retry_in())
+        return min(
+            usable,
+            key=lambda ep: (
+                ep.outstanding + (0 if key in ep.resident else self.affinity_weight),
+                ep.latency_ms or 0.0,
+            ),
+        )
 
     async def generate(
         self,
@@ -25,7 +188,6 @@ class OllamaAdapter(BaseAdapter):
         if "max_tokens" in params:
             mapped_params["num_predict"] = params["max_tokens"]
 
-        url = f"{self.base_url}/api/generate"
         payload = {
             "model": model,
             "system": system,
@@ -33,10 +195,24 @@ class OllamaAdapter(BaseAdapter):
             "stream": False,
             **mapped_params,
         }
-        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
-            resp = await client.post(url, json=payload)
+        endpoint = await self._pick(model)
+
+        async def _post() -> httpx.Response:
+            resp = await self._get_client(endpoint).post("/api/generate", json=payload)
             resp.raise_for_status()
-            data = resp.json()
+            return resp
+
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        started = time.monotonic()
+        try:
+            resp = await endpoint.breaker.call(_post)
+        except Exception:
+            endpoint.failures += 1
+            raise
+        finally:
+            endpoint.outstanding -= 1
+        data = resp.json()
 
         prompt_tokens = data.get("prompt_eval_count")
         completion_tokens = data.get("eval_count")
@@ -44,6 +220,10 @@ class OllamaAdapter(BaseAdapter):
         if prompt_tokens is not None and completion_tokens is not None:
             total_tokens = prompt_tokens + completion_tokens
 
+        endpoint.record((time.monotonic() - started) * 1000.0, completion_tokens)
+        # Ollama keeps the model loaded after serving it
+        endpoint.resident.add(_model_key(model))
+
         return ModelResponse(
             output=data.get("response", ""),
             prompt_tokens=prompt_tokens,
@@ -53,10 +233,28 @@ class OllamaAdapter(BaseAdapter):
             raw=data,
         )
 
-    async def health_check(self) -> bool:
+    async def _check(self, endpoint: _Endpoint) -> bool:
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                resp = await client.get(f"{self.base_url}/api/tags")
-                return resp.status_code == 200
+            resp = await self._get_client(endpoint).get("/api/tags", timeout=5.0)
+            endpoint.healthy = resp.status_code == 200
         except Exception:
-            return False
+            endpoint.healthy = False
+        return endpoint.healthy
+
+    async def health_check(self) -> bool:
+        """True when at least one host answers; unhealthy hosts leave the rotation."""
+        results = await asyncio.gather(*(self._check(ep) for ep in self.endpoints))
+        return any(results)
+
+    async def aclose(self) -> None:
+        probes = [ep.ps_task for ep in self.endpoints if ep.ps_task is not None]
+        for task in probes:
+            task.cancel()
+        await asyncio.gather(*probes, return_exceptions=True)
+        for ep in self.endpoints:
+            if ep.client is not None:
+                await ep.client.aclose()
+                ep.client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"endpoints": {ep.base_url: ep.stats() for ep in self.endpoints}}
@@ -8,9 +8,34 @@ from .base import BaseAdapter, ModelResponse
 
 
 class OpenAIAdapter(BaseAdapter):
-    def __init__(self, api_key: str | None = None, timeout_s: float = 120.0):
+    """Adapter holding one ``openai.AsyncOpenAI`` client for its lifetime."""
+
+    provider = "openai"
+    supports_multi_sample = True
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        timeout_s: float = 120.0,
+        base_url: str | None = None,
+    ):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY", "")
         self.timeout_s = timeout_s
+        self.base_url = base_url
+        self._client: Any = None
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            import openai
+
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout_s,
+                # RetryingAdapter owns retries; SDK retries would multiply them
+                max_retries=0,
+            )
+        return self._client
 
     async def generate(
         self,
@@ -19,9 +44,7 @@ class OpenAIAdapter(BaseAdapter):
         prompt: str,
         params: Dict[str, Any],
     ) -> ModelResponse:
-        import openai
-
-        client = openai.AsyncOpenAI(api_key=self.api_key, timeout=self.timeout_s)
+        client = self._get_client()
 
         kwargs: Dict[str, Any] = {}
         if "max_tokens" in params:
@@ -52,12 +75,59 @@ class OpenAIAdapter(BaseAdapter):
             raw={},
         )
 
+    async def generate_many(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+        n: int,
+    ) -> list[ModelResponse]:
+        client = self._get_client()
+
+        kwargs: Dict[str, Any] = {"n": n}
+        if "max_tokens" in params:
+            kwargs["max_tokens"] = params["max_tokens"]
+        if "temperature" in params:
+            kwargs["temperature"] = params["temperature"]
+
+        start = time.time()
+        resp = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            **kwargs,
+        )
+        latency_ms = (time.time() - start) * 1000.0
+
+        usage = resp.usage
+        responses: list[ModelResponse] = []
+        for i, choice in enumerate(resp.choices):
+            # Usage covers the whole request; attribute it to the first completion
+            first = i == 0 and usage is not None
+            responses.append(
+                ModelResponse(
+                    output=choice.message.content or "",
+                    prompt_tokens=usage.prompt_tokens if first else None,
+                    completion_tokens=usage.completion_tokens if first else None,
+                    total_tokens=usage.total_tokens if first else None,
+                    latency_ms=latency_ms,
+                    raw={},
+                )
+            )
+        return responses
+
     async def health_check(self) -> bool:
         try:
-            import openai
-
-            client = openai.AsyncOpenAI(api_key=self.api_key, timeout=5.0)
+            client = self._get_client().with_options(timeout=5.0)
             await client.models.list()
             return True
         except Exception:
             return False
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from typing import Any, Dict, Tuple
+
+from .base import BaseAdapter
+from .breaker import BreakerPolicy, CircuitBreakerAdapter
+from .cache import CachedAdapter, ResponseCache
+from .retry import RetryingAdapter, RetryPolicy
+from .scheduler import RequestScheduler, ScheduledAdapter
+from .singleflight import SingleflightAdapter
+
+RegistryKey = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+def _registry_key(provider: str, kwargs: Dict[str, Any]) -> RegistryKey:
+    items = []
+    for k, v in sorted(kwargs.items()):
+        if k == "api_key" and v:
+            # Keep raw credentials out of the key (it shows up in reprs and logs)
+            v = hashlib.sha256(str(v).encode("utf-8")).hexdigest()
+        elif isinstance(v, list):
+            # e.g. a pool of Ollama base URLs
+            v = tuple(v)
+        items.append((k, v))
+    return provider, tuple(items)
+
+
+class AdapterRegistry:
+    """Caches one configured adapter per (provider, credentials, base_url, timeout).
+
+    Adapters keep their HTTP/SDK clients alive between calls, so handing the same
+    instance to every request preserves connection pools and TLS sessions. Every
+    adapter handed out coalesces identical concurrent requests, checks the
+    shared ResponseCache, retries transient failures, fails fast while its
+    provider's circuit is open, and routes misses through the shared
+    RequestScheduler.
+    """
+
+    def __init__(
+        self,
+        scheduler: RequestScheduler | None = None,
+        cache: ResponseCache | None = None,
+        cache_policy: str = "deterministic",
+        breaker_policy: BreakerPolicy | None = None,
+        retry_policy: RetryPolicy | None = None,
+        coalesce_policy: str = "deterministic",
+    ) -> None:
+        self.scheduler = scheduler or RequestScheduler()
+        self.cache = cache or ResponseCache()
+        self.cache_policy = cache_policy
+        self.breaker_policy = breaker_policy or BreakerPolicy()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.coalesce_policy = coalesce_policy
+        self._adapters: Dict[RegistryKey, BaseAdapter] = {}
+
+    def get(self, provider: str, **kwargs: Any) -> BaseAdapter:
+        from . import make_adapter
+
+        key = _registry_key(provider, kwargs)
+        adapter = self._adapters.get(key)
+        if adapter is None:
+            adapter = SingleflightAdapter(
+                CachedAdapter(
+                    RetryingAdapter(
+                        CircuitBreakerAdapter(
+                            ScheduledAdapter(make_adapter(provider, **kwargs), self.scheduler),
+                            self.breaker_policy,
+                        ),
+                        self.retry_policy,
+                    ),
+                    self.cache,
+                    policy=self.cache_policy,
+                ),
+                policy=self.coalesce_policy,
+            )
+            self._adapters[key] = adapter
+        return adapter
+
+    def stats(self) -> Dict[str, Any]:
+        adapters: Dict[str, Any] = {}
+        for (provider, _), adapter in self._adapters.items():
+            label = provider
+            n = 2
+            while label in adapters:
+                label = f"{provider}#{n}"
+                n += 1
+            adapters[label] = adapter.stats()
+        return {
+            "scheduler": self.scheduler.stats(),
+            "cache": self.cache.stats(),
+            "adapters": adapters,
+        }
+
+    def __len__(self) -> int:
+        return len(self._adapters)
+
+    async def aclose(self) -> None:
+        adapters = list(self._adapters.values())
+        self._adapters.clear()
+        for adapter in adapters:
+            await adapter.aclose()
+        await asyncio.to_thread(self.cache.close)
+
+    async def __aenter__(self) -> "AdapterRegistry":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
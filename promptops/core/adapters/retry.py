@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import email.utils
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+from pydantic import BaseModel
+
+from .base import BaseAdapter, ModelResponse
+
+RETRY_STATUSES = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+# Transport-level errors from httpx, the provider SDKs and asyncio
+_RETRY_EXCEPTIONS = frozenset(
+    {
+        "TimeoutError",
+        "ConnectionError",
+        "TransportError",
+        "APIConnectionError",
+        "APITimeoutError",
+    }
+)
+
+
+class RetryPolicy(BaseModel):
+    """Retry and hedging settings for one adapter."""
+
+    # Total attempts per call, including the first
+    max_attempts: int = 4
+    base_delay_s: float = 0.5
+    max_delay_s: float = 20.0
+    # Honour Retry-After (capped at max_delay_s) instead of the backoff delay
+    respect_retry_after: bool = True
+    # Send a duplicate request once a call outlives the observed hedge_quantile latency
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    # Latencies observed before hedging starts, and the floor on the hedge delay
+    hedge_min_samples: int = 20
+    hedge_min_delay_s: float = 0.05
+
+
+def _status(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = _status(exc)
+    if status is not None:
+        return status in RETRY_STATUSES
+    return any(cls.__name__ in _RETRY_EXCEPTIONS for cls in type(exc).__mro__)
+
+
+def retry_after_s(exc: BaseException) -> float | None:
+    """Seconds requested by a ``Retry-After`` (or ``retry-after-ms``) header, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        # Malformed date: fall back to the computed backoff
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+class RetryingAdapter(BaseAdapter):
+    """Retries transient failures of the wrapped adapter and optionally hedges.
+
+    Retries use exponential backoff with full jitter, or the provider's
+    ``Retry-After`` when it sends one. With ``policy.hedge`` a call that is
+    still running after the observed ``hedge_quantile`` latency (per model) is
+    duplicated, to ``alternate`` when given, and the first response wins.
+    Responses carry ``retries`` and ``hedged``.
+    """
+
+    def __init__(
+        self,
+        inner: BaseAdapter,
+        policy: RetryPolicy | None = None,
+        alternate: BaseAdapter | None = None,
+    ):
+        self.inner = inner
+        self.policy = policy or RetryPolicy()
+        self.alternate = alternate
+        self.provider = inner.provider
+        self.supports_multi_sample = inner.supports_multi_sample
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        if self.policy.respect_retry_after:
+            requested = retry_after_s(exc)
+            if requested is not None:
+                return min(requested, self.policy.max_delay_s)
+        ceiling = min(self.policy.max_delay_s, self.policy.base_delay_s * 2**attempt)
+        return random.uniform(0.0, ceiling)
+
+    async def _with_retries(self, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, int]:
+        attempt = 0
+        while True:
+            try:
+                return await fn(), attempt
+            except Exception as e:
+                if attempt + 1 >= self.policy.max_attempts or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def _hedge_delay(self, model: str) -> float | None:
+        samples = self._latencies.get(model)
+        if not self.policy.hedge or samples is None or len(samples) < self.policy.hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, int(self.policy.hedge_quantile * len(ordered)))
+        return max(self.policy.hedge_min_delay_s, ordered[idx])
+
+    def _observe(self, model: str, seconds: float) -> None:
+        self._latencies.setdefault(model, deque(maxlen=200)).append(seconds)
+
+    async def generate(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+    ) -> ModelResponse:
+        def _call(adapter: BaseAdapter) -> Callable[[], Awaitable[ModelResponse]]:
+            return lambda: adapter.generate(
+                model=model, system=system, prompt=prompt, params=params
+            )
+
+        start = time.monotonic()
+        delay = self._hedge_delay(model)
+        if delay is None:
+            resp, retries = await self._with_retries(_call(self.inner))
+            hedged = False
+        else:
+            resp, retries, hedged = await self._hedged(
+                _call(self.inner), _call(self.alternate or self.inner), delay
+            )
+        self._observe(model, time.monotonic() - start)
+        return resp.model_copy(update={"retries": resp.retries + retries, "hedged": hedged})
+
+    async def _hedged(
+        self,
+        primary_call: Callable[[], Awaitable[ModelResponse]],
+        backup_call: Callable[[], Awaitable[ModelResponse]],
+        delay: float,
+    ) -> tuple[ModelResponse, int, bool]:
+        primary = asyncio.ensure_future(self._with_retries(primary_call))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                resp, retries = primary.result()
+                return resp, retries, False
+
+            self.hedges += 1
+            backup = asyncio.ensure_future(self._with_retries(backup_call))
+            pending.add(backup)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        resp, retries = task.result()
+                        return resp, retries, True
+            # Both attempts failed: surface the primary's error
+            raise primary.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def generate_many(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+        n: int,
+    ) -> list[ModelResponse]:
+        if not self.supports_multi_sample:
+            return await super().generate_many(model, system, prompt, params, n)
+        resps, retries = await self._with_retries(
+            lambda: self.inner.generate_many(
+                model=model, system=system, prompt=prompt, params=params, n=n
+            )
+        )
+        return [r.model_copy(update={"retries": r.retries + retries}) for r in resps]
+
+    async def health_check(self) -> bool:
+        return await self.inner.health_check()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+        if self.alternate is not None:
+            await self.alternate.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.inner.stats(),
+            "retry": {
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+            },
+        }
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, TypeVar
+
+from pydantic import BaseModel
+
+from .base import BaseAdapter, ModelResponse
+
+T = TypeVar("T")
+
+
+class ProviderLimits(BaseModel):
+    """Concurrency and rate limits applied to one provider."""
+
+    max_concurrency: int = 32
+    model_max_concurrency: int = 16
+    model_min_concurrency: int = 1
+    requests_per_s: float | None = None
+    tokens_per_min: float | None = None
+    # AIMD tuning: multiplicative decrease factor and the latency inflation
+    # (relative to the observed baseline) treated as a congestion signal.
+    decrease_factor: float = 0.5
+    latency_tolerance: float = 3.0
+
+
+DEFAULT_LIMITS: Dict[str, ProviderLimits] = {
+    # A local Ollama serves a handful of requests in parallel and queues the rest.
+    "ollama": ProviderLimits(max_concurrency=8, model_max_concurrency=4),
+    "openai": ProviderLimits(),
+    "anthropic": ProviderLimits(),
+}
+
+
+class TokenBucket:
+    """Async token bucket; ``rate`` tokens are added per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # Requests larger than the bucket wait for a full bucket rather than forever
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        """Debit (positive) or credit (negative) tokens after the real cost is known."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class AdaptiveLimiter:
+    """Concurrency limiter whose limit follows AIMD.
+
+    The limit grows by roughly one slot per window of successful calls and is
+    cut multiplicatively on rate-limit errors or when latency inflates beyond
+    ``latency_tolerance`` × the observed baseline.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 3.0,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.in_flight = 0
+        self.baseline_ms: float | None = None
+        self.recent_ms: float | None = None
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency_ms: float, tokens: int = 1) -> None:
+        # Compare per-token latency so long judge prompts don't look like congestion,
+        # and smooth it so a single slow response doesn't trigger a backoff.
+        per_token = latency_ms / max(tokens, 1)
+        if self.baseline_ms is None or self.recent_ms is None:
+            self.baseline_ms = self.recent_ms = per_token
+            return
+        self.recent_ms += (per_token - self.recent_ms) * 0.2
+        if per_token < self.baseline_ms:
+            self.baseline_ms = per_token
+        else:
+            # Let the baseline drift up slowly so it tracks real workload changes
+            self.baseline_ms += (per_token - self.baseline_ms) * 0.01
+
+        if self.recent_ms > self.baseline_ms * self.latency_tolerance:
+            self._decrease(latency_ms / 1000.0)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def on_overload(self) -> None:
+        self._decrease(1.0)
+
+    def _decrease(self, window_s: float) -> None:
+        # Back off at most once per round-trip: a burst of slow or rejected calls
+        # that were all in flight together is a single congestion signal.
+        now = time.monotonic()
+        if now - self._last_decrease < window_s:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+        self.decreases += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "baseline_ms_per_token": self.baseline_ms,
+            "recent_ms_per_token": self.recent_ms,
+            "decreases": self.decreases,
+        }
+
+
+def _is_overload(exc: BaseException) -> bool:
+    """True for HTTP 429 / 503 from httpx or the provider SDKs."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status in (429, 503)
+
+
+def estimate_tokens(system: str, prompt: str, params: Dict[str, Any]) -> int:
+    # ~4 characters per token is close enough for budgeting purposes
+    return (len(system) + len(prompt)) // 4 + int(params.get("max_tokens", 256))
+
+
+def _limiter_label(provider: str, model: str, hosts: int) -> str:
+    label = f"{provider}/{model}"
+    return label if hosts == 1 else f"{label} ({hosts} hosts)"
+
+
+class RequestScheduler:
+    """Shared admission control for model calls.
+
+    Each call passes a per-provider concurrency cap, the provider's
+    requests/s and tokens/min buckets, and an adaptive per-(provider, model)
+    concurrency limit. Calls to an adapter spread over ``hosts`` backends
+    (an Ollama pool) are capped separately, at ``hosts`` times the
+    provider's concurrency limits; rate limits stay per provider.
+    """
+
+    def __init__(self, limits: Dict[str, ProviderLimits] | None = None):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._provider_slots: Dict[tuple[str, int], asyncio.Semaphore] = {}
+        self._model_limiters: Dict[tuple[str, str, int], AdaptiveLimiter] = {}
+        self._request_buckets: Dict[str, TokenBucket] = {}
+        self._token_buckets: Dict[str, TokenBucket] = {}
+        self._calls: Dict[str, int] = {}
+
+    def _limits_for(self, provider: str) -> ProviderLimits:
+        return self.limits.get(provider) or ProviderLimits()
+
+    def _limiter(self, provider: str, model: str, hosts: int = 1) -> AdaptiveLimiter:
+        key = (provider, model, hosts)
+        limiter = self._model_limiters.get(key)
+        if limiter is None:
+            cfg = self._limits_for(provider)
+            limiter = AdaptiveLimiter(
+                initial=cfg.model_max_concurrency * hosts,
+                min_limit=cfg.model_min_concurrency,
+                max_limit=cfg.model_max_concurrency * hosts,
+                decrease_factor=cfg.decrease_factor,
+                latency_tolerance=cfg.latency_tolerance,
+            )
+            self._model_limiters[key] = limiter
+        return limiter
+
+    def _provider_slot(self, provider: str, hosts: int = 1) -> asyncio.Semaphore:
+        slot = self._provider_slots.get((provider, hosts))
+        if slot is None:
+            slot = asyncio.Semaphore(self._limits_for(provider).max_concurrency * hosts)
+            self._provider_slots[(provider, hosts)] = slot
+        return slot
+
+    def _buckets(self, provider: str) -> tuple[TokenBucket | None, TokenBucket | None]:
+        cfg = self._limits_for(provider)
+        if cfg.requests_per_s and provider not in self._request_buckets:
+            self._request_buckets[provider] = TokenBucket(cfg.requests_per_s)
+        if cfg.tokens_per_min and provider not in self._token_buckets:
+            self._token_buckets[provider] = TokenBucket(
+                cfg.tokens_per_min / 60.0, capacity=cfg.tokens_per_min
+            )
+        return self._request_buckets.get(provider), self._token_buckets.get(provider)
+
+    @asynccontextmanager
+    async def _admit(
+        self, provider: str, model: str, est_tokens: int, hosts: int = 1
+    ) -> AsyncIterator[AdaptiveLimiter]:
+        requests, tokens = self._buckets(provider)
+        limiter = self._limiter(provider, model, hosts)
+        # Wait on the per-model limit first so a queued call for one model never
+        # holds a provider slot that another model could use.
+        await limiter.acquire()
+        try:
+            async with self._provider_slot(provider, hosts):
+                if requests is not None:
+                    await requests.acquire()
+                if tokens is not None:
+                    await tokens.acquire(est_tokens)
+                yield limiter
+        finally:
+            await limiter.release()
+
+    async def submit(
+        self,
+        provider: str,
+        model: str,
+        call: Callable[[], Awaitable[T]],
+        est_tokens: int = 0,
+        hosts: int = 1,
+    ) -> T:
+        async with self._admit(provider, model, est_tokens, hosts) as limiter:
+            self._calls[provider] = self._calls.get(provider, 0) + 1
+            start = time.monotonic()
+            try:
+                result = await call()
+            except Exception as e:
+                if _is_overload(e):
+                    limiter.on_overload()
+                raise
+            if isinstance(result, list):
+                used = sum(r.total_tokens or 0 for r in result) or None
+            else:
+                used = getattr(result, "total_tokens", None)
+            limiter.on_success((time.monotonic() - start) * 1000.0, used or est_tokens)
+
+        _, tokens = self._buckets(provider)
+        if tokens is not None and used is not None:
+            tokens.adjust(used - est_tokens)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self._calls),
+            "models": {
+                _limiter_label(provider, model, hosts): limiter.stats()
+                for (provider, model, hosts), limiter in self._model_limiters.items()
+            },
+        }
+
+
+class ScheduledAdapter(BaseAdapter):
+    """Routes every ``generate`` of the wrapped adapter through a RequestScheduler."""
+
+    def __init__(self, inner: BaseAdapter, scheduler: RequestScheduler):
+        self.inner = inner
+        self.scheduler = scheduler
+        self.provider = inner.provider
+        self.supports_multi_sample = inner.supports_multi_sample
+        self.hosts = inner.hosts
+
+    async def generate(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+    ) -> ModelResponse:
+        return await self.scheduler.submit(
+            self.provider,
+            model,
+            lambda: self.inner.generate(model=model, system=system, prompt=prompt, params=params),
+            est_tokens=estimate_tokens(system, prompt, params),
+            hosts=self.hosts,
+        )
+
+    async def generate_many(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+        n: int,
+    ) -> list[ModelResponse]:
+        if not self.supports_multi_sample:
+            # n separate requests, each admitted on its own
+            return await super().generate_many(model, system, prompt, params, n)
+        return await self.scheduler.submit(
+            self.provider,
+            model,
+            lambda: self.inner.generate_many(
+                model=model, system=system, prompt=prompt, params=params, n=n
+            ),
+            est_tokens=estimate_tokens(system, prompt, params) * n,
+            hosts=self.hosts,
+        )
+
+    async def health_check(self) -> bool:
+        return await self.inner.health_check()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        # The scheduler is usually shared, so its counters are reported by its owner
+        return self.inner.stats()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict
+
+from .base import BaseAdapter, ModelResponse
+from .cache import cache_key, is_deterministic
+
+
+class _Flight:
+    """One upstream call and the number of callers waiting on it."""
+
+    def __init__(self, task: asyncio.Task[ModelResponse]):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleflightAdapter(BaseAdapter):
+    """Coalesces identical concurrent ``generate`` calls into one upstream call.
+
+    The first caller for a request key (provider, model, system, prompt and
+    params) makes the call; callers arriving while it is in flight await the
+    same result, which comes back to them with ``coalesced=True``. With
+    ``policy="deterministic"`` (the default) only calls at temperature 0 or
+    with a fixed seed are coalesced, since sampled calls are meant to differ;
+    ``"always"`` coalesces every call and ``"never"`` disables coalescing.
+    The shared call is cancelled only once every caller waiting on it is.
+    """
+
+    def __init__(self, inner: BaseAdapter, policy: str = "deterministic"):
+        if policy not in ("deterministic", "always", "never"):
+            raise ValueError(f"Unknown coalesce policy: {policy!r}")
+        self.inner = inner
+        self.policy = policy
+        self.provider = inner.provider
+        self.supports_multi_sample = inner.supports_multi_sample
+        self.calls = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, _Flight] = {}
+
+    def _coalescable(self, params: Dict[str, Any]) -> bool:
+        if self.policy == "always":
+            return True
+        if self.policy == "never":
+            return False
+        return is_deterministic(params)
+
+    async def generate(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+    ) -> ModelResponse:
+        if not self._coalescable(params):
+            return await self.inner.generate(
+                model=model, system=system, prompt=prompt, params=params
+            )
+
+        key = cache_key(self.provider, model, system, prompt, params)
+        flight = self._inflight.get(key)
+        follower = flight is not None
+        if flight is None:
+            flight = _Flight(
+                asyncio.ensure_future(
+                    self.inner.generate(model=model, system=system, prompt=prompt, params=params)
+                )
+            )
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            resp = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Last caller gone: drop the call so later callers start afresh
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+        if follower:
+            return resp.model_copy(update={"coalesced": True})
+        return resp
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+
+    async def generate_many(
+        self,
+        model: str,
+        system: str,
+        prompt: str,
+        params: Dict[str, Any],
+        n: int,
+    ) -> list[ModelResponse]:
+        if not self.supports_multi_sample:
+            return await super().generate_many(model, system, prompt, params, n)
+        # Multi-sample requests exist to get distinct completions; never share them
+        return await self.inner.generate_many(
+            model=model, system=system, prompt=prompt, params=params, n=n
+        )
+
+    async def health_check(self) -> bool:
+        return await self.inner.health_check()
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.inner.stats(),
+            "singleflight": {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            },
+        }
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Mapping
 from pydantic import BaseModel, Field
-import string
+
+from promptops.core.template import CompiledTemplate, compile_template
 
 
 class Prompt(BaseModel):
@@ -16,11 +17,27 @@ class Prompt(BaseModel):
     output_schema: Dict[str, Any] | None = None
     provider: str = "ollama"
 
+    @property
+    def compiled(self) -> CompiledTemplate:
+        # Cached by template content, so edits to ``template`` are picked up
+        return compile_template(self.template)
+
+    @property
+    def placeholders(self) -> tuple[str, ...]:
+        return self.compiled.placeholders
+
     def render(self, **kwargs: Any) -> str:
-        class _SafeFormatter(string.Formatter):
-            def get_value(self, key, args, kwargs):
-                if isinstance(key, str) and key in kwargs:
-                    return kwargs[key]
-                return "{" + str(key) + "}"
+        return self.compiled.render(kwargs)
+
+    def render_many(self, inputs: Iterable[Mapping[str, Any]]) -> list[str]:
+        return self.compiled.render_many(inputs)
 
-        return _SafeFormatter().format(self.template, **kwargs)
+    def missing_inputs(self, inputs: Iterable[Mapping[str, Any]]) -> dict[int, list[str]]:
+        """Map each input index to the placeholders it leaves unfilled."""
+        compiled = self.compiled
+        missing = {}
+        for idx, values in enumerate(inputs):
+            names = compiled.missing(values)
+            if names:
+                missing[idx] = names
+        return missing
@@ -1,25 +1,21 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
 import hashlib
 import json
 import time
 import warnings
-from typing import Any
-
-import mlflow
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, NamedTuple
 
 from promptops.core.prompt import Prompt
-from promptops.core.adapters.base import BaseAdapter
-from promptops.eval.judge import judge_output
+from promptops.core.adapters.base import BaseAdapter, ModelResponse
+from promptops.eval.judge import JudgeItem, JudgeResult, judge_batch, judge_output
 from promptops.eval.metrics import compute_metrics, RunMetrics
 from promptops.tests.testcase import TestCase
-from promptops.store.db import (
-    init_db,
-    insert_run,
-    insert_run_result,
-    get_best_for_prompt,
-)
+from promptops.store import aio as store
+from promptops.store.db import set_run_tracking_id
+from promptops.tracking import TrackedRun, Tracker, default_tracker
 
 
 def prompt_hash(prompt: Prompt) -> str:
@@ -27,13 +23,19 @@ def prompt_hash(prompt: Prompt) -> str:
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 
-async def run_prompt(
+def case_hash(testcase: TestCase) -> str:
+    raw = json.dumps(dataclasses.asdict(testcase), sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def _generate(
     adapter: BaseAdapter,
     prompt: Prompt,
     testcase: TestCase,
-    judge_model: str,
-) -> tuple[str, RunMetrics, dict[str, Any]]:
-    rendered = prompt.render(**testcase.input)
+    rendered: str | None = None,
+) -> tuple[ModelResponse, float | None]:
+    if rendered is None:
+        rendered = prompt.render(**testcase.input)
 
     start = time.time()
     resp = await adapter.generate(
@@ -43,16 +45,18 @@ async def run_prompt(
         params=prompt.params,
     )
     latency_ms = (time.time() - start) * 1000.0
+    if resp.cached:
+        # Report the original call's latency rather than the cache lookup time
+        latency_ms = resp.latency_ms
+    return resp, latency_ms
 
-    judge = await judge_output(
-        adapter=adapter,
-        model=judge_model,
-        rubric=testcase.rubric or {"quality": 1.0},
-        user_input=testcase.input,
-        assistant_output=resp.output,
-        expected=testcase.expected,
-    )
 
+def _score(
+    prompt: Prompt,
+    resp: ModelResponse,
+    latency_ms: float | None,
+    judge: JudgeResult,
+) -> tuple[RunMetrics, dict[str, Any]]:
     format_valid = None
     if prompt.output_format == "json" or prompt.output_schema is not None:
         try:
@@ -71,13 +75,40 @@ async def run_prompt(
         latency_ms=latency_ms,
         context_limit=prompt.context_limit,
         format_valid=format_valid,
+        cached=resp.cached,
+        retries=resp.retries,
+        hedged=resp.hedged,
+        coalesced=resp.coalesced,
     )
 
     judge_info = {
         "judge_score": judge.score,
         "judge_criteria": judge.criteria,
         "judge_reasoning": judge.reasoning,
+        "judge_cached": judge.cached,
     }
+    return metrics, judge_info
+
+
+async def run_prompt(
+    adapter: BaseAdapter,
+    prompt: Prompt,
+    testcase: TestCase,
+    judge_model: str,
+    rendered: str | None = None,
+) -> tuple[str, RunMetrics, dict[str, Any]]:
+    resp, latency_ms = await _generate(adapter, prompt, testcase, rendered)
+
+    judge = await judge_output(
+        adapter=adapter,
+        model=judge_model,
+        rubric=testcase.rubric or {"quality": 1.0},
+        user_input=testcase.input,
+        assistant_output=resp.output,
+        expected=testcase.expected,
+    )
+
+    metrics, judge_info = _score(prompt, resp, latency_ms, judge)
     return resp.output, metrics, judge_info
 
 
@@ -88,7 +119,7 @@ async def run_prompt_detailed(
     judge_model: str,
 ) -> dict[str, Any]:
     try:
-        rendered = prompt.render(**testcase.input)
+        prompt.render(**testcase.input)
     except Exception as e:
         return {
             "input": testcase.input,
@@ -99,152 +130,1220 @@ async def run_prompt_detailed(
             "metrics": {},
         }
 
-    start = time.time()
-    resp = await adapter.generate(
-        model=prompt.model,
-        system=prompt.system,
-        prompt=rendered,
-        params=prompt.params,
-    )
-    latency_ms = (time.time() - start) * 1000.0
+    try:
+        output, metrics, judge_info = await run_prompt(adapter, prompt, testcase, judge_model)
+    except Exception as e:
+        return {
+            "input": testcase.input,
+            "output": "",
+            "judge_score": 0.0,
+            "judge_criteria": {},
+            "judge_reasoning": None,
+            "error": _describe(e),
+            "metrics": {},
+        }
+    return {
+        "input": testcase.input,
+        "output": output,
+        **judge_info,
+        "metrics": metrics.model_dump(),
+    }
 
-    judge = await judge_output(
-        adapter=adapter,
-        model=judge_model,
-        rubric=testcase.rubric or {"quality": 1.0},
-        user_input=testcase.input,
-        assistant_output=resp.output,
-        expected=testcase.expected,
-    )
 
-    format_valid = None
-    if prompt.output_format == "json" or prompt.output_schema is not None:
+def _describe(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+class ErrorBudgetExceeded(RuntimeError):
+    """Recorded for cases cancelled after a run exceeded its error budget."""
+
+
+CaseOutcome = tuple[str, RunMetrics, dict[str, Any]] | BaseException
+# Called with (case index, outcome) as soon as each case finishes
+CaseHook = Callable[[int, CaseOutcome], Awaitable[None]]
+# Called with a progress snapshot (e.g. cases done so far); must not block
+ProgressHook = Callable[[dict[str, Any]], None]
+
+
+async def _gather_cases(
+    coros: list[Awaitable[Any]],
+    max_errors: int | None = None,
+) -> list[Any]:
+    """Like ``asyncio.gather(..., return_exceptions=True)`` with an error budget.
+
+    Once more than ``max_errors`` awaitables have failed, the rest are cancelled
+    and come back as ``ErrorBudgetExceeded``.
+    """
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    errors = 0
+    try:
+        for fut in asyncio.as_completed(tasks):
+            try:
+                await fut
+            except Exception:
+                errors += 1
+                if max_errors is not None and errors > max_errors:
+                    break
+    finally:
+        for task in tasks:
+            task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    outcomes: list[Any] = []
+    for task in tasks:
+        if task.cancelled():
+            outcomes.append(ErrorBudgetExceeded(f"Cancelled after {errors} failed cases"))
+        elif task.exception() is not None:
+            outcomes.append(task.exception())
+        else:
+            outcomes.append(task.result())
+    return outcomes
+
+
+def _render_all(prompt: Prompt, testcases: list[TestCase]) -> list[str | BaseException]:
+    try:
+        return list(prompt.render_many(tc.input for tc in testcases))
+    except Exception:
+        pass
+    # Some case failed to render: find out which, keep the rest
+    rendered: list[str | BaseException] = []
+    for tc in testcases:
         try:
-            _ = json.loads(resp.output)
-            format_valid = True
-        except Exception:
-            format_valid = False
+            rendered.append(prompt.render(**tc.input))
+        except Exception as e:
+            rendered.append(e)
+    return rendered
 
-    if format_valid is False:
-        judge.score = min(judge.score, 0.2)
 
-    metrics = compute_metrics(
-        judge_score=judge.score,
-        prompt_tokens=resp.prompt_tokens,
-        completion_tokens=resp.completion_tokens,
-        latency_ms=latency_ms,
-        context_limit=prompt.context_limit,
-        format_valid=format_valid,
+async def _failed(exc: BaseException) -> Any:
+    raise exc
+
+
+async def _run_batch_judged(
+    adapter: BaseAdapter,
+    prompt: Prompt,
+    testcases: list[TestCase],
+    judge_model: str,
+    judge_batch_size: int,
+    judge_context_limit: int,
+    rendered: list[str | BaseException],
+    max_errors: int | None = None,
+    on_case: CaseHook | None = None,
+) -> list[CaseOutcome]:
+    """Generate every case, then judge outputs sharing a rubric in packed batches."""
+    generations = await _gather_cases(
+        [
+            _failed(r) if isinstance(r, BaseException) else _generate(adapter, prompt, tc, r)
+            for tc, r in zip(testcases, rendered)
+        ],
+        max_errors,
     )
+    outcomes: list[CaseOutcome] = list(generations)
 
-    return {
-        "input": testcase.input,
-        "output": resp.output,
-        "judge_score": judge.score,
-        "judge_criteria": judge.criteria,
-        "judge_reasoning": judge.reasoning,
-        "metrics": metrics.model_dump(),
-    }
+    groups: dict[str, list[int]] = {}
+    for idx, tc in enumerate(testcases):
+        if isinstance(generations[idx], BaseException):
+            if on_case is not None and not isinstance(generations[idx], ErrorBudgetExceeded):
+                await on_case(idx, generations[idx])
+            continue
+        groups.setdefault(json.dumps(tc.rubric or {"quality": 1.0}, sort_keys=True), []).append(idx)
 
+    async def _judge_group(rubric_key: str, indices: list[int]) -> None:
+        try:
+            verdicts: list[JudgeResult | BaseException] | BaseException = await judge_batch(
+                adapter=adapter,
+                model=judge_model,
+                rubric=json.loads(rubric_key),
+                items=[
+                    JudgeItem(
+                        user_input=testcases[i].input,
+                        assistant_output=generations[i][0].output,
+                        expected=testcases[i].expected,
+                    )
+                    for i in indices
+                ],
+                batch_size=judge_batch_size,
+                context_limit=judge_context_limit,
+            )
+        except Exception as e:
+            verdicts = e
+        for pos, idx in enumerate(indices):
+            verdict = verdicts if isinstance(verdicts, BaseException) else verdicts[pos]
+            if isinstance(verdict, BaseException):
+                outcomes[idx] = verdict
+            else:
+                resp, latency_ms = generations[idx]
+                metrics, judge_info = _score(prompt, resp, latency_ms, verdict)
+                outcomes[idx] = (resp.output, metrics, judge_info)
+            if on_case is not None:
+                await on_case(idx, outcomes[idx])
 
-async def run_dataset(
+    await asyncio.gather(*[_judge_group(key, indices) for key, indices in groups.items()])
+    return outcomes
+
+
+def _check_judge_mode(judge_mode: str) -> None:
+    if judge_mode not in ("single", "batch"):
+        raise ValueError(f"Unknown judge_mode: {judge_mode!r}. Choose from: single, batch")
+
+
+async def evaluate_prompt(
     adapter: BaseAdapter,
     prompt: Prompt,
     testcases: list[TestCase],
     judge_model: str,
-    mlflow_uri: str = "./mlruns",
+    judge_mode: str = "single",
+    judge_batch_size: int = 8,
+    judge_context_limit: int = 8192,
+    max_errors: int | None = None,
+    on_case: CaseHook | None = None,
 ) -> dict[str, Any]:
-    init_db()
+    """Score ``prompt`` over ``testcases`` in memory.
 
-    # Health check before running
-    healthy = await adapter.health_check()
-    if not healthy:
-        raise RuntimeError("Model provider unreachable. Check that the service is running.")
+    No health check, tracking or persistence: callers that evaluate many
+    prompts (the optimizer) do those once themselves. A case that fails to
+    render, generate or judge is recorded in ``errors`` and left out of the
+    aggregates; once more than ``max_errors`` cases have failed the remaining
+    ones are cancelled. ``on_case`` is awaited with each case's outcome as it
+    finishes (cancelled cases are not reported). Returns per-case ``outputs``,
+    ``metrics``, ``judge_infos`` and ``errors`` (``None``/empty for the cases
+    that did not apply) plus the aggregates over completed cases.
+    """
+    _check_judge_mode(judge_mode)
 
-    mlflow.set_tracking_uri(mlflow_uri)
+    # Render every case up front: the template is parsed once and unfilled
+    # placeholders surface before any model call is made
+    rendered = _render_all(prompt, testcases)
+    missing = prompt.missing_inputs(tc.input for tc in testcases)
+    if missing:
+        names = sorted({name for names in missing.values() for name in names})
+        warnings.warn(
+            f"{len(missing)} of {len(testcases)} test cases leave placeholders unfilled: "
+            + ", ".join(names),
+            stacklevel=2,
+        )
 
-    with mlflow.start_run() as run:
-        mlflow.log_params(
-            {
-                "prompt_name": prompt.name,
-                "model": prompt.model,
-                "provider": prompt.provider,
-                "context_limit": prompt.context_limit,
-                **prompt.params,
-            }
+    if judge_mode == "batch":
+        results = await _run_batch_judged(
+            adapter,
+            prompt,
+            testcases,
+            judge_model,
+            judge_batch_size,
+            judge_context_limit,
+            rendered,
+            max_errors,
+            on_case,
         )
+    else:
+        async def _case(idx: int, tc: TestCase, r: str | BaseException) -> Any:
+            try:
+                if isinstance(r, BaseException):
+                    raise r
+                outcome = await run_prompt(adapter, prompt, tc, judge_model, r)
+            except Exception as e:
+                if on_case is not None:
+                    await on_case(idx, e)
+                raise
+            if on_case is not None:
+                await on_case(idx, outcome)
+            return outcome
 
         # Run all test cases in parallel
-        tasks = [run_prompt(adapter, prompt, tc, judge_model) for tc in testcases]
-        results = await asyncio.gather(*tasks)
-
-        outputs: list[str] = []
-        metrics_list: list[RunMetrics] = []
-        judge_infos: list[dict[str, Any]] = []
-
-        for output, metrics, judge_info in results:
-            outputs.append(output)
-            metrics_list.append(metrics)
-            judge_infos.append(judge_info)
-
-        avg_score = sum(m.judge_score for m in metrics_list) / max(len(metrics_list), 1)
-        avg_objective = sum(m.objective for m in metrics_list) / max(len(metrics_list), 1)
-
-        mlflow.log_metric("avg_judge_score", avg_score)
-        mlflow.log_metric("avg_objective", avg_objective)
-        mlflow.log_text("\n---\n".join(outputs), "outputs.txt")
-
-    # Regression detection: compare against previous best for this prompt
-    prev_best = get_best_for_prompt(prompt.name)
-    regression = False
-    regression_warning: str | None = None
-    if prev_best is not None and prev_best.get("objective") is not None:
-        if avg_objective < prev_best["objective"]:
-            regression = True
-            regression_warning = (
-                f"Regression detected: objective {avg_objective:.4f} < "
-                f"previous best {prev_best['objective']:.4f}"
-            )
-            warnings.warn(regression_warning, stacklevel=2)
+        results = await _gather_cases(
+            [_case(idx, tc, r) for idx, (tc, r) in enumerate(zip(testcases, rendered))],
+            max_errors,
+        )
 
-    run_data = {
+    outputs: list[str] = []
+    metrics_list: list[RunMetrics | None] = []
+    judge_infos: list[dict[str, Any] | None] = []
+    errors: list[str | None] = []
+
+    for result in results:
+        if isinstance(result, BaseException):
+            outputs.append("")
+            metrics_list.append(None)
+            judge_infos.append(None)
+            errors.append(_describe(result))
+            continue
+        output, metrics, judge_info = result
+        outputs.append(output)
+        metrics_list.append(metrics)
+        judge_infos.append(judge_info)
+        errors.append(None)
+
+    completed = [m for m in metrics_list if m is not None]
+    completed_judges = [j for j in judge_infos if j is not None]
+    judge_cache_hits = sum(1 for j in completed_judges if j["judge_cached"])
+    return {
+        "outputs": outputs,
+        "metrics": metrics_list,
+        "judge_infos": judge_infos,
+        "errors": errors,
+        "completed": len(completed),
+        "error_count": len(testcases) - len(completed),
+        "avg_judge_score": sum(m.judge_score for m in completed) / max(len(completed), 1),
+        "avg_objective": sum(m.objective for m in completed) / max(len(completed), 1),
+        "judge_cache_hit_rate": judge_cache_hits / max(len(completed_judges), 1),
+        # Cases whose generation shared an identical in-flight request
+        "coalesced_count": sum(1 for m in completed if m.coalesced),
+    }
+
+
+def _case_row(
+    idx: int,
+    testcase: TestCase,
+    output: str,
+    metrics: RunMetrics | None,
+    judge_info: dict[str, Any] | None,
+    error: str | None,
+) -> dict[str, Any]:
+    return {
+        "test_idx": idx,
+        "input_data": testcase.input,
+        "expected": testcase.expected,
+        "output": output,
+        "judge_score": judge_info["judge_score"] if judge_info else None,
+        "judge_criteria": judge_info["judge_criteria"] if judge_info else None,
+        "judge_reasoning": judge_info["judge_reasoning"] if judge_info else None,
+        "metrics": metrics.model_dump() if metrics else {},
+        "error": error,
+        "case_hash": case_hash(testcase),
+    }
+
+
+def _reused_row(idx: int, testcase: TestCase, prior: dict[str, Any]) -> dict[str, Any]:
+    """A stored result of an identical case, copied into another run."""
+    return {
+        "test_idx": idx,
+        "input_data": testcase.input,
+        "expected": testcase.expected,
+        "output": prior["output"],
+        "judge_score": prior["judge_score"],
+        "judge_criteria": prior["judge_criteria"],
+        "judge_reasoning": prior["judge_reasoning"],
+        "metrics": prior["metrics"],
+        "error": None,
+        "case_hash": prior["case_hash"],
+        "reused_from": prior["reused_from"],
+    }
+
+
+def _outcome_row(idx: int, testcase: TestCase, outcome: CaseOutcome) -> dict[str, Any]:
+    if isinstance(outcome, BaseException):
+        return _case_row(idx, testcase, "", None, None, _describe(outcome))
+    output, metrics, judge_info = outcome
+    return _case_row(idx, testcase, output, metrics, judge_info, None)
+
+
+def _run_data(prompt: Prompt, judge_model: str | None) -> dict[str, Any]:
+    return {
         "prompt_name": prompt.name,
         "prompt_hash": prompt_hash(prompt),
         "model": prompt.model,
-        "run_id": run.info.run_id,
-        "mlflow_uri": mlflow_uri,
-        "judge_score": avg_score,
-        "objective": avg_objective,
+        "judge_model": judge_model,
+        "run_id": None,
+        "mlflow_uri": None,
+        "judge_score": None,
+        "objective": None,
         "prompt_tokens": None,
         "completion_tokens": None,
         "total_tokens": None,
         "latency_ms": None,
         "context_window_used": None,
+    }
+
+
+async def _check_regression(prompt: Prompt, avg_objective: float) -> tuple[bool, str | None]:
+    """Compare ``avg_objective`` against the best completed run of ``prompt``."""
+    prev_best = await store.get_best_for_prompt(prompt.name)
+    if prev_best is None or prev_best.get("objective") is None:
+        return False, None
+    if avg_objective >= prev_best["objective"]:
+        return False, None
+    regression_warning = (
+        f"Regression detected: objective {avg_objective:.4f} < "
+        f"previous best {prev_best['objective']:.4f}"
+    )
+    warnings.warn(regression_warning, stacklevel=4)
+    return True, regression_warning
+
+
+async def persist_run(
+    prompt: Prompt,
+    testcases: list[TestCase],
+    evaluation: dict[str, Any],
+    tracking_run_id: str | None,
+    tracking_uri: str | None,
+    judge_model: str | None = None,
+) -> dict[str, Any]:
+    """Check ``evaluation`` against the prompt's previous best and store it.
+
+    Returns the run summary handed back by ``run_dataset``.
+    """
+    avg_objective = evaluation["avg_objective"]
+    regression, regression_warning = await _check_regression(prompt, avg_objective)
+
+    run_data = {
+        **_run_data(prompt, judge_model),
+        "run_id": tracking_run_id,
+        "mlflow_uri": tracking_uri,
+        "judge_score": evaluation["avg_judge_score"],
+        "objective": avg_objective,
         "regression": regression,
+        "error_count": evaluation["error_count"],
+        "case_count": len(testcases),
     }
-    db_run_id = insert_run(run_data)
-
-    # Store per-test-case results
-    for idx, (tc, output, metrics, judge_info) in enumerate(
-        zip(testcases, outputs, metrics_list, judge_infos)
-    ):
-        insert_run_result(
-            run_id=db_run_id,
-            test_idx=idx,
-            input_data=tc.input,
-            expected=tc.expected,
-            output=output,
-            judge_score=judge_info["judge_score"],
-            judge_criteria=judge_info["judge_criteria"],
-            judge_reasoning=judge_info["judge_reasoning"],
-            metrics=metrics.model_dump(),
-        )
+    # Store the run and its per-test-case results in one transaction
+    db_run_id = await store.insert_run_with_results(
+        run_data,
+        [
+            _case_row(idx, *case)
+            for idx, case in enumerate(
+                zip(
+                    testcases,
+                    evaluation["outputs"],
+                    evaluation["metrics"],
+                    evaluation["judge_infos"],
+                    evaluation["errors"],
+                )
+            )
+        ],
+    )
 
     return {
         "run_id": db_run_id,
-        "avg_judge_score": avg_score,
+        "avg_judge_score": evaluation["avg_judge_score"],
         "avg_objective": avg_objective,
+        "outputs": evaluation["outputs"],
+        "judge_cache_hit_rate": evaluation["judge_cache_hit_rate"],
+        "coalesced_count": evaluation["coalesced_count"],
+        "completed": evaluation["completed"],
+        "error_count": evaluation["error_count"],
+        "errors": [
+            {"test_idx": idx, "error": error}
+            for idx, error in enumerate(evaluation["errors"])
+            if error is not None
+        ],
+        "regression": regression,
+        "regression_warning": regression_warning,
+    }
+
+
+async def _reuse_results(
+    db_run_id: int,
+    prompt: Prompt,
+    testcases: list[TestCase],
+    todo: list[int],
+    config: dict[str, Any],
+) -> tuple[list[int], int]:
+    """With ``config["incremental"]`` copy stored results of unchanged cases
+    into the run; returns the cases still to execute and how many were reused.
+    """
+    if not config.get("incremental") or not todo:
+        return todo, 0
+    hashes = {idx: case_hash(testcases[idx]) for idx in todo}
+    prior = await store.find_reusable_results(
+        prompt_hash(prompt), config["judge_model"], sorted(set(hashes.values()))
+    )
+    reusable = [idx for idx in todo if hashes[idx] in prior]
+    if reusable:
+        await store.add_run_results(
+            db_run_id,
+            [_reused_row(idx, testcases[idx], prior[hashes[idx]]) for idx in reusable],
+        )
+    return [idx for idx in todo if hashes[idx] not in prior], len(reusable)
+
+
+def _tracking_params(prompt: Prompt, db_run_id: int) -> dict[str, Any]:
+    return {
+        "prompt_name": prompt.name,
+        "model": prompt.model,
+        "provider": prompt.provider,
+        "context_limit": prompt.context_limit,
+        "db_run_id": db_run_id,
+        **prompt.params,
+    }
+
+
+def record_tracking_id(db_run_id: int, run: TrackedRun) -> None:
+    """Store ``run``'s tracking id on stored run ``db_run_id`` once the backend assigns it.
+
+    Nothing waits for the backend: the id is written from the tracking worker.
+    """
+    run.when_assigned(lambda tracking_id: set_run_tracking_id(db_run_id, tracking_id))
+
+
+def _start_tracking(tracker: Tracker, prompt: Prompt, db_run_id: int) -> TrackedRun:
+    run = tracker.start_run(name=prompt.name, params=_tracking_params(prompt, db_run_id))
+    record_tracking_id(db_run_id, run)
+    return run
+
+
+def _summarize_run(
+    rows: list[dict[str, Any]],
+    case_count: int,
+    run: Any,
+    judge_cache_hit_rate: float | None,
+) -> dict[str, Any]:
+    """Aggregate a run's stored ``rows`` and log them to the tracked ``run``."""
+    completed = [r for r in rows if r["error"] is None]
+    avg_judge_score = sum(r["judge_score"] or 0.0 for r in completed) / max(len(completed), 1)
+    avg_objective = sum(r["metrics"].get("objective", 0.0) for r in completed) / max(
+        len(completed), 1
+    )
+    error_count = case_count - len(completed)
+    coalesced_count = sum(
+        1 for r in completed if r["reused_from"] is None and r["metrics"].get("coalesced")
+    )
+    metrics = {
+        "avg_judge_score": avg_judge_score,
+        "avg_objective": avg_objective,
+        "judge_cache_hit_rate": judge_cache_hit_rate,
+        "coalesced_count": coalesced_count,
+        "error_count": error_count,
+    }
+    run.log_metrics({key: value for key, value in metrics.items() if value is not None})
+    outputs = [r["output"] or "" for r in rows]
+    run.log_text("\n---\n".join(outputs), "outputs.txt")
+    return {
+        **metrics,
+        "rows": rows,
+        "completed": len(completed),
         "outputs": outputs,
+    }
+
+
+async def _finish_run(
+    db_run_id: int,
+    prompt: Prompt,
+    summary: dict[str, Any],
+    run: Any,
+    tracker: Tracker,
+    executed: int,
+    reused: int,
+) -> dict[str, Any]:
+    """Mark a summarized run completed; returns the summary handed back to callers."""
+    regression, regression_warning = await _check_regression(prompt, summary["avg_objective"])
+    await store.finish_run(
+        db_run_id,
+        {
+            "mlflow_uri": tracker.uri,
+            "judge_score": summary["avg_judge_score"],
+            "objective": summary["avg_objective"],
+            "regression": regression,
+            "error_count": summary["error_count"],
+        },
+    )
+    return {
+        "run_id": db_run_id,
+        "avg_judge_score": summary["avg_judge_score"],
+        "avg_objective": summary["avg_objective"],
+        "outputs": summary["outputs"],
+        "judge_cache_hit_rate": summary["judge_cache_hit_rate"],
+        "coalesced_count": summary["coalesced_count"],
+        "completed": summary["completed"],
+        "executed": executed,
+        "reused": reused,
+        "error_count": summary["error_count"],
+        "errors": [
+            {"test_idx": r["test_idx"], "error": r["error"]} for r in summary["rows"] if r["error"]
+        ],
+        "regression": regression,
+        "regression_warning": regression_warning,
+    }
+
+
+async def _execute_run(
+    adapter: BaseAdapter,
+    db_run_id: int,
+    prompt: Prompt,
+    testcases: list[TestCase],
+    todo: list[int],
+    config: dict[str, Any],
+    tracker: Tracker,
+    max_errors: int | None,
+    on_progress: ProgressHook | None = None,
+) -> dict[str, Any]:
+    """Evaluate the cases ``todo`` of a stored run, checkpointing each result,
+    then finalize the run from everything stored for it.
+
+    With ``config["incremental"]`` cases that already have a result for the
+    same prompt and judge model are copied over instead of executed.
+    """
+    todo, reused = await _reuse_results(db_run_id, prompt, testcases, todo, config)
+
+    reported: set[int] = set()
+    progress = {
+        "run_id": db_run_id,
+        "cases_done": len(testcases) - len(todo),
+        "cases_total": len(testcases),
+        "errors": 0,
+    }
+    if on_progress is not None:
+        on_progress(dict(progress))
+
+    async def _checkpoint(pos: int, outcome: CaseOutcome) -> None:
+        idx = todo[pos]
+        reported.add(pos)
+        await store.add_run_results(db_run_id, [_outcome_row(idx, testcases[idx], outcome)])
+        progress["cases_done"] += 1
+        progress["errors"] += isinstance(outcome, BaseException)
+        if on_progress is not None:
+            on_progress(dict(progress))
+
+    try:
+        with _start_tracking(tracker, prompt, db_run_id) as run:
+            evaluation = await evaluate_prompt(
+                adapter,
+                prompt,
+                [testcases[idx] for idx in todo],
+                config["judge_model"],
+                judge_mode=config["judge_mode"],
+                judge_batch_size=config["judge_batch_size"],
+                judge_context_limit=config["judge_context_limit"],
+                max_errors=max_errors,
+                on_case=_checkpoint,
+            )
+            # Cases cancelled by the error budget were never checkpointed
+            cancelled = [pos for pos in range(len(todo)) if pos not in reported]
+            if cancelled:
+                await store.add_run_results(
+                    db_run_id,
+                    [
+                        _case_row(
+                            todo[pos],
+                            testcases[todo[pos]],
+                            "",
+                            None,
+                            None,
+                            evaluation["errors"][pos],
+                        )
+                        for pos in cancelled
+                    ],
+                )
+
+            summary = _summarize_run(
+                await store.get_run_results(db_run_id),
+                len(testcases),
+                run,
+                evaluation["judge_cache_hit_rate"],
+            )
+
+        return await _finish_run(db_run_id, prompt, summary, run, tracker, len(todo), reused)
+    except BaseException:
+        # Keep what was checkpointed; resume_run picks up from here
+        await store.set_run_status(db_run_id, "interrupted")
+        raise
+
+
+async def evaluate_run_cases(
+    adapter: BaseAdapter,
+    prompt: Prompt,
+    testcases: list[TestCase],
+    test_idxs: list[int],
+    config: dict[str, Any],
+    on_result: Callable[[int, dict[str, Any]], Awaitable[None]],
+) -> None:
+    """Evaluate the cases ``test_idxs`` of a stored run with the run's judge settings.
+
+    ``on_result`` is awaited with each case's index and result row (an item
+    of ``store.add_run_results``) as soon as it finishes. This is the unit of
+    work of ``promptops worker``; persisting the rows is up to the caller.
+    """
+    async def _done(pos: int, outcome: CaseOutcome) -> None:
+        idx = test_idxs[pos]
+        await on_result(idx, _outcome_row(idx, testcases[idx], outcome))
+
+    await evaluate_prompt(
+        adapter,
+        prompt,
+        [testcases[idx] for idx in test_idxs],
+        config["judge_model"],
+        judge_mode=config["judge_mode"],
+        judge_batch_size=config["judge_batch_size"],
+        judge_context_limit=config["judge_context_limit"],
+        on_case=_done,
+    )
+
+
+async def _coordinate_run(
+    db_run_id: int,
+    prompt: Prompt,
+    testcases: list[TestCase],
+    todo: list[int],
+    config: dict[str, Any],
+    tracker: Tracker,
+    max_errors: int | None,
+    on_progress: ProgressHook | None,
+    poll_interval_s: float,
+) -> dict[str, Any]:
+    """Queue the cases ``todo`` of a stored run for workers, wait until each
+    has a result, then finalize the run like ``_execute_run``.
+    """
+    todo, reused = await _reuse_results(db_run_id, prompt, testcases, todo, config)
+
+    already_done = len(testcases) - len(todo)
+    progress = {
+        "run_id": db_run_id,
+        "cases_done": already_done,
+        "cases_total": len(testcases),
+        "errors": 0,
+    }
+    if on_progress is not None:
+        on_progress(dict(progress))
+
+    try:
+        with _start_tracking(tracker, prompt, db_run_id) as run:
+            await store.enqueue_work_items(db_run_id, todo)
+            budget_error: str | None = None
+            while True:
+                counts = await store.count_work_items(db_run_id)
+                snapshot = {
+                    **progress,
+                    "cases_done": already_done + counts["done"] + counts["failed"],
+                    "errors": counts["failed"],
+                }
+                if snapshot != progress:
+                    progress = snapshot
+                    if on_progress is not None:
+                        on_progress(dict(progress))
+                if counts["queued"] + counts["leased"] == 0:
+                    break
+                if max_errors is not None and counts["failed"] > max_errors:
+                    budget_error = _describe(
+                        ErrorBudgetExceeded(f"Cancelled after {counts['failed']} failed cases")
+                    )
+                    await store.delete_work_items(db_run_id, pending_only=True)
+                    break
+                await asyncio.sleep(poll_interval_s)
+
+            # Cases no worker stored a result for: given up on after repeated
+            # lease expiries, or withdrawn by the error budget
+            rows = await store.get_run_results(db_run_id)
+            missing = set(todo) - {r["test_idx"] for r in rows}
+            if missing:
+                item_errors = await store.get_work_item_errors(db_run_id)
+                await store.add_run_results(
+                    db_run_id,
+                    [
+                        _case_row(
+                            idx,
+                            testcases[idx],
+                            "",
+                            None,
+                            None,
+                            item_errors.get(idx) or budget_error or "No worker stored a result",
+                        )
+                        for idx in sorted(missing)
+                    ],
+                )
+                rows = await store.get_run_results(db_run_id)
+
+            # Judging happens in the workers, so the judge cache hit rate is unknown here
+            summary = _summarize_run(rows, len(testcases), run, None)
+
+        result = await _finish_run(db_run_id, prompt, summary, run, tracker, len(todo), reused)
+    except BaseException:
+        # Withdraw the unfinished cases; workers drop them at their next heartbeat
+        await store.delete_work_items(db_run_id, pending_only=True)
+        await store.set_run_status(db_run_id, "interrupted")
+        raise
+    await store.delete_work_items(db_run_id)
+    return result
+
+
+async def _ensure_healthy(adapter: BaseAdapter) -> None:
+    await store.init_db()
+
+    # Health check before running
+    healthy = await adapter.health_check()
+    if not healthy:
+        raise RuntimeError("Model provider unreachable. Check that the service is running.")
+
+
+def _run_config(
+    judge_model: str,
+    judge_mode: str,
+    judge_batch_size: int,
+    judge_context_limit: int,
+    incremental: bool,
+) -> dict[str, Any]:
+    _check_judge_mode(judge_mode)
+    return {
+        "judge_model": judge_model,
+        "judge_mode": judge_mode,
+        "judge_batch_size": judge_batch_size,
+        "judge_context_limit": judge_context_limit,
+        "incremental": incremental,
+    }
+
+
+async def _create_run(
+    prompt: Prompt,
+    testcases: list[TestCase],
+    config: dict[str, Any],
+) -> int:
+    return await store.create_run(
+        _run_data(prompt, config["judge_model"]),
+        prompt.model_dump(),
+        [dataclasses.asdict(tc) for tc in testcases],
+        config,
+    )
+
+
+async def run_dataset(
+    adapter: BaseAdapter,
+    prompt: Prompt,
+    testcases: list[TestCase],
+    judge_model: str,
+    mlflow_uri: str = "./mlruns",
+    judge_mode: str = "single",
+    judge_batch_size: int = 8,
+    judge_context_limit: int = 8192,
+    tracker: Tracker | None = None,
+    max_errors: int | None = None,
+    incremental: bool = False,
+    on_progress: ProgressHook | None = None,
+) -> dict[str, Any]:
+    """Evaluate ``prompt`` over ``testcases``, track the run and persist it.
+
+    ``judge_mode="batch"`` judges outputs that share a rubric in packed
+    requests of up to ``judge_batch_size`` items that fit ``judge_context_limit``.
+    The run is stored as ``running`` before any case executes and each case's
+    result is written as soon as it finishes, so an interrupted run can be
+    picked up with ``resume_run``. Failed cases are persisted with their error
+    and excluded from the aggregates; past ``max_errors`` failures the remaining
+    cases are cancelled. With ``incremental`` only cases without a stored
+    result for the same prompt and judge model are executed; the others are
+    copied into the run with ``reused_from`` set. Tracking writes are queued on
+    ``tracker`` (by default the process-wide tracker for ``mlflow_uri``) and
+    never block the evaluation. ``on_progress`` receives the run id and case
+    counts once the run is created and after every case.
+    """
+    config = _run_config(
+        judge_model, judge_mode, judge_batch_size, judge_context_limit, incremental
+    )
+    tracker = tracker or default_tracker(mlflow_uri)
+    await _ensure_healthy(adapter)
+
+    db_run_id = await _create_run(prompt, testcases, config)
+    return await _execute_run(
+        adapter,
+        db_run_id,
+        prompt,
+        testcases,
+        list(range(len(testcases))),
+        config,
+        tracker,
+        max_errors,
+        on_progress,
+    )
+
+
+async def run_distributed(
+    prompt: Prompt,
+    testcases: list[TestCase],
+    judge_model: str,
+    mlflow_uri: str = "./mlruns",
+    judge_mode: str = "single",
+    judge_batch_size: int = 8,
+    judge_context_limit: int = 8192,
+    tracker: Tracker | None = None,
+    max_errors: int | None = None,
+    incremental: bool = False,
+    on_progress: ProgressHook | None = None,
+    poll_interval_s: float = 0.5,
+) -> dict[str, Any]:
+    """Like ``run_dataset``, but the cases are executed by ``promptops worker``
+    processes sharing the store database.
+
+    Each case is queued as a work item; workers lease items, evaluate them
+    with their own adapters and store the results. This coroutine only polls
+    the queue every ``poll_interval_s``, reporting progress, and finalizes the
+    run once every case has a result. Items whose worker stopped heartbeating
+    go back to the queue, and are recorded as failed once they have been
+    attempted too often. Cancelling withdraws the unfinished cases and leaves
+    the run ``interrupted`` for ``resume_distributed`` or ``resume_run``.
+    ``judge_cache_hit_rate`` is ``None`` in the summary: judging happens in
+    the workers.
+    """
+    config = _run_config(
+        judge_model, judge_mode, judge_batch_size, judge_context_limit, incremental
+    )
+    tracker = tracker or default_tracker(mlflow_uri)
+    await store.init_db()
+
+    db_run_id = await _create_run(prompt, testcases, config)
+    return await _coordinate_run(
+        db_run_id,
+        prompt,
+        testcases,
+        list(range(len(testcases))),
+        config,
+        tracker,
+        max_errors,
+        on_progress,
+        poll_interval_s,
+    )
+
+
+async def load_run_prompt(run_id: int) -> Prompt:
+    """The prompt a stored run was started with."""
+    await store.init_db()
+    spec = await store.get_run_spec(run_id)
+    if spec is None:
+        raise ValueError(f"Run {run_id} cannot be resumed: it has no stored spec")
+    return Prompt(**spec["prompt"])
+
+
+async def _load_unfinished(
+    run_id: int,
+) -> tuple[Prompt, list[TestCase], list[int], dict[str, Any]]:
+    """A stored run's prompt, cases, the cases without a successful result and config."""
+    await store.init_db()
+    spec = await store.get_run_spec(run_id)
+    if spec is None:
+        raise ValueError(f"Run {run_id} cannot be resumed: it has no stored spec")
+    testcases = [TestCase(**tc) for tc in spec["cases"]]
+    finished = await store.get_finished_test_idxs(run_id)
+    todo = [idx for idx in range(len(testcases)) if idx not in finished]
+    return Prompt(**spec["prompt"]), testcases, todo, spec["config"]
+
+
+async def resume_run(
+    adapter: BaseAdapter,
+    run_id: int,
+    mlflow_uri: str = "./mlruns",
+    tracker: Tracker | None = None,
+    max_errors: int | None = None,
+    on_progress: ProgressHook | None = None,
+) -> dict[str, Any]:
+    """Finish a stored run: execute only the cases with no result or a failed one.
+
+    Runs created by ``run_dataset`` keep their prompt, cases and judge settings,
+    so resuming needs nothing but the run id. The run is then finalized exactly
+    like a fresh one; resuming a completed run re-runs its failed cases only.
+    """
+    tracker = tracker or default_tracker(mlflow_uri)
+    prompt, testcases, todo, config = await _load_unfinished(run_id)
+    await _ensure_healthy(adapter)
+
+    await store.set_run_status(run_id, "running")
+    return await _execute_run(
+        adapter, run_id, prompt, testcases, todo, config, tracker, max_errors, on_progress
+    )
+
+
+async def resume_distributed(
+    run_id: int,
+    mlflow_uri: str = "./mlruns",
+    tracker: Tracker | None = None,
+    max_errors: int | None = None,
+    on_progress: ProgressHook | None = None,
+    poll_interval_s: float = 0.5,
+) -> dict[str, Any]:
+    """``resume_run`` for ``promptops worker`` processes: requeue only the
+    cases of a stored run with no result or a failed one and wait for them.
+    """
+    tracker = tracker or default_tracker(mlflow_uri)
+    prompt, testcases, todo, config = await _load_unfinished(run_id)
+
+    await store.set_run_status(run_id, "running")
+    return await _coordinate_run(
+        run_id, prompt, testcases, todo, config, tracker, max_errors, on_progress, poll_interval_s
+    )
+
+
+class _Generation(NamedTuple):
+    """A case's model response, waiting to be judged in a batch."""
+
+    resp: ModelResponse
+    latency_ms: float | None
+
+
+async def _aiter_cases(
+    testcases: Iterable[TestCase] | AsyncIterable[TestCase],
+) -> AsyncIterator[TestCase]:
+    if isinstance(testcases, AsyncIterable):
+        async for tc in testcases:
+            yield tc
+    else:
+        for tc in testcases:
+            yield tc
+
+
+async def _stream_outcomes(
+    adapter: BaseAdapter,
+    prompt: Prompt,
+    testcases: Iterable[TestCase] | AsyncIterable[TestCase],
+    judge_model: str,
+    judge_mode: str,
+    judge_batch_size: int,
+    judge_context_limit: int,
+    concurrency: int,
+    max_errors: int | None,
+    lookup: Callable[[TestCase], Awaitable[dict[str, Any] | None]] | None,
+) -> AsyncIterator[tuple[int, TestCase, CaseOutcome | dict[str, Any]]]:
+    """Yield ``(idx, case, outcome)`` in completion order, holding at most
+    ``concurrency`` cases between being read from ``testcases`` and being yielded.
+
+    An outcome is a stored result (a dict) when ``lookup`` found one for the
+    case. In batch mode generated cases wait per rubric until a full batch is
+    ready or no generation is left in flight. Once more than ``max_errors``
+    cases have failed, the rest of ``testcases`` is not read and the cases still
+    being generated are yielded as ``ErrorBudgetExceeded``; cases already
+    generated are still judged.
+    """
+    source = _aiter_cases(testcases)
+    held: dict[int, TestCase] = {}
+    # Cases being looked up, rendered and generated (and judged, in single mode)
+    starting: set[asyncio.Task[list[tuple[int, TestCase, Any]]]] = set()
+    judging: set[asyncio.Task[list[tuple[int, TestCase, Any]]]] = set()
+    waiting: dict[str, list[tuple[int, TestCase, _Generation]]] = {}
+    # Held cases whose generation finished and that wait for (or are in) judging
+    generated: set[int] = set()
+    exhausted = False
+    errors = 0
+
+    async def _start(idx: int, tc: TestCase) -> list[tuple[int, TestCase, Any]]:
+        try:
+            if lookup is not None:
+                prior = await lookup(tc)
+                if prior is not None:
+                    return [(idx, tc, prior)]
+            rendered = prompt.render(**tc.input)
+            if judge_mode == "batch":
+                return [(idx, tc, _Generation(*await _generate(adapter, prompt, tc, rendered)))]
+            return [(idx, tc, await run_prompt(adapter, prompt, tc, judge_model, rendered))]
+        except Exception as e:
+            return [(idx, tc, e)]
+
+    async def _judge(
+        rubric_key: str,
+        items: list[tuple[int, TestCase, _Generation]],
+    ) -> list[tuple[int, TestCase, Any]]:
+        try:
+            verdicts = await judge_batch(
+                adapter=adapter,
+                model=judge_model,
+                rubric=json.loads(rubric_key),
+                items=[
+                    JudgeItem(
+                        user_input=tc.input,
+                        assistant_output=gen.resp.output,
+                        expected=tc.expected,
+                    )
+                    for _, tc, gen in items
+                ],
+                batch_size=judge_batch_size,
+                context_limit=judge_context_limit,
+            )
+        except Exception as e:
+            return [(idx, tc, e) for idx, tc, _ in items]
+        scored: list[tuple[int, TestCase, Any]] = []
+        for (idx, tc, gen), verdict in zip(items, verdicts):
+            if isinstance(verdict, BaseException):
+                scored.append((idx, tc, verdict))
+                continue
+            metrics, judge_info = _score(prompt, gen.resp, gen.latency_ms, verdict)
+            scored.append((idx, tc, (gen.resp.output, metrics, judge_info)))
+        return scored
+
+    def _collect(
+        task: asyncio.Task[list[tuple[int, TestCase, Any]]],
+    ) -> list[tuple[int, TestCase, Any]]:
+        # Queue the task's generated cases for judging and return its finished ones
+        nonlocal errors
+        finished = []
+        for case_idx, tc, outcome in task.result():
+            if isinstance(outcome, _Generation):
+                key = json.dumps(tc.rubric or {"quality": 1.0}, sort_keys=True)
+                waiting.setdefault(key, []).append((case_idx, tc, outcome))
+                generated.add(case_idx)
+                continue
+            del held[case_idx]
+            generated.discard(case_idx)
+            if isinstance(outcome, BaseException):
+                errors += 1
+            finished.append((case_idx, tc, outcome))
+        return finished
+
+    try:
+        idx = 0
+        stopped = False
+        while True:
+            while not exhausted and not stopped and len(held) < concurrency:
+                try:
+                    tc = await source.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                held[idx] = tc
+                starting.add(asyncio.ensure_future(_start(idx, tc)))
+                idx += 1
+
+            for rubric_key in list(waiting):
+                if len(waiting[rubric_key]) >= judge_batch_size or not starting:
+                    judging.add(asyncio.ensure_future(_judge(rubric_key, waiting.pop(rubric_key))))
+            if not starting and not judging:
+                break
+
+            done, _ = await asyncio.wait(starting | judging, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                starting.discard(task)
+                judging.discard(task)
+                for finished in _collect(task):
+                    yield finished
+            if not stopped and max_errors is not None and errors > max_errors:
+                # Stop reading and cancel the cases still being generated; cases
+                # already generated are judged before the stream ends
+                stopped = True
+                for task in starting:
+                    task.cancel()
+                await asyncio.gather(*starting, return_exceptions=True)
+                for task in starting:
+                    if not task.cancelled():
+                        for finished in _collect(task):
+                            yield finished
+                starting.clear()
+                for case_idx, tc in sorted(held.items()):
+                    if case_idx not in generated:
+                        del held[case_idx]
+                        cancelled = ErrorBudgetExceeded(f"Cancelled after {errors} failed cases")
+                        yield case_idx, tc, cancelled
+    finally:
+        for task in starting | judging:
+            task.cancel()
+        await asyncio.gather(*starting, *judging, return_exceptions=True)
+
+
+async def stream_dataset(
+    adapter: BaseAdapter,
+    prompt: Prompt,
+    testcases: Iterable[TestCase] | AsyncIterable[TestCase],
+    judge_model: str,
+    mlflow_uri: str = "./mlruns",
+    judge_mode: str = "single",
+    judge_batch_size: int = 8,
+    judge_context_limit: int = 8192,
+    tracker: Tracker | None = None,
+    max_errors: int | None = None,
+    incremental: bool = False,
+    concurrency: int = 16,
+) -> AsyncIterator[dict[str, Any]]:
+    """``run_dataset`` for suites too large to hold in memory.
+
+    Reads ``testcases`` (any iterable or async iterable) lazily, with at most
+    ``concurrency`` cases in flight, and writes each result to the store as it
+    completes. Yields ``{"event": "case", ...}`` per case in completion order,
+    then one ``{"event": "summary", ...}``; only running aggregates are kept.
+    Per-case scores go to the tracker as step metrics instead of an outputs
+    file. A streamed suite cannot be replayed, so its run is not resumable.
+    """
+    config = _run_config(
+        judge_model, judge_mode, judge_batch_size, judge_context_limit, incremental
+    )
+    tracker = tracker or default_tracker(mlflow_uri)
+    await _ensure_healthy(adapter)
+
+    p_hash = prompt_hash(prompt)
+    db_run_id = await store.create_run(
+        _run_data(prompt, judge_model), prompt.model_dump(), None, config
+    )
+
+    async def _lookup(tc: TestCase) -> dict[str, Any] | None:
+        h = case_hash(tc)
+        return (await store.find_reusable_results(p_hash, judge_model, [h])).get(h)
+
+    cases = completed = reused = judge_cache_hits = coalesced_count = 0
+    judge_score_sum = objective_sum = 0.0
+    try:
+        with _start_tracking(tracker, prompt, db_run_id) as run:
+            async for idx, tc, outcome in _stream_outcomes(
+                adapter,
+                prompt,
+                testcases,
+                judge_model,
+                judge_mode,
+                judge_batch_size,
+                judge_context_limit,
+                concurrency,
+                max_errors,
+                _lookup if incremental else None,
+            ):
+                if isinstance(outcome, dict):
+                    row = _reused_row(idx, tc, outcome)
+                    reused += 1
+                else:
+                    row = _outcome_row(idx, tc, outcome)
+                    if not isinstance(outcome, BaseException):
+                        judge_cache_hits += outcome[2]["judge_cached"]
+                await store.add_run_results(db_run_id, [row])
+
+                cases += 1
+                objective = row["metrics"].get("objective")
+                if row["error"] is None:
+                    completed += 1
+                    if row.get("reused_from") is None and row["metrics"].get("coalesced"):
+                        coalesced_count += 1
+                    judge_score_sum += row["judge_score"] or 0.0
+                    objective_sum += objective or 0.0
+                    run.log_metrics(
+                        {"judge_score": row["judge_score"], "objective": objective}, step=idx
+                    )
+                yield {
+                    "event": "case",
+                    "test_idx": idx,
+                    "input": tc.input,
+                    "output": row["output"],
+                    "judge_score": row["judge_score"],
+                    "objective": objective,
+                    "error": row["error"],
+                    "reused_from": row.get("reused_from"),
+                }
+
+            avg_judge_score = judge_score_sum / max(completed, 1)
+            avg_objective = objective_sum / max(completed, 1)
+            judge_cache_hit_rate = judge_cache_hits / max(completed - reused, 1)
+            run.log_metrics(
+                {
+                    "avg_judge_score": avg_judge_score,
+                    "avg_objective": avg_objective,
+                    "judge_cache_hit_rate": judge_cache_hit_rate,
+                    "coalesced_count": coalesced_count,
+                    "error_count": cases - completed,
+                }
+            )
+
+        regression, regression_warning = await _check_regression(prompt, avg_objective)
+        await store.finish_run(
+            db_run_id,
+            {
+                "mlflow_uri": tracker.uri,
+                "judge_score": avg_judge_score,
+                "objective": avg_objective,
+                "regression": regression,
+                "error_count": cases - completed,
+                "case_count": cases,
+            },
+        )
+    except BaseException:
+        await store.set_run_status(db_run_id, "interrupted")
+        raise
+
+    yield {
+        "event": "summary",
+        "run_id": db_run_id,
+        "avg_judge_score": avg_judge_score,
+        "avg_objective": avg_objective,
+        "judge_cache_hit_rate": judge_cache_hit_rate,
+        "coalesced_count": coalesced_count,
+        "completed": completed,
+        "executed": cases - reused,
+        "reused": reused,
+        "error_count": cases - completed,
         "regression": regression,
         "regression_warning": regression_warning,
     }
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import re
+import string
+from functools import lru_cache
+from typing import Any, Iterable, Mapping, Tuple
+
+# (literal_text, field_name, format_spec, conversion) as yielded by string.Formatter.parse
+Segment = Tuple[str, str | None, str, str | None]
+
+_FIELD_ROOT = re.compile(r"[.\[]")
+
+
+class _SafeFormatter(string.Formatter):
+    """Leaves unknown placeholders in the output as ``{name}`` instead of raising."""
+
+    def get_value(self, key, args, kwargs):
+        if isinstance(key, str) and key in kwargs:
+            return kwargs[key]
+        return "{" + str(key) + "}"
+
+
+_FORMATTER = _SafeFormatter()
+
+
+def _is_simple(field_name: str, format_spec: str) -> bool:
+    # Plain ``{name}`` / ``{name!r:>10}`` fields; attribute/index access, positional
+    # fields and nested specs go through the full formatter.
+    return field_name.isidentifier() and "{" not in format_spec
+
+
+def _field_names(template: str) -> Iterable[str]:
+    for _, field_name, format_spec, _ in string.Formatter().parse(template):
+        if field_name is None:
+            continue
+        root = _FIELD_ROOT.split(field_name, 1)[0]
+        if root.isidentifier():
+            yield root
+        if format_spec and "{" in format_spec:
+            yield from _field_names(format_spec)
+
+
+class CompiledTemplate:
+    """A prompt template parsed once into literal and field segments.
+
+    Rendering has the same semantics as ``str.format`` except that placeholders
+    missing from the inputs are left in place as ``{name}``.
+    """
+
+    __slots__ = ("_simple", "placeholders", "segments", "template")
+
+    def __init__(self, template: str):
+        self.template = template
+        self.segments: tuple[Segment, ...] = tuple(string.Formatter().parse(template))
+        self.placeholders: tuple[str, ...] = tuple(dict.fromkeys(_field_names(template)))
+        self._simple = all(
+            field_name is None or _is_simple(field_name, format_spec)
+            for _, field_name, format_spec, _ in self.segments
+        )
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        if not self._simple:
+            return _FORMATTER.vformat(self.template, (), values)
+
+        parts: list[str] = []
+        for literal, field_name, format_spec, conversion in self.segments:
+            if literal:
+                parts.append(literal)
+            if field_name is None:
+                continue
+            value = values[field_name] if field_name in values else "{" + field_name + "}"
+            if conversion is not None:
+                value = _FORMATTER.convert_field(value, conversion)
+            parts.append(format(value, format_spec))
+        return "".join(parts)
+
+    def render_many(self, values_list: Iterable[Mapping[str, Any]]) -> list[str]:
+        return [self.render(values) for values in values_list]
+
+    def missing(self, values: Mapping[str, Any]) -> list[str]:
+        """Placeholders that ``values`` does not provide."""
+        return [name for name in self.placeholders if name not in values]
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> CompiledTemplate:
+    return CompiledTemplate(template)
@@ -1,19 +1,35 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import re
+import sqlite3
+import statistics
 from typing import Any, Dict
 
 from pydantic import BaseModel
 
 from promptops.core.adapters.base import BaseAdapter
+from promptops.store import aio as store
+
+
+class JudgeItem(BaseModel):
+    user_input: Dict[str, Any]
+    assistant_output: str
+    expected: str | None = None
 
 
 class JudgeResult(BaseModel):
     score: float
     criteria: Dict[str, float] = {}
     reasoning: str | None = None
+    cached: bool = False
+    # Self-consistency statistics: verdicts drawn, spread of the parsed scores
+    # and how many samples could not be parsed.
+    samples: int = 1
+    score_stdev: float | None = None
+    parse_failures: int = 0
 
 
 JUDGE_PROMPT = """
@@ -27,34 +43,113 @@ Assistant Output: {assistant_output}
 {expected_section}
 """.strip()
 
+# Bump whenever JUDGE_PROMPT or the scoring/parsing logic changes so cached
+# verdicts from the old judge are not reused.
+JUDGE_PROMPT_VERSION = "2"
 
-async def _single_judge_call(
-    adapter: BaseAdapter,
+BATCH_JUDGE_PROMPT = """
+You are a strict evaluator. Score each assistant output below independently using the rubric \
+criteria.
+Return JSON only: an array with one object per item, in any order, with this exact structure:
+[{{"index": <item index>, "criteria": {{"<criterion>": <score 0.0-1.0>, ...}}, \
+"overall": <float 0.0-1.0>, "reasoning": "<brief reasoning>"}}, ...]
+
+Rubric: {rubric}
+
+{items}
+""".strip()
+
+BATCH_JUDGE_PROMPT_VERSION = "batch-1"
+
+# Rough sizing used to keep a packed batch inside the judge's context window
+_CHARS_PER_TOKEN = 4
+_TOKENS_PER_VERDICT = 120
+
+_PARSE_FAILED = "Failed to parse judge output"
+
+
+def judge_cache_key(
     model: str,
     rubric: Dict[str, Any],
     user_input: Dict[str, Any],
     assistant_output: str,
     expected: str | None = None,
-) -> JudgeResult:
+    version: str = JUDGE_PROMPT_VERSION,
+) -> str:
+    raw = json.dumps(
+        {
+            "model": model,
+            "version": version,
+            "rubric": rubric,
+            "user_input": user_input,
+            "assistant_output": assistant_output,
+            "expected": expected,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+async def _load_verdict(key: str) -> JudgeResult | None:
+    try:
+        data = await store.get_judge_verdict(key)
+    except sqlite3.Error:
+        # The cache is an optimisation; a missing table or locked DB is just a miss
+        return None
+    if data is None:
+        return None
+    return JudgeResult(**{**data, "cached": True})
+
+
+async def _save_verdict(key: str, model: str, result: JudgeResult) -> None:
+    try:
+        await store.put_judge_verdict(key, model, result.model_dump(exclude={"cached"}))
+    except sqlite3.Error:
+        pass
+
+
+async def _load_verdicts(keys: list[str]) -> dict[str, JudgeResult]:
+    try:
+        found = await store.get_judge_verdicts(keys)
+    except sqlite3.Error:
+        return {}
+    return {key: JudgeResult(**{**data, "cached": True}) for key, data in found.items()}
+
+
+async def _save_verdicts(model: str, results: dict[str, JudgeResult]) -> None:
+    if not results:
+        return
+    try:
+        await store.put_judge_verdicts(
+            model, {key: r.model_dump(exclude={"cached"}) for key, r in results.items()}
+        )
+    except sqlite3.Error:
+        pass
+
+
+JUDGE_SYSTEM = "You evaluate outputs and return JSON only."
+
+
+def _build_judge_prompt(
+    rubric: Dict[str, Any],
+    user_input: Dict[str, Any],
+    assistant_output: str,
+    expected: str | None = None,
+) -> str:
     expected_section = ""
     if expected:
         expected_section = f"Expected Output: {expected}"
 
-    prompt = JUDGE_PROMPT.format(
+    return JUDGE_PROMPT.format(
         rubric=json.dumps(rubric),
         user_input=json.dumps(user_input),
         assistant_output=assistant_output,
         expected_section=expected_section,
     )
 
-    resp = await adapter.generate(
-        model=model,
-        system="You evaluate outputs and return JSON only.",
-        prompt=prompt,
-        params={"temperature": 0.0, "max_tokens": 300},
-    )
 
-    text = resp.output.strip()
+def _parse_verdict(output: str) -> JudgeResult:
+    text = output.strip()
     try:
         if not text.startswith("{"):
             start = text.find("{")
@@ -68,14 +163,74 @@ async def _single_judge_call(
         return JudgeResult(score=overall, criteria=criteria, reasoning=reasoning)
     except Exception:
         # Fallback: try to extract a float score from the raw text
-        match = re.search(r"([01](?:\.\d+)?)", resp.output)
+        match = re.search(r"([01](?:\.\d+)?)", output)
         if match:
             try:
                 score = float(match.group(1))
                 return JudgeResult(score=score, criteria={}, reasoning="Parsed score from non-JSON output")
             except Exception:
                 pass
-        return JudgeResult(score=0.0, criteria={}, reasoning="Failed to parse judge output")
+        return JudgeResult(score=0.0, criteria={}, reasoning=_PARSE_FAILED)
+
+
+async def _sample_verdicts(
+    adapter: BaseAdapter,
+    model: str,
+    prompt: str,
+    n: int,
+    temperature: float,
+) -> list[JudgeResult]:
+    params = {"temperature": temperature, "max_tokens": 300}
+    if n == 1:
+        resps = [
+            await adapter.generate(model=model, system=JUDGE_SYSTEM, prompt=prompt, params=params)
+        ]
+    else:
+        resps = await adapter.generate_many(
+            model=model, system=JUDGE_SYSTEM, prompt=prompt, params=params, n=n
+        )
+    return [_parse_verdict(r.output) for r in resps]
+
+
+def _settled(samples: list[JudgeResult], min_samples: int, tolerance: float) -> bool:
+    parsed = [r.score for r in samples if r.reasoning != _PARSE_FAILED]
+    return len(parsed) >= min_samples and max(parsed) - min(parsed) <= tolerance
+
+
+def _aggregate(samples: list[JudgeResult]) -> JudgeResult:
+    parsed = [r for r in samples if r.reasoning != _PARSE_FAILED]
+    failures = len(samples) - len(parsed)
+    if not parsed:
+        return JudgeResult(
+            score=0.0,
+            criteria={},
+            reasoning=_PARSE_FAILED,
+            samples=len(samples),
+            parse_failures=failures,
+        )
+
+    scores = [r.score for r in parsed]
+    avg_score = sum(scores) / len(scores)
+    score_stdev = statistics.pstdev(scores) if len(scores) > 1 else None
+
+    # Average per-criterion scores
+    all_criteria: Dict[str, list[float]] = {}
+    for r in parsed:
+        for k, v in r.criteria.items():
+            all_criteria.setdefault(k, []).append(v)
+    avg_criteria = {k: sum(vs) / len(vs) for k, vs in all_criteria.items()}
+
+    # Use reasoning from the first successful result
+    reasoning = next((r.reasoning for r in parsed if r.reasoning), None)
+
+    return JudgeResult(
+        score=avg_score,
+        criteria=avg_criteria,
+        reasoning=reasoning,
+        samples=len(samples),
+        score_stdev=score_stdev,
+        parse_failures=failures,
+    )
 
 
 async def judge_output(
@@ -85,24 +240,214 @@ async def judge_output(
     user_input: Dict[str, Any],
     assistant_output: str,
     expected: str | None = None,
+    use_cache: bool = True,
+    min_samples: int = 1,
+    max_samples: int = 3,
+    tolerance: float = 0.1,
+    sample_temperature: float = 0.7,
 ) -> JudgeResult:
-    """Call judge 3× concurrently and average the results for stability."""
-    results = await asyncio.gather(
-        _single_judge_call(adapter, model, rubric, user_input, assistant_output, expected),
-        _single_judge_call(adapter, model, rubric, user_input, assistant_output, expected),
-        _single_judge_call(adapter, model, rubric, user_input, assistant_output, expected),
+    """Score an output with adaptive self-consistency.
+
+    The first sample is a greedy (temperature 0) verdict; the remaining
+    ``min_samples - 1`` are drawn at ``sample_temperature`` so they are
+    independent, in a single request when the provider supports it. Sampling
+    stops once ``min_samples`` parseable verdicts fall within ``tolerance`` of
+    each other, and escalates one sample at a time up to ``max_samples`` on
+    disagreement or parse failure. Parsed verdicts are averaged.
+
+    By default a single parseable verdict is accepted, so a case costs one
+    judge call and only an unparseable verdict escalates; raise
+    ``min_samples`` to also check agreement between samples.
+
+    Averaged verdicts are persisted in the store's judge cache; an identical
+    (model, prompt version, rubric, input, output, expected) tuple is served
+    from there without any model calls.
+    """
+    key = judge_cache_key(model, rubric, user_input, assistant_output, expected)
+    if use_cache:
+        hit = await _load_verdict(key)
+        if hit is not None:
+            return hit
+
+    min_samples = max(1, min(min_samples, max_samples))
+    prompt = _build_judge_prompt(rubric, user_input, assistant_output, expected)
+
+    rounds = [_sample_verdicts(adapter, model, prompt, 1, 0.0)]
+    if min_samples > 1:
+        rounds.append(_sample_verdicts(adapter, model, prompt, min_samples - 1, sample_temperature))
+    samples = [r for batch in await asyncio.gather(*rounds) for r in batch]
+
+    while len(samples) < max_samples and not _settled(samples, min_samples, tolerance):
+        samples += await _sample_verdicts(adapter, model, prompt, 1, sample_temperature)
+
+    verdict = _aggregate(samples)
+    # Don't pin a verdict where every sample was unparseable; retry it next time
+    if use_cache and verdict.parse_failures < verdict.samples:
+        await _save_verdict(key, model, verdict)
+    return verdict
+
+
+def _format_batch_item(index: int, item: JudgeItem) -> str:
+    lines = [
+        f"### Item {index}",
+        f"User Input: {json.dumps(item.user_input)}",
+        f"Assistant Output: {item.assistant_output}",
+    ]
+    if item.expected:
+        lines.append(f"Expected Output: {item.expected}")
+    return "\n".join(lines)
+
+
+def _pack_batches(
+    rubric: Dict[str, Any],
+    items: list[tuple[int, JudgeItem]],
+    batch_size: int,
+    context_limit: int,
+) -> list[list[tuple[int, JudgeItem]]]:
+    """Greedily group items so each request fits ``batch_size`` and the context window."""
+    overhead = (len(BATCH_JUDGE_PROMPT) + len(json.dumps(rubric))) // _CHARS_PER_TOKEN
+    batches: list[list[tuple[int, JudgeItem]]] = []
+    current: list[tuple[int, JudgeItem]] = []
+    used = overhead
+    for idx, item in items:
+        cost = len(_format_batch_item(idx, item)) // _CHARS_PER_TOKEN + _TOKENS_PER_VERDICT
+        if current and (len(current) >= batch_size or used + cost > context_limit):
+            batches.append(current)
+            current, used = [], overhead
+        current.append((idx, item))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _parse_batch_verdicts(output: str, indices: set[int]) -> dict[int, JudgeResult]:
+    text = output.strip()
+    start = text.find("[")
+    end = text.rfind("]")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start : end + 1])
+    except Exception:
+        return {}
+    if not isinstance(data, list):
+        return {}
+
+    verdicts: dict[int, JudgeResult] = {}
+    for entry in data:
+        # Each verdict is validated on its own so one malformed entry doesn't sink the batch
+        try:
+            idx = int(entry["index"])
+            if idx not in indices or idx in verdicts:
+                continue
+            overall = float(entry.get("overall", entry.get("score")))
+            criteria = {k: float(v) for k, v in entry.get("criteria", {}).items()}
+            verdicts[idx] = JudgeResult(
+                score=overall, criteria=criteria, reasoning=entry.get("reasoning")
+            )
+        except Exception:
+            continue
+    return verdicts
+
+
+async def _judge_one_batch(
+    adapter: BaseAdapter,
+    model: str,
+    rubric: Dict[str, Any],
+    batch: list[tuple[int, JudgeItem]],
+) -> dict[int, JudgeResult]:
+    prompt = BATCH_JUDGE_PROMPT.format(
+        rubric=json.dumps(rubric),
+        items="\n\n".join(_format_batch_item(idx, item) for idx, item in batch),
     )
+    try:
+        resp = await adapter.generate(
+            model=model,
+            system=JUDGE_SYSTEM,
+            prompt=prompt,
+            params={"temperature": 0.0, "max_tokens": _TOKENS_PER_VERDICT * len(batch)},
+        )
+    except Exception:
+        # Treat a failed batch request like an unparseable one: judge items singly
+        return {}
+    return _parse_batch_verdicts(resp.output, {idx for idx, _ in batch})
 
-    avg_score = sum(r.score for r in results) / 3.0
 
-    # Average per-criterion scores
-    all_criteria: Dict[str, list[float]] = {}
-    for r in results:
-        for k, v in r.criteria.items():
-            all_criteria.setdefault(k, []).append(v)
-    avg_criteria = {k: sum(vs) / len(vs) for k, vs in all_criteria.items()}
+async def judge_batch(
+    adapter: BaseAdapter,
+    model: str,
+    rubric: Dict[str, Any],
+    items: list[JudgeItem],
+    batch_size: int = 8,
+    context_limit: int = 8192,
+    use_cache: bool = True,
+) -> list[JudgeResult | BaseException]:
+    """Judge many outputs that share a rubric with one request per packed batch.
 
-    # Use reasoning from the first successful result
-    reasoning = next((r.reasoning for r in results if r.reasoning), None)
+    Items are packed up to ``batch_size`` per request while the estimated
+    prompt plus verdicts stays within ``context_limit`` tokens. Items whose
+    verdict is missing or malformed in the batch response fall back to
+    ``judge_output``. Results are returned in input order; an item whose
+    fallback call failed gets its exception in place of a verdict.
+    """
+    results: list[JudgeResult | BaseException | None] = [None] * len(items)
+    keys = [
+        judge_cache_key(
+            model,
+            rubric,
+            it.user_input,
+            it.assistant_output,
+            it.expected,
+            version=BATCH_JUDGE_PROMPT_VERSION,
+        )
+        for it in items
+    ]
+
+    # One cache lookup and one cache write for the whole call, not one per item
+    hits = await _load_verdicts(keys) if use_cache else {}
+    pending: list[tuple[int, JudgeItem]] = []
+    for idx, item in enumerate(items):
+        hit = hits.get(keys[idx])
+        if hit is not None:
+            results[idx] = hit
+        else:
+            pending.append((idx, item))
+
+    batches = _pack_batches(rubric, pending, max(1, batch_size), context_limit)
+    batch_verdicts = await asyncio.gather(
+        *[_judge_one_batch(adapter, model, rubric, batch) for batch in batches]
+    )
+
+    fallback: list[tuple[int, JudgeItem]] = []
+    fresh: dict[str, JudgeResult] = {}
+    for batch, verdicts in zip(batches, batch_verdicts):
+        for idx, item in batch:
+            verdict = verdicts.get(idx)
+            if verdict is None:
+                fallback.append((idx, item))
+                continue
+            results[idx] = verdict
+            fresh[keys[idx]] = verdict
+    if use_cache:
+        await _save_verdicts(model, fresh)
+
+    singles = await asyncio.gather(
+        *[
+            judge_output(
+                adapter=adapter,
+                model=model,
+                rubric=rubric,
+                user_input=item.user_input,
+                assistant_output=item.assistant_output,
+                expected=item.expected,
+                use_cache=use_cache,
+            )
+            for _, item in fallback
+        ],
+        return_exceptions=True,
+    )
+    for (idx, _), verdict in zip(fallback, singles):
+        results[idx] = verdict
 
-    return JudgeResult(score=avg_score, criteria=avg_criteria, reasoning=reasoning)
+    return [r for r in results if r is not None]
@@ -13,6 +13,10 @@ class RunMetrics(BaseModel):
     token_penalty: float
     format_valid: bool | None = None
     format_penalty: float = 0.0
+    cached: bool = False
+    retries: int = 0
+    hedged: bool = False
+    coalesced: bool = False
     objective: float
 
 
@@ -23,6 +27,10 @@ def compute_metrics(
     latency_ms: float | None,
     context_limit: int,
     format_valid: bool | None = None,
+    cached: bool = False,
+    retries: int = 0,
+    hedged: bool = False,
+    coalesced: bool = False,
 ) -> RunMetrics:
     total_tokens = None
     if prompt_tokens is not None and completion_tokens is not None:
@@ -56,5 +64,9 @@ def compute_metrics(
         token_penalty=token_penalty,
         format_valid=format_valid,
         format_penalty=format_penalty,
+        cached=cached,
+        retries=retries,
+        hedged=hedged,
+        coalesced=coalesced,
         objective=objective,
     )
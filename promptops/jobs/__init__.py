@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+from .manager import FINAL_STATUSES, JOB_LEASE_S, JOB_WORKERS, Job, JobHandler, JobManager
+
+__all__ = ["FINAL_STATUSES", "JOB_LEASE_S", "JOB_WORKERS", "Job", "JobHandler", "JobManager"]
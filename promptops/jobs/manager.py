@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+from promptops.store import aio as store
+
+JOB_WORKERS = int(os.getenv("PROMPTOPS_JOB_WORKERS", "2"))
+JOB_LEASE_S = float(os.getenv("PROMPTOPS_JOB_LEASE_S", "30"))
+FINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+
+class Job:
+    """A queued or running job as seen by its handler and by watchers."""
+
+    def __init__(self, manager: "JobManager", row: dict[str, Any]):
+        self._manager = manager
+        self.id: int = row["id"]
+        self.kind: str = row["kind"]
+        self.request: dict[str, Any] = row["request"]
+        self.status: str = row["status"]
+        self.progress: dict[str, Any] | None = row.get("progress")
+        self.result: dict[str, Any] | None = row.get("result")
+        self.error: str | None = row.get("error")
+        # Store run created by the job, so a recovered run job can resume it
+        self.run_id: int | None = row.get("run_id")
+        self.created_at = row.get("created_at")
+        self.cancel_requested = False
+        # Set when another process took the job over after this one's lease ran out
+        self.lost = False
+        self.task: asyncio.Task[dict[str, Any]] | None = None
+        self._changed = asyncio.Event()
+        self._persisted_at = 0.0
+
+    def report(self, progress: dict[str, Any]) -> None:
+        """Progress hook for handlers; persisted at most once per persist interval."""
+        self.progress = progress
+        new_run = progress.get("run_id") is not None and progress["run_id"] != self.run_id
+        if new_run:
+            self.run_id = progress["run_id"]
+        now = time.monotonic()
+        if new_run or now - self._persisted_at >= self._manager.persist_interval_s:
+            self._persisted_at = now
+            self._manager._spawn(store.update_job(self.id, progress=progress, run_id=self.run_id))
+        self._touch()
+
+    def _touch(self) -> None:
+        # Wake current watchers; later ones wait on a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "run_id": self.run_id,
+            "created_at": self.created_at,
+        }
+
+
+JobHandler = Callable[[Job], Awaitable[dict[str, Any]]]
+
+
+class JobManager:
+    """Runs persisted jobs in the background with bounded parallelism.
+
+    Handlers are registered per job kind and receive the ``Job``; they report
+    progress through ``job.report`` and return a JSON-serialisable result.
+    Cancelling a running job cancels its handler task, so ``CancelledError``
+    reaches whatever adapter call is in flight.
+
+    Several processes may share the store: a job is claimed atomically before
+    it runs and held under a lease of ``lease_s`` seconds, renewed every third
+    of that. A job whose owner died is queued again once its lease runs out,
+    on ``start`` or by any running manager; on ``close`` running jobs are
+    interrupted and handed back to the queue. ``cancel`` works from any
+    process: a job running elsewhere is flagged in the store and cancelled by
+    its owner at the next lease renewal.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = JOB_WORKERS,
+        persist_interval_s: float = 1.0,
+        lease_s: float = JOB_LEASE_S,
+        owner: str | None = None,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.persist_interval_s = persist_interval_s
+        self.lease_s = lease_s
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: Dict[int, Job] = {}
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._workers: list[asyncio.Task[None]] = []
+        self._leases: asyncio.Task[None] | None = None
+        self._background: set[asyncio.Task[Any]] = set()
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def start(self) -> list[int]:
+        """Recover unfinished jobs and start the workers; returns the recovered ids."""
+        recovered = await store.requeue_unfinished_jobs()
+        for row in recovered:
+            self._enqueue(Job(self, row))
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.max_concurrent)]
+        self._leases = asyncio.ensure_future(self._renew_leases())
+        return [row["id"] for row in recovered]
+
+    def _enqueue(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+
+    async def submit(self, kind: str, request: dict[str, Any]) -> dict[str, Any]:
+        if kind not in self._handlers:
+            raise ValueError(
+                f"Unknown job kind: {kind!r}. Choose from: {', '.join(self._handlers)}"
+            )
+        job_id = await store.create_job(kind, request)
+        job = Job(self, {"id": job_id, "kind": kind, "request": request, "status": "queued"})
+        self._enqueue(job)
+        return job.snapshot()
+
+    async def get(self, job_id: int) -> dict[str, Any] | None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.snapshot()
+        return await store.get_job(job_id)
+
+    async def list(self, limit: int = 50, status: str | None = None) -> list[dict[str, Any]]:
+        rows = await store.list_jobs(limit, status)
+        # Progress of live jobs is fresher in memory than in the store
+        return [
+            self._jobs[row["id"]].snapshot() if row["id"] in self._jobs else row for row in rows
+        ]
+
+    async def cancel(self, job_id: int) -> dict[str, Any] | None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.cancel_requested = True
+            if job.task is not None:
+                job.task.cancel()
+                return job.snapshot()
+        # Queued, being claimed, or running in another process: record the request
+        # in the store, where the job's owner picks it up
+        row = await store.request_job_cancel(job_id)
+        if job is not None and row is not None and row["status"] == "cancelled":
+            job.status = "cancelled"
+            self._jobs.pop(job.id, None)
+            job._touch()
+        return row
+
+    async def watch(self, job_id: int) -> AsyncIterator[dict[str, Any]]:
+        """Yield the job's state now and after every change until it finishes."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            row = await store.get_job(job_id)
+            if row is not None:
+                yield row
+            return
+        while True:
+            changed = job._changed
+            snapshot = job.snapshot()
+            yield snapshot
+            if snapshot["status"] in FINAL_STATUSES:
+                return
+            await changed.wait()
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.status == "queued":
+                await self._execute(job)
+
+    async def _execute(self, job: Job) -> None:
+        job.status = "running"
+        claimed = await store.claim_job(job.id, self.owner, self.lease_s)
+        if claimed is None:
+            # Claimed by another process, or cancelled, since it was queued here
+            self._jobs.pop(job.id, None)
+            return
+        job._touch()
+        job.task = asyncio.ensure_future(self._handlers[job.kind](job))
+        if job.cancel_requested or claimed["cancel_requested"]:
+            job.cancel_requested = True
+            # Cancelled while being claimed: the handler never starts
+            job.task.cancel()
+        try:
+            result = await job.task
+        except asyncio.CancelledError:
+            if job.lost:
+                self._jobs.pop(job.id, None)
+                return
+            if not job.cancel_requested:
+                # Shutting down: hand the job back for a running or the next manager
+                job.status = "queued"
+                await store.release_job(job.id, self.owner, job.progress)
+                raise
+            await self._finish(job, "cancelled")
+        except Exception as e:
+            await self._finish(job, "failed", error=f"{type(e).__name__}: {e}")
+        else:
+            await self._finish(job, "completed", result=result)
+
+    async def _finish(
+        self,
+        job: Job,
+        status: str,
+        result: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> None:
+        job.status = status
+        job.result = result
+        job.error = error
+        self._jobs.pop(job.id, None)
+        await store.update_job(
+            job.id,
+            status=status,
+            progress=job.progress,
+            result=result,
+            error=error,
+            run_id=job.run_id,
+            # A queued job is not claimed yet; a running one must still be ours
+            owner=self.owner if job.task is not None else None,
+        )
+        job._touch()
+
+    async def _renew_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            running = [job for job in self._jobs.values() if job.task is not None]
+            try:
+                held = await store.renew_job_leases(
+                    self.owner, [job.id for job in running], self.lease_s
+                )
+                cancels = await store.requested_job_cancels(self.owner)
+                expired = await store.requeue_expired_jobs()
+            except Exception:
+                # A busy store: try again before the leases run out
+                continue
+            for job in running:
+                if job.task.done():
+                    continue
+                if job.id not in held:
+                    # Our lease ran out and the job was queued again elsewhere
+                    job.lost = True
+                    job.task.cancel()
+                elif job.id in cancels and not job.cancel_requested:
+                    # Cancelled through another process
+                    job.cancel_requested = True
+                    job.task.cancel()
+            for row in expired:
+                if row["id"] not in self._jobs:
+                    self._enqueue(Job(self, row))
+
+    async def close(self) -> None:
+        tasks = [*self._workers, *([self._leases] if self._leases is not None else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._leases = None
+        await asyncio.gather(*self._background, return_exceptions=True)
@@ -54,7 +54,8 @@ def basic_mutations(
             input_str = json.dumps(tc.input) if isinstance(tc.input, dict) else str(tc.input)
             expected_str = tc.expected or "(see rubric)"
             example_lines.append(f"Input: {input_str}\nOutput: {expected_str}")
-        examples_block = "\n\n".join(example_lines)
+        # Escape braces so JSON inputs are not parsed as template placeholders
+        examples_block = "\n\n".join(example_lines).replace("{", "{{").replace("}", "}}")
         p6.template = (
             f"Examples:\n{examples_block}\n\nTask:\n"
             + prompt.template
@@ -1,14 +1,33 @@
 from __future__ import annotations
 
 import asyncio
+import random
+import re
 from typing import Any
 
 from promptops.core.prompt import Prompt
 from promptops.core.adapters.base import BaseAdapter
-from promptops.core.runner import run_dataset
+from promptops.core.runner import (
+    CaseOutcome,
+    ProgressHook,
+    evaluate_prompt,
+    persist_run,
+    record_tracking_id,
+)
 from promptops.tests.testcase import TestCase
 from promptops.opt.mutations import basic_mutations
+from promptops.opt.racing import race_candidates
 from promptops.opt.rewriter import rewrite_prompt
+from promptops.store import aio as store
+from promptops.tracking import Tracker, default_tracker
+
+
+_METRIC_KEY_UNSAFE = re.compile(r"[^\w\-./ ]")
+
+
+def _metric_key(name: str, metric: str) -> str:
+    # MLflow metric keys only allow alphanumerics, _ - . / and spaces
+    return f"candidates/{_METRIC_KEY_UNSAFE.sub('_', name)}/{metric}"
 
 
 async def optimize_prompt(
@@ -20,44 +39,169 @@ async def optimize_prompt(
     use_rewriter: bool = True,
     rewriter_model: str | None = None,
     min_delta: float = 0.005,
+    strategy: str = "full",
+    racing_initial_cases: int = 4,
+    racing_drop_fraction: float = 0.5,
+    racing_confidence_z: float = 1.0,
+    racing_budget: int | None = None,
+    seed: int | None = None,
+    mlflow_uri: str = "./mlruns",
+    trace: bool = False,
+    tracker: Tracker | None = None,
+    on_progress: ProgressHook | None = None,
 ) -> dict[str, Any]:
-    best_prompt = base_prompt
-    best_result = await run_dataset(adapter, best_prompt, testcases, judge_model)
-    prev_best_objective = best_result["avg_objective"]
-
-    for _ in range(iterations):
-        candidates = list(basic_mutations(best_prompt, testcases=testcases))
-        if use_rewriter:
-            rw_model = rewriter_model or judge_model
-            # Pass current score + sample reasoning to the rewriter
-            sample_reasoning = None
-            rewritten = await rewrite_prompt(
-                adapter,
-                rw_model,
-                best_prompt,
-                current_score=best_result.get("avg_judge_score"),
-                judge_reasoning=sample_reasoning,
+    """Iteratively mutate ``base_prompt`` and keep the best-scoring candidate.
+
+    ``strategy="full"`` scores every candidate on the whole suite.
+    ``strategy="racing"`` runs successive halving (see ``race_candidates``) and
+    only scores the race winner on the whole suite; ``racing_budget`` caps the
+    (candidate, case) evaluations spent racing across all iterations.
+
+    Candidates are scored in memory under a single tracked run, with their
+    aggregates logged as per-iteration metrics. Only the winning prompt is
+    persisted, unless ``trace=True`` stores every full-suite evaluation.
+    ``on_progress`` receives the iteration, the (candidate, case) evaluations
+    done so far and the best objective after every case and iteration.
+    """
+    if strategy not in ("full", "racing"):
+        raise ValueError(f"Unknown strategy: {strategy!r}. Choose from: full, racing")
+
+    tracker = tracker or default_tracker(mlflow_uri)
+    await store.init_db()
+
+    # One health check for the whole optimization rather than one per candidate
+    healthy = await adapter.health_check()
+    if not healthy:
+        raise RuntimeError("Model provider unreachable. Check that the service is running.")
+
+    rng = random.Random(seed)
+    remaining_budget = racing_budget
+    rungs: list[dict[str, Any]] = []
+    progress: dict[str, Any] = {
+        "iteration": 0,
+        "iterations": iterations,
+        "cases_done": 0,
+        "best_objective": None,
+    }
+
+    def _report() -> None:
+        if on_progress is not None:
+            on_progress(dict(progress))
+
+    async def _case_done(idx: int, outcome: CaseOutcome) -> None:
+        progress["cases_done"] += 1
+        _report()
+
+    with tracker.start_run(
+        name=f"optimize-{base_prompt.name}",
+        params={
+            "prompt_name": base_prompt.name,
+            "model": base_prompt.model,
+            "provider": base_prompt.provider,
+            "strategy": strategy,
+            "iterations": iterations,
+            "cases": len(testcases),
+        },
+    ) as run:
+
+        async def _persist(prompt: Prompt, evaluation: dict[str, Any]) -> dict[str, Any]:
+            result = await persist_run(
+                prompt, testcases, evaluation, None, tracker.uri, judge_model
+            )
+            record_tracking_id(result["run_id"], run)
+            return result
+
+        async def _evaluate(prompt: Prompt) -> tuple[dict[str, Any], dict[str, Any] | None]:
+            # The persisted run travels with its evaluation (None unless tracing)
+            evaluation = await evaluate_prompt(
+                adapter, prompt, testcases, judge_model, on_case=_case_done
+            )
+            persisted = await _persist(prompt, evaluation) if trace else None
+            return evaluation, persisted
+
+        def _log_step(step: int, scored: list[tuple[Prompt, dict[str, Any]]]) -> None:
+            metrics = {
+                _metric_key(prompt.name, key): evaluation[key]
+                for prompt, evaluation in scored
+                for key in ("avg_objective", "avg_judge_score", "coalesced_count")
+            }
+            metrics["best_objective"] = best_eval["avg_objective"]
+            run.log_metrics(metrics, step=step)
+
+        best_prompt = base_prompt
+        best_eval, best_result = await _evaluate(best_prompt)
+        prev_best_objective = best_eval["avg_objective"]
+        _log_step(0, [(best_prompt, best_eval)])
+        progress["best_objective"] = best_eval["avg_objective"]
+        _report()
+
+        for iteration in range(iterations):
+            progress["iteration"] = iteration + 1
+            candidates = list(basic_mutations(best_prompt, testcases=testcases))
+            if use_rewriter:
+                rw_model = rewriter_model or judge_model
+                # Pass current score + sample reasoning to the rewriter
+                sample_reasoning = None
+                rewritten = await rewrite_prompt(
+                    adapter,
+                    rw_model,
+                    best_prompt,
+                    current_score=best_eval["avg_judge_score"],
+                    judge_reasoning=sample_reasoning,
+                )
+                if rewritten is not None:
+                    candidates.append(rewritten)
+
+            if strategy == "racing":
+                race = await race_candidates(
+                    adapter,
+                    candidates,
+                    testcases,
+                    judge_model,
+                    initial_cases=racing_initial_cases,
+                    drop_fraction=racing_drop_fraction,
+                    confidence_z=racing_confidence_z,
+                    budget=remaining_budget,
+                    rng=rng,
+                )
+                rungs.extend({"iteration": iteration, **rung} for rung in race["rungs"])
+                progress["cases_done"] += race["evaluations"]
+                if remaining_budget is not None:
+                    remaining_budget -= race["evaluations"]
+                if not race["rungs"]:
+                    # Budget exhausted before a single rung could run
+                    break
+                # Only the race winner is scored on the full suite
+                candidates = [candidates[race["winner"]]]
+
+            # Evaluate all candidates in parallel
+            cand_evals = await asyncio.gather(*[_evaluate(cand) for cand in candidates])
+
+            for cand, (evaluation, persisted) in zip(candidates, cand_evals):
+                if evaluation["avg_objective"] > best_eval["avg_objective"]:
+                    best_eval = evaluation
+                    best_result = persisted
+                    best_prompt = cand
+            _log_step(
+                iteration + 1,
+                [(cand, evaluation) for cand, (evaluation, _) in zip(candidates, cand_evals)],
             )
-            if rewritten is not None:
-                candidates.append(rewritten)
+            progress["best_objective"] = best_eval["avg_objective"]
+            _report()
 
-        # Evaluate all candidates in parallel
-        cand_results = await asyncio.gather(
-            *[run_dataset(adapter, cand, testcases, judge_model) for cand in candidates]
-        )
+            # Early stopping: if improvement is below min_delta, stop
+            current_objective = best_eval["avg_objective"]
+            if current_objective - prev_best_objective < min_delta:
+                break
+            prev_best_objective = current_objective
 
-        for cand, result in zip(candidates, cand_results):
-            if result["avg_objective"] > best_result["avg_objective"]:
-                best_result = result
-                best_prompt = cand
+        run.log_text(best_prompt.model_dump_json(indent=2), "best_prompt.json")
 
-        # Early stopping: if improvement is below min_delta, stop
-        current_objective = best_result["avg_objective"]
-        if current_objective - prev_best_objective < min_delta:
-            break
-        prev_best_objective = current_objective
+    if best_result is None:
+        best_result = await _persist(best_prompt, best_eval)
 
     return {
         "best_prompt": best_prompt,
         "best_result": best_result,
+        "rungs": rungs,
     }
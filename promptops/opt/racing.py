@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import statistics
+from typing import Any
+
+from promptops.core.prompt import Prompt
+from promptops.core.adapters.base import BaseAdapter
+from promptops.core.runner import run_prompt_detailed
+from promptops.tests.testcase import TestCase
+
+
+def _summary(scores: list[float]) -> tuple[float, float | None]:
+    """Mean objective and its standard error (``None`` below two samples)."""
+    mean = sum(scores) / len(scores)
+    if len(scores) < 2:
+        return mean, None
+    return mean, statistics.stdev(scores) / math.sqrt(len(scores))
+
+
+async def race_candidates(
+    adapter: BaseAdapter,
+    candidates: list[Prompt],
+    testcases: list[TestCase],
+    judge_model: str,
+    initial_cases: int = 4,
+    drop_fraction: float = 0.5,
+    confidence_z: float = 1.0,
+    budget: int | None = None,
+    rng: random.Random | None = None,
+) -> dict[str, Any]:
+    """Successive halving over ``candidates`` on growing slices of ``testcases``.
+
+    Every surviving candidate is scored on the same random slice, the bottom
+    ``drop_fraction`` by running objective is dropped and the slice doubles,
+    until one candidate or the full suite remains. A candidate in the bottom
+    fraction survives while its mean is within ``confidence_z`` standard errors
+    of the leader's; the race ends early once the leader is that far ahead of
+    everyone. ``budget`` caps the number of (candidate, case) evaluations.
+
+    Returns the winning index, the number of evaluations spent and one record
+    per rung.
+    """
+    if not candidates:
+        raise ValueError("race_candidates needs at least one candidate")
+    if not 0.0 < drop_fraction < 1.0:
+        raise ValueError("drop_fraction must be between 0 and 1")
+
+    order = list(range(len(testcases)))
+    (rng or random.Random()).shuffle(order)
+
+    scores: list[list[float]] = [[] for _ in candidates]
+    alive = list(range(len(candidates)))
+    n_cases = max(1, min(initial_cases, len(testcases)))
+    evaluations = 0
+    rungs: list[dict[str, Any]] = []
+
+    if budget is not None:
+        # Shrink the first slice rather than skip the race entirely
+        n_cases = max(1, min(n_cases, budget // len(alive)))
+
+    while True:
+        jobs = [(c, order[i]) for c in alive for i in range(len(scores[c]), n_cases)]
+        if budget is not None and evaluations + len(jobs) > budget:
+            break
+
+        details = await asyncio.gather(
+            *[
+                run_prompt_detailed(adapter, candidates[c], testcases[case_idx], judge_model)
+                for c, case_idx in jobs
+            ]
+        )
+        for (c, _), detail in zip(jobs, details):
+            # Render failures come back without metrics and count as zero
+            scores[c].append(detail["metrics"].get("objective", 0.0))
+        evaluations += len(jobs)
+
+        stats = {c: _summary(scores[c]) for c in alive}
+        ranked = sorted(alive, key=lambda c: stats[c][0], reverse=True)
+        leader = ranked[0]
+        leader_mean, leader_se = stats[leader]
+
+        def _close_to_leader(
+            c: int,
+            stats: dict[int, tuple[float, float | None]] = stats,
+            leader_mean: float = leader_mean,
+            leader_se: float | None = leader_se,
+        ) -> bool:
+            mean, se = stats[c]
+            if se is None or leader_se is None:
+                return False
+            margin = confidence_z * math.sqrt(se**2 + leader_se**2)
+            return leader_mean - mean <= margin
+
+        keep = max(1, math.ceil(len(ranked) * (1.0 - drop_fraction)))
+        survivors = ranked[:keep] + [c for c in ranked[keep:] if _close_to_leader(c)]
+        if leader_se is not None and not any(_close_to_leader(c) for c in ranked[1:]):
+            survivors = [leader]
+
+        rungs.append(
+            {
+                "rung": len(rungs),
+                "cases": n_cases,
+                "candidates": [
+                    {
+                        "name": candidates[c].name,
+                        "objective": stats[c][0],
+                        "stderr": stats[c][1],
+                        "cases": len(scores[c]),
+                        "eliminated": c not in survivors,
+                    }
+                    for c in ranked
+                ],
+            }
+        )
+
+        alive = survivors
+        if len(alive) == 1 or n_cases >= len(testcases):
+            break
+        n_cases = min(n_cases * 2, len(testcases))
+
+    # Candidates that were never scored (budget too small for a first rung) rank last
+    winner = max(alive, key=lambda c: _summary(scores[c])[0] if scores[c] else -math.inf)
+    return {"winner": winner, "evaluations": evaluations, "rungs": rungs}
@@ -0,0 +1,298 @@
+"""Async interface to the run store.
+
+Every call is offloaded to a dedicated thread pool so SQLite I/O never runs on
+the event loop. Function names and signatures mirror ``promptops.store.db``.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from promptops.store import db
+
+T = TypeVar("T")
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PROMPTOPS_DB_THREADS", "8")),
+    thread_name_prefix="promptops-store",
+)
+
+
+async def _call(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def init_db() -> None:
+    await _call(db.init_db)
+
+
+async def insert_run(data: dict[str, Any]) -> int:
+    return await _call(db.insert_run, data)
+
+
+async def insert_run_result(
+    run_id: int,
+    test_idx: int,
+    input_data: dict[str, Any],
+    expected: str | None,
+    output: str,
+    judge_score: float | None,
+    judge_criteria: dict[str, float] | None,
+    judge_reasoning: str | None,
+    metrics: dict[str, Any],
+    error: str | None = None,
+    case_hash: str | None = None,
+    reused_from: int | None = None,
+) -> None:
+    await _call(
+        db.insert_run_result,
+        run_id=run_id,
+        test_idx=test_idx,
+        input_data=input_data,
+        expected=expected,
+        output=output,
+        judge_score=judge_score,
+        judge_criteria=judge_criteria,
+        judge_reasoning=judge_reasoning,
+        metrics=metrics,
+        error=error,
+        case_hash=case_hash,
+        reused_from=reused_from,
+    )
+
+
+async def insert_run_with_results(data: dict[str, Any], results: list[dict[str, Any]]) -> int:
+    return await _call(db.insert_run_with_results, data, results)
+
+
+async def create_run(
+    data: dict[str, Any],
+    prompt: dict[str, Any],
+    cases: list[dict[str, Any]] | None,
+    config: dict[str, Any],
+) -> int:
+    return await _call(db.create_run, data, prompt, cases, config)
+
+
+async def get_run_spec(run_id: int) -> dict[str, Any] | None:
+    return await _call(db.get_run_spec, run_id)
+
+
+async def add_run_results(run_id: int, results: list[dict[str, Any]]) -> None:
+    await _call(db.add_run_results, run_id, results)
+
+
+async def get_finished_test_idxs(run_id: int) -> set[int]:
+    return await _call(db.get_finished_test_idxs, run_id)
+
+
+async def set_run_status(run_id: int, status: str) -> None:
+    await _call(db.set_run_status, run_id, status)
+
+
+async def set_run_tracking_id(run_id: int, tracking_run_id: str) -> None:
+    await _call(db.set_run_tracking_id, run_id, tracking_run_id)
+
+
+async def finish_run(run_id: int, data: dict[str, Any]) -> None:
+    await _call(db.finish_run, run_id, data)
+
+
+async def find_reusable_results(
+    prompt_hash: str,
+    judge_model: str,
+    case_hashes: list[str],
+) -> dict[str, dict[str, Any]]:
+    return await _call(db.find_reusable_results, prompt_hash, judge_model, case_hashes)
+
+
+async def get_run_results(run_id: int) -> list[dict[str, Any]]:
+    return await _call(db.get_run_results, run_id)
+
+
+async def get_best_for_prompt(prompt_name: str) -> dict[str, Any] | None:
+    return await _call(db.get_best_for_prompt, prompt_name)
+
+
+async def top_runs(limit: int = 10) -> list[dict[str, Any]]:
+    return await _call(db.top_runs, limit)
+
+
+async def recent_runs(limit: int = 50) -> list[dict[str, Any]]:
+    return await _call(db.recent_runs, limit)
+
+
+async def get_run(run_id: int) -> dict[str, Any] | None:
+    return await _call(db.get_run, run_id)
+
+
+async def get_judge_verdict(key: str) -> dict[str, Any] | None:
+    return await _call(db.get_judge_verdict, key)
+
+
+async def get_judge_verdicts(keys: list[str]) -> dict[str, dict[str, Any]]:
+    return await _call(db.get_judge_verdicts, keys)
+
+
+async def put_judge_verdict(key: str, judge_model: str, result: dict[str, Any]) -> None:
+    await _call(db.put_judge_verdict, key, judge_model, result)
+
+
+async def put_judge_verdicts(judge_model: str, results: dict[str, dict[str, Any]]) -> None:
+    await _call(db.put_judge_verdicts, judge_model, results)
+
+
+async def list_suites() -> list[dict[str, Any]]:
+    return await _call(db.list_suites)
+
+
+async def get_suite(suite_id: int) -> dict[str, Any] | None:
+    return await _call(db.get_suite, suite_id)
+
+
+async def create_suite(name: str, description: str | None = None) -> int:
+    return await _call(db.create_suite, name, description)
+
+
+async def delete_suite(suite_id: int) -> None:
+    await _call(db.delete_suite, suite_id)
+
+
+async def get_suite_cases(suite_id: int) -> list[dict[str, Any]]:
+    return await _call(db.get_suite_cases, suite_id)
+
+
+async def add_suite_case(
+    suite_id: int,
+    input_data: dict[str, Any],
+    expected: str | None = None,
+    rubric: dict[str, Any] | None = None,
+    order_idx: int = 0,
+) -> int:
+    return await _call(
+        db.add_suite_case,
+        suite_id=suite_id,
+        input_data=input_data,
+        expected=expected,
+        rubric=rubric,
+        order_idx=order_idx,
+    )
+
+
+async def add_suite_cases(suite_id: int, cases: list[dict[str, Any]]) -> int:
+    return await _call(db.add_suite_cases, suite_id, cases)
+
+
+async def remove_suite_case(case_id: int) -> None:
+    await _call(db.remove_suite_case, case_id)
+
+
+async def create_job(kind: str, request: dict[str, Any]) -> int:
+    return await _call(db.create_job, kind, request)
+
+
+async def get_job(job_id: int) -> dict[str, Any] | None:
+    return await _call(db.get_job, job_id)
+
+
+async def list_jobs(limit: int = 50, status: str | None = None) -> list[dict[str, Any]]:
+    return await _call(db.list_jobs, limit, status)
+
+
+async def update_job(
+    job_id: int,
+    status: str | None = None,
+    progress: dict[str, Any] | None = None,
+    result: dict[str, Any] | None = None,
+    error: str | None = None,
+    run_id: int | None = None,
+    owner: str | None = None,
+) -> bool:
+    return await _call(
+        db.update_job,
+        job_id,
+        status=status,
+        progress=progress,
+        result=result,
+        error=error,
+        run_id=run_id,
+        owner=owner,
+    )
+
+
+async def claim_job(job_id: int, owner: str, lease_s: float) -> dict[str, Any] | None:
+    return await _call(db.claim_job, job_id, owner, lease_s)
+
+
+async def renew_job_leases(owner: str, job_ids: list[int], lease_s: float) -> set[int]:
+    return await _call(db.renew_job_leases, owner, job_ids, lease_s)
+
+
+async def request_job_cancel(job_id: int) -> dict[str, Any] | None:
+    return await _call(db.request_job_cancel, job_id)
+
+
+async def requested_job_cancels(owner: str) -> set[int]:
+    return await _call(db.requested_job_cancels, owner)
+
+
+async def release_job(job_id: int, owner: str, progress: dict[str, Any] | None = None) -> None:
+    await _call(db.release_job, job_id, owner, progress)
+
+
+async def requeue_expired_jobs() -> list[dict[str, Any]]:
+    return await _call(db.requeue_expired_jobs)
+
+
+async def requeue_unfinished_jobs() -> list[dict[str, Any]]:
+    return await _call(db.requeue_unfinished_jobs)
+
+
+async def enqueue_work_items(run_id: int, test_idxs: list[int]) -> None:
+    await _call(db.enqueue_work_items, run_id, test_idxs)
+
+
+async def lease_work_items(
+    worker_id: str,
+    limit: int,
+    lease_s: float,
+    max_attempts: int = 3,
+) -> list[dict[str, Any]]:
+    return await _call(db.lease_work_items, worker_id, limit, lease_s, max_attempts)
+
+
+async def heartbeat_work_items(worker_id: str, item_ids: list[int], lease_s: float) -> set[int]:
+    return await _call(db.heartbeat_work_items, worker_id, item_ids, lease_s)
+
+
+async def release_work_items(worker_id: str, item_ids: list[int], error: str | None = None) -> None:
+    await _call(db.release_work_items, worker_id, item_ids, error)
+
+
+async def complete_work_item(
+    item_id: int,
+    worker_id: str,
+    run_id: int,
+    result: dict[str, Any],
+) -> bool:
+    return await _call(db.complete_work_item, item_id, worker_id, run_id, result)
+
+
+async def count_work_items(run_id: int) -> dict[str, int]:
+    return await _call(db.count_work_items, run_id)
+
+
+async def get_work_item_errors(run_id: int) -> dict[int, str]:
+    return await _call(db.get_work_item_errors, run_id)
+
+
+async def delete_work_items(run_id: int, pending_only: bool = False) -> None:
+    await _call(db.delete_work_items, run_id, pending_only)
+
+
+async def close_db() -> None:
+    await _call(db.close_db)
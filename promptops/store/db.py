@@ -2,21 +2,161 @@ from __future__ import annotations
 
 import json
 import os
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, TypeVar
 
 DB_PATH = Path(os.getenv("PROMPTOPS_DB", "./promptops.db"))
 
+# Milliseconds a connection waits on another process's lock before failing
+BUSY_TIMEOUT_MS = int(os.getenv("PROMPTOPS_DB_BUSY_TIMEOUT_MS", "5000"))
 
-def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+T = TypeVar("T")
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000.0,
+        cached_statements=256,
+        check_same_thread=False,
+    )
     conn.row_factory = sqlite3.Row
+    # WAL lets readers run alongside the writer; NORMAL sync is durable in WAL mode
+    # except for the last transactions on power loss.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
     return conn
 
 
+def get_conn() -> sqlite3.Connection:
+    """Return this thread's long-lived read connection to ``DB_PATH``.
+
+    Connections are reused so SQLite's prepared-statement cache stays warm;
+    callers must not close them. Writes go through ``_write``.
+    """
+    key = (os.getpid(), str(DB_PATH))
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "key", None) != key:
+        conn = _connect()
+        _local.conn = conn
+        _local.key = key
+    return conn
+
+
+class _Writer:
+    """Single writer thread that applies every write transaction in order.
+
+    Serialising writes inside the process means concurrent requests never
+    contend for SQLite's write lock; other processes are handled by WAL plus
+    the busy timeout.
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue[tuple[Callable[[sqlite3.Connection], Any], Future] | None] = (
+            queue.Queue()
+        )
+        self._thread = threading.Thread(target=self._loop, name="promptops-db-writer", daemon=True)
+        self._thread.start()
+
+    def _loop(self) -> None:
+        conn: sqlite3.Connection | None = None
+        path = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            fn, fut = item
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                if conn is None or path != str(DB_PATH):
+                    if conn is not None:
+                        conn.close()
+                    conn = _connect()
+                    path = str(DB_PATH)
+                with conn:
+                    result = fn(conn)
+                fut.set_result(result)
+            except BaseException as e:
+                fut.set_exception(e)
+        if conn is not None:
+            conn.close()
+
+    def submit(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Nested store writes are not supported")
+        fut: Future = Future()
+        self._queue.put((fn, fut))
+        return fut.result()
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+
+_writer: _Writer | None = None
+_writer_pid: int | None = None
+_writer_lock = threading.Lock()
+
+
+def _write(fn: Callable[[sqlite3.Connection], T]) -> T:
+    """Run ``fn(conn)`` as one transaction on the writer thread and return its result."""
+    global _writer, _writer_pid
+    with _writer_lock:
+        # A forked worker process needs its own writer thread
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = _Writer()
+            _writer_pid = os.getpid()
+        writer = _writer
+    return writer.submit(fn)
+
+
+def close_db() -> None:
+    """Stop the writer thread and close this thread's read connection."""
+    global _writer
+    with _writer_lock:
+        if _writer is not None and _writer_pid == os.getpid():
+            _writer.stop()
+        _writer = None
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
 def init_db() -> None:
-    conn = get_conn()
+    """Bring the database up to the latest schema version."""
+    _write(_migrate)
+
+
+# --- Schema migrations ---
+#
+# Each migration runs once, in order, inside the same transaction that records
+# it in schema_version. Append new migrations; never edit an applied one.
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_missing_columns(
+    conn: sqlite3.Connection, table: str, columns: list[tuple[str, str]]
+) -> None:
+    existing = _columns(conn, table)
+    for name, col_type in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+
+def _m001_base_schema(conn: sqlite3.Connection) -> None:
     cur = conn.cursor()
 
     cur.execute(
@@ -83,53 +223,270 @@ def init_db() -> None:
         """
     )
 
-    # Best-effort migrations for existing DBs
-    for col, col_type in [
-        ("run_id", "TEXT"),
-        ("mlflow_uri", "TEXT"),
-        ("regression", "INTEGER DEFAULT 0"),
-    ]:
-        try:
-            col_name = col.split()[0]
-            cur.execute(f"ALTER TABLE runs ADD COLUMN {col_name} {col_type.split()[0]}")
-        except sqlite3.OperationalError:
-            pass
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS judge_cache (
+            key TEXT PRIMARY KEY,
+            judge_model TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
 
-    conn.commit()
-    conn.close()
+    # Databases created before these columns existed
+    _add_missing_columns(
+        conn,
+        "runs",
+        [("run_id", "TEXT"), ("mlflow_uri", "TEXT"), ("regression", "INTEGER DEFAULT 0")],
+    )
 
 
-def insert_run(data: dict[str, Any]) -> int:
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
+def _m002_indexes(conn: sqlite3.Connection) -> None:
+    # get_best_for_prompt: WHERE prompt_name ORDER BY objective DESC
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_runs_prompt_objective ON runs (prompt_name, objective DESC)"
+    )
+    # recent_runs / top_runs
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs (created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_objective ON runs (objective)")
+    # get_run_results: WHERE run_id ORDER BY test_idx
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_run_results_run_test ON run_results (run_id, test_idx)"
+    )
+    # get_suite_cases: WHERE suite_id ORDER BY order_idx, id; also list_suites' join
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_suite_cases_suite_order "
+        "ON suite_cases (suite_id, order_idx, id)"
+    )
+
+
+def _m003_case_errors(conn: sqlite3.Connection) -> None:
+    # Failed cases are stored with their error instead of aborting the run
+    _add_missing_columns(conn, "run_results", [("error", "TEXT")])
+    _add_missing_columns(conn, "runs", [("error_count", "INTEGER DEFAULT 0")])
+
+
+def _m004_checkpointed_runs(conn: sqlite3.Connection) -> None:
+    # Runs are created up front and finalized when every case has a result
+    _add_missing_columns(
+        conn,
+        "runs",
+        [
+            ("status", "TEXT NOT NULL DEFAULT 'completed'"),
+            ("case_count", "INTEGER"),
+            ("finished_at", "TIMESTAMP"),
+        ],
+    )
+    # Everything needed to resume a run: the prompt, its cases and run settings
+    conn.execute(
         """
-        INSERT INTO runs (
-            prompt_name, prompt_hash, model, run_id, mlflow_uri, judge_score, objective,
-            prompt_tokens, completion_tokens, total_tokens, latency_ms, context_window_used,
-            regression
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            data["prompt_name"],
-            data["prompt_hash"],
-            data["model"],
-            data.get("run_id"),
-            data.get("mlflow_uri"),
-            data.get("judge_score"),
-            data.get("objective"),
-            data.get("prompt_tokens"),
-            data.get("completion_tokens"),
-            data.get("total_tokens"),
-            data.get("latency_ms"),
-            data.get("context_window_used"),
-            1 if data.get("regression") else 0,
-        ),
-    )
-    row_id = cur.lastrowid
-    conn.commit()
-    conn.close()
-    return row_id
+        CREATE TABLE IF NOT EXISTS run_specs (
+            run_id INTEGER PRIMARY KEY REFERENCES runs(id) ON DELETE CASCADE,
+            prompt TEXT NOT NULL,
+            cases TEXT NOT NULL,
+            config TEXT NOT NULL
+        )
+        """
+    )
+    # One result per (run, case) so a resumed case replaces its earlier attempt
+    conn.execute(
+        "DELETE FROM run_results WHERE id NOT IN "
+        "(SELECT MAX(id) FROM run_results GROUP BY run_id, test_idx)"
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_run_results_run_test")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_run_results_run_test "
+        "ON run_results (run_id, test_idx)"
+    )
+
+
+def _m005_result_reuse(conn: sqlite3.Connection) -> None:
+    # Results are reused across runs of the same prompt, case and judge model
+    _add_missing_columns(conn, "runs", [("judge_model", "TEXT")])
+    _add_missing_columns(
+        conn,
+        "run_results",
+        [
+            ("case_hash", "TEXT"),
+            # Run the result was copied from; NULL when it was executed in this run
+            ("reused_from", "INTEGER"),
+        ],
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_run_results_case_hash ON run_results (case_hash)")
+
+
+def _m006_jobs(conn: sqlite3.Connection) -> None:
+    # Background /run and /optimize requests, recovered on restart
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            request TEXT NOT NULL,
+            progress TEXT,
+            result TEXT,
+            error TEXT,
+            run_id INTEGER REFERENCES runs(id) ON DELETE SET NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+
+
+def _m007_work_items(conn: sqlite3.Connection) -> None:
+    # Cases of distributed runs, leased to worker processes
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS work_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+            test_idx INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            worker_id TEXT,
+            -- Unix time; a leased item past it is up for grabs again
+            lease_expires_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (run_id, test_idx)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, id)")
+
+
+def _m008_job_leases(conn: sqlite3.Connection) -> None:
+    # The API process running a job, and until when (Unix time) it holds it
+    _add_missing_columns(conn, "jobs", [("owner", "TEXT"), ("lease_until", "REAL")])
+
+
+def _m009_job_cancel_requests(conn: sqlite3.Connection) -> None:
+    # Set by whichever API process receives the cancel; the owner acts on it
+    _add_missing_columns(conn, "jobs", [("cancel_requested", "INTEGER NOT NULL DEFAULT 0")])
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "base schema", _m001_base_schema),
+    (2, "secondary indexes for hot queries", _m002_indexes),
+    (3, "per-case errors", _m003_case_errors),
+    (4, "checkpointed, resumable runs", _m004_checkpointed_runs),
+    (5, "result reuse across runs", _m005_result_reuse),
+    (6, "background jobs", _m006_jobs),
+    (7, "distributed work items", _m007_work_items),
+    (8, "job leases", _m008_job_leases),
+    (9, "job cancel requests", _m009_job_cancel_requests),
+]
+
+
+def schema_version(conn: sqlite3.Connection | None = None) -> int:
+    conn = conn or get_conn()
+    try:
+        row = conn.execute("SELECT MAX(version) AS v FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row["v"] or 0
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    # Take the write lock up front so concurrent processes migrate one at a time
+    # and the DDL is part of the transaction.
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    current = schema_version(conn)
+    for version, description, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        migration(conn)
+        conn.execute(
+            "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+            (version, description),
+        )
+
+
+_INSERT_RUN_SQL = """
+    INSERT INTO runs (
+        prompt_name, prompt_hash, model, run_id, mlflow_uri, judge_score, objective,
+        prompt_tokens, completion_tokens, total_tokens, latency_ms, context_window_used,
+        regression, error_count, status, case_count, judge_model
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_RUN_RESULT_SQL = """
+    INSERT OR REPLACE INTO run_results (
+        run_id, test_idx, input, expected, output,
+        judge_score, judge_criteria, judge_reasoning, metrics, error,
+        case_hash, reused_from
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _run_row(data: dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        data["prompt_name"],
+        data["prompt_hash"],
+        data["model"],
+        data.get("run_id"),
+        data.get("mlflow_uri"),
+        data.get("judge_score"),
+        data.get("objective"),
+        data.get("prompt_tokens"),
+        data.get("completion_tokens"),
+        data.get("total_tokens"),
+        data.get("latency_ms"),
+        data.get("context_window_used"),
+        1 if data.get("regression") else 0,
+        data.get("error_count", 0),
+        data.get("status", "completed"),
+        data.get("case_count"),
+        data.get("judge_model"),
+    )
+
+
+def _run_result_row(
+    run_id: int,
+    test_idx: int,
+    input_data: dict[str, Any],
+    expected: str | None,
+    output: str,
+    judge_score: float | None,
+    judge_criteria: dict[str, float] | None,
+    judge_reasoning: str | None,
+    metrics: dict[str, Any],
+    error: str | None = None,
+    case_hash: str | None = None,
+    reused_from: int | None = None,
+) -> tuple[Any, ...]:
+    return (
+        run_id,
+        test_idx,
+        json.dumps(input_data),
+        expected,
+        output,
+        judge_score,
+        json.dumps(judge_criteria) if judge_criteria else None,
+        judge_reasoning,
+        json.dumps(metrics),
+        error,
+        case_hash,
+        reused_from,
+    )
+
+
+def insert_run(data: dict[str, Any]) -> int:
+    return _write(lambda conn: conn.execute(_INSERT_RUN_SQL, _run_row(data)).lastrowid)
 
 
 def insert_run_result(
@@ -142,30 +499,174 @@ def insert_run_result(
     judge_criteria: dict[str, float] | None,
     judge_reasoning: str | None,
     metrics: dict[str, Any],
+    error: str | None = None,
+    case_hash: str | None = None,
+    reused_from: int | None = None,
 ) -> None:
+    row = _run_result_row(
+        run_id,
+        test_idx,
+        input_data,
+        expected,
+        output,
+        judge_score,
+        judge_criteria,
+        judge_reasoning,
+        metrics,
+        error,
+        case_hash,
+        reused_from,
+    )
+    _write(lambda conn: conn.execute(_INSERT_RUN_RESULT_SQL, row))
+
+
+def insert_run_with_results(data: dict[str, Any], results: list[dict[str, Any]]) -> int:
+    """Insert a run and all of its per-case results in a single transaction.
+
+    Each item in ``results`` takes the keyword arguments of ``insert_run_result``
+    except ``run_id``.
+    """
+    def _insert(conn: sqlite3.Connection) -> int:
+        row_id = conn.execute(_INSERT_RUN_SQL, _run_row(data)).lastrowid
+        conn.executemany(
+            _INSERT_RUN_RESULT_SQL,
+            (_run_result_row(run_id=row_id, **r) for r in results),
+        )
+        return row_id
+
+    return _write(_insert)
+
+
+def create_run(
+    data: dict[str, Any],
+    prompt: dict[str, Any],
+    cases: list[dict[str, Any]] | None,
+    config: dict[str, Any],
+) -> int:
+    """Insert a ``running`` run together with the spec needed to resume it.
+
+    Without ``cases`` (a streamed suite that cannot be replayed) no spec is
+    stored and the run cannot be resumed.
+    """
+    def _insert(conn: sqlite3.Connection) -> int:
+        case_count = len(cases) if cases is not None else None
+        row_id = conn.execute(
+            _INSERT_RUN_SQL, _run_row({**data, "status": "running", "case_count": case_count})
+        ).lastrowid
+        if cases is None:
+            return row_id
+        conn.execute(
+            "INSERT INTO run_specs (run_id, prompt, cases, config) VALUES (?, ?, ?, ?)",
+            (row_id, json.dumps(prompt), json.dumps(cases), json.dumps(config)),
+        )
+        return row_id
+
+    return _write(_insert)
+
+
+def get_run_spec(run_id: int) -> dict[str, Any] | None:
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO run_results (
-            run_id, test_idx, input, expected, output,
-            judge_score, judge_criteria, judge_reasoning, metrics
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            run_id,
-            test_idx,
-            json.dumps(input_data),
-            expected,
-            output,
-            judge_score,
-            json.dumps(judge_criteria) if judge_criteria else None,
-            judge_reasoning,
-            json.dumps(metrics),
-        ),
+    row = conn.execute(
+        "SELECT prompt, cases, config FROM run_specs WHERE run_id = ?", (run_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        "prompt": json.loads(row["prompt"]),
+        "cases": json.loads(row["cases"]),
+        "config": json.loads(row["config"]),
+    }
+
+
+def add_run_results(run_id: int, results: list[dict[str, Any]]) -> None:
+    """Write (or replace) results for some of a run's cases in one transaction."""
+    rows = [_run_result_row(run_id=run_id, **r) for r in results]
+    _write(lambda conn: conn.executemany(_INSERT_RUN_RESULT_SQL, rows))
+
+
+def get_finished_test_idxs(run_id: int) -> set[int]:
+    """Cases of ``run_id`` that have a result without an error."""
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT test_idx FROM run_results WHERE run_id = ? AND error IS NULL", (run_id,)
+    ).fetchall()
+    return {row["test_idx"] for row in rows}
+
+
+def set_run_status(run_id: int, status: str) -> None:
+    _write(lambda conn: conn.execute("UPDATE runs SET status = ? WHERE id = ?", (status, run_id)))
+
+
+def finish_run(run_id: int, data: dict[str, Any]) -> None:
+    """Store a run's aggregates and mark it ``completed``."""
+    _write(
+        lambda conn: conn.execute(
+            """
+            UPDATE runs SET
+                run_id = COALESCE(?, run_id), mlflow_uri = ?, judge_score = ?, objective = ?,
+                regression = ?, error_count = ?, case_count = COALESCE(?, case_count),
+                status = 'completed', finished_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            """,
+            (
+                data.get("run_id"),
+                data.get("mlflow_uri"),
+                data.get("judge_score"),
+                data.get("objective"),
+                1 if data.get("regression") else 0,
+                data.get("error_count", 0),
+                data.get("case_count"),
+                run_id,
+            ),
+        )
+    )
+
+
+def set_run_tracking_id(run_id: int, tracking_run_id: str) -> None:
+    """Record the tracking backend's id for a run once the backend has assigned it."""
+    _write(
+        lambda conn: conn.execute(
+            "UPDATE runs SET run_id = ? WHERE id = ?", (tracking_run_id, run_id)
+        )
     )
-    conn.commit()
-    conn.close()
+
+
+def find_reusable_results(
+    prompt_hash: str,
+    judge_model: str,
+    case_hashes: list[str],
+) -> dict[str, dict[str, Any]]:
+    """Latest successful result per case hash from any run of the same prompt and judge.
+
+    ``reused_from`` of each returned row names the run that actually executed it.
+    """
+    found: dict[str, dict[str, Any]] = {}
+    if not case_hashes:
+        return found
+    conn = get_conn()
+    # Stay well under SQLite's bound-parameter limit
+    for start in range(0, len(case_hashes), 500):
+        chunk = case_hashes[start : start + 500]
+        rows = conn.execute(
+            f"""
+            SELECT rr.*, COALESCE(rr.reused_from, rr.run_id) AS source_run_id
+            FROM run_results rr JOIN runs r ON r.id = rr.run_id
+            WHERE r.prompt_hash = ? AND r.judge_model = ? AND rr.error IS NULL
+              AND rr.case_hash IN ({", ".join("?" * len(chunk))})
+            ORDER BY rr.id DESC
+            """,
+            (prompt_hash, judge_model, *chunk),
+        ).fetchall()
+        for row in rows:
+            if row["case_hash"] in found:
+                continue
+            d = dict(row)
+            d["input"] = json.loads(d["input"]) if d["input"] else {}
+            d["metrics"] = json.loads(d["metrics"]) if d["metrics"] else {}
+            d["judge_criteria"] = json.loads(d["judge_criteria"]) if d["judge_criteria"] else {}
+            d["reused_from"] = d.pop("source_run_id")
+            found[d["case_hash"]] = d
+    return found
 
 
 def get_run_results(run_id: int) -> list[dict[str, Any]]:
@@ -176,7 +677,6 @@ def get_run_results(run_id: int) -> list[dict[str, Any]]:
         (run_id,),
     )
     rows = cur.fetchall()
-    conn.close()
     results = []
     for row in rows:
         d = dict(row)
@@ -191,11 +691,11 @@ def get_best_for_prompt(prompt_name: str) -> dict[str, Any] | None:
     conn = get_conn()
     cur = conn.cursor()
     cur.execute(
-        "SELECT * FROM runs WHERE prompt_name = ? ORDER BY objective DESC LIMIT 1",
+        "SELECT * FROM runs WHERE prompt_name = ? AND status = 'completed' "
+        "ORDER BY objective DESC LIMIT 1",
         (prompt_name,),
     )
     row = cur.fetchone()
-    conn.close()
     return dict(row) if row else None
 
 
@@ -207,7 +707,6 @@ def top_runs(limit: int = 10) -> list[dict[str, Any]]:
         (limit,),
     )
     rows = cur.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
 
@@ -219,7 +718,6 @@ def recent_runs(limit: int = 50) -> list[dict[str, Any]]:
         (limit,),
     )
     rows = cur.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
 
@@ -228,12 +726,57 @@ def get_run(run_id: int) -> dict[str, Any] | None:
     cur = conn.cursor()
     cur.execute("SELECT * FROM runs WHERE id = ?", (run_id,))
     row = cur.fetchone()
-    conn.close()
     return dict(row) if row else None
 
 
+# --- Judge cache ---
+
+def get_judge_verdict(key: str) -> dict[str, Any] | None:
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT result FROM judge_cache WHERE key = ?", (key,))
+    row = cur.fetchone()
+    return json.loads(row["result"]) if row else None
+
+
+def get_judge_verdicts(keys: list[str]) -> dict[str, dict[str, Any]]:
+    """Cached verdicts for any of ``keys``, by key; keys without one are left out."""
+    found: dict[str, dict[str, Any]] = {}
+    conn = get_conn()
+    # Stay well under SQLite's bound-parameter limit
+    for start in range(0, len(keys), 500):
+        chunk = keys[start : start + 500]
+        rows = conn.execute(
+            f"SELECT key, result FROM judge_cache WHERE key IN ({', '.join('?' * len(chunk))})",
+            chunk,
+        ).fetchall()
+        for row in rows:
+            found[row["key"]] = json.loads(row["result"])
+    return found
+
+
+_PUT_JUDGE_VERDICT_SQL = (
+    "INSERT OR REPLACE INTO judge_cache (key, judge_model, result) VALUES (?, ?, ?)"
+)
+
+
+def put_judge_verdict(key: str, judge_model: str, result: dict[str, Any]) -> None:
+    row = (key, judge_model, json.dumps(result))
+    _write(lambda conn: conn.execute(_PUT_JUDGE_VERDICT_SQL, row))
+
+
+def put_judge_verdicts(judge_model: str, results: dict[str, dict[str, Any]]) -> None:
+    """Store many verdicts of ``judge_model``, by cache key, in one transaction."""
+    rows = [(key, judge_model, json.dumps(result)) for key, result in results.items()]
+    _write(lambda conn: conn.executemany(_PUT_JUDGE_VERDICT_SQL, rows))
+
+
 # --- Suite CRUD ---
 
+_INSERT_SUITE_CASE_SQL = (
+    "INSERT INTO suite_cases (suite_id, input, expected, rubric, order_idx) VALUES (?, ?, ?, ?, ?)"
+)
+
 def list_suites() -> list[dict[str, Any]]:
     conn = get_conn()
     cur = conn.cursor()
@@ -247,7 +790,6 @@ def list_suites() -> list[dict[str, Any]]:
         """
     )
     rows = cur.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
 
@@ -256,29 +798,20 @@ def get_suite(suite_id: int) -> dict[str, Any] | None:
     cur = conn.cursor()
     cur.execute("SELECT * FROM suites WHERE id = ?", (suite_id,))
     row = cur.fetchone()
-    conn.close()
     return dict(row) if row else None
 
 
 def create_suite(name: str, description: str | None = None) -> int:
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO suites (name, description) VALUES (?, ?)",
-        (name, description),
+    return _write(
+        lambda conn: conn.execute(
+            "INSERT INTO suites (name, description) VALUES (?, ?)",
+            (name, description),
+        ).lastrowid
     )
-    row_id = cur.lastrowid
-    conn.commit()
-    conn.close()
-    return row_id
 
 
 def delete_suite(suite_id: int) -> None:
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM suites WHERE id = ?", (suite_id,))
-    conn.commit()
-    conn.close()
+    _write(lambda conn: conn.execute("DELETE FROM suites WHERE id = ?", (suite_id,)))
 
 
 def get_suite_cases(suite_id: int) -> list[dict[str, Any]]:
@@ -289,7 +822,6 @@ def get_suite_cases(suite_id: int) -> list[dict[str, Any]]:
         (suite_id,),
     )
     rows = cur.fetchall()
-    conn.close()
     results = []
     for row in rows:
         d = dict(row)
@@ -306,27 +838,390 @@ def add_suite_case(
     rubric: dict[str, Any] | None = None,
     order_idx: int = 0,
 ) -> int:
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO suite_cases (suite_id, input, expected, rubric, order_idx) VALUES (?, ?, ?, ?, ?)",
+    row = (
+        suite_id,
+        json.dumps(input_data),
+        expected,
+        json.dumps(rubric) if rubric else None,
+        order_idx,
+    )
+    return _write(lambda conn: conn.execute(_INSERT_SUITE_CASE_SQL, row).lastrowid)
+
+
+def add_suite_cases(suite_id: int, cases: list[dict[str, Any]]) -> int:
+    """Insert many suite cases in one transaction; returns the number inserted.
+
+    Each case may carry ``input``, ``expected``, ``rubric`` and ``order_idx``
+    (defaulting to its position in ``cases``).
+    """
+    rows = [
         (
             suite_id,
-            json.dumps(input_data),
-            expected,
-            json.dumps(rubric) if rubric else None,
-            order_idx,
-        ),
-    )
-    row_id = cur.lastrowid
-    conn.commit()
-    conn.close()
-    return row_id
+            json.dumps(case.get("input", {})),
+            case.get("expected"),
+            json.dumps(case["rubric"]) if case.get("rubric") else None,
+            case.get("order_idx", idx),
+        )
+        for idx, case in enumerate(cases)
+    ]
+    _write(lambda conn: conn.executemany(_INSERT_SUITE_CASE_SQL, rows))
+    return len(rows)
 
 
 def remove_suite_case(case_id: int) -> None:
+    _write(lambda conn: conn.execute("DELETE FROM suite_cases WHERE id = ?", (case_id,)))
+
+
+def _job_from_row(row: sqlite3.Row) -> dict[str, Any]:
+    d = dict(row)
+    for key in ("request", "progress", "result"):
+        d[key] = json.loads(d[key]) if d[key] else None
+    return d
+
+
+def create_job(kind: str, request: dict[str, Any]) -> int:
+    return _write(
+        lambda conn: conn.execute(
+            "INSERT INTO jobs (kind, request) VALUES (?, ?)", (kind, json.dumps(request))
+        ).lastrowid
+    )
+
+
+def get_job(job_id: int) -> dict[str, Any] | None:
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM suite_cases WHERE id = ?", (case_id,))
-    conn.commit()
-    conn.close()
+    row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job_from_row(row) if row else None
+
+
+def list_jobs(limit: int = 50, status: str | None = None) -> list[dict[str, Any]]:
+    conn = get_conn()
+    if status is None:
+        rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+        ).fetchall()
+    return [_job_from_row(row) for row in rows]
+
+
+def update_job(
+    job_id: int,
+    status: str | None = None,
+    progress: dict[str, Any] | None = None,
+    result: dict[str, Any] | None = None,
+    error: str | None = None,
+    run_id: int | None = None,
+    owner: str | None = None,
+) -> bool:
+    """Set the given fields of a job; ``None`` leaves a field unchanged.
+
+    Moving to ``running`` stamps started_at; moving to a final status stamps
+    finished_at and drops the lease. With ``owner``, only a job still claimed
+    by that owner is updated. Returns whether the job was updated.
+    """
+    sets: list[str] = []
+    params: list[Any] = []
+    if status is not None:
+        sets.append("status = ?")
+        params.append(status)
+        if status == "running":
+            sets.append("started_at = CURRENT_TIMESTAMP")
+        elif status in ("completed", "failed", "cancelled"):
+            sets.append("finished_at = CURRENT_TIMESTAMP")
+            sets.append("lease_until = NULL")
+    for column, value in (("progress", progress), ("result", result)):
+        if value is not None:
+            sets.append(f"{column} = ?")
+            params.append(json.dumps(value))
+    for column, value in (("error", error), ("run_id", run_id)):
+        if value is not None:
+            sets.append(f"{column} = ?")
+            params.append(value)
+    if not sets:
+        return False
+    where = "id = ?"
+    params.append(job_id)
+    if owner is not None:
+        where += " AND owner = ?"
+        params.append(owner)
+    sql = f"UPDATE jobs SET {', '.join(sets)} WHERE {where}"
+    return _write(lambda conn: conn.execute(sql, params).rowcount > 0)
+
+
+def claim_job(job_id: int, owner: str, lease_s: float) -> dict[str, Any] | None:
+    """Atomically move a queued job to ``running`` under ``owner``'s lease.
+
+    Returns the claimed job, or ``None`` if it is no longer queued (another
+    process claimed it, or it was cancelled).
+    """
+    row = _write(
+        lambda conn: conn.execute(
+            """
+            UPDATE jobs SET status = 'running', owner = ?, lease_until = ?,
+                started_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'queued'
+            RETURNING *
+            """,
+            (owner, time.time() + lease_s, job_id),
+        ).fetchone()
+    )
+    return _job_from_row(row) if row else None
+
+
+def renew_job_leases(owner: str, job_ids: list[int], lease_s: float) -> set[int]:
+    """Extend ``owner``'s leases on ``job_ids``; returns the ids it still holds."""
+    if not job_ids:
+        return set()
+    marks = ", ".join("?" * len(job_ids))
+    rows = _write(
+        lambda conn: conn.execute(
+            f"UPDATE jobs SET lease_until = ? "
+            f"WHERE owner = ? AND status = 'running' AND id IN ({marks}) RETURNING id",
+            (time.time() + lease_s, owner, *job_ids),
+        ).fetchall()
+    )
+    return {row["id"] for row in rows}
+
+
+def request_job_cancel(job_id: int) -> dict[str, Any] | None:
+    """Cancel a job from any process; returns the job, or ``None`` if it does not exist.
+
+    A queued job is cancelled on the spot. A running one is flagged, and its
+    owner cancels it at its next lease renewal (see ``requested_job_cancels``).
+    Finished jobs are left as they are.
+    """
+    def _cancel(conn: sqlite3.Connection) -> sqlite3.Row | None:
+        # SET expressions all see the row as it was before the update
+        row = conn.execute(
+            """
+            UPDATE jobs SET cancel_requested = 1,
+                status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+                finished_at = CASE
+                    WHEN status = 'queued' THEN CURRENT_TIMESTAMP ELSE finished_at
+                END
+            WHERE id = ? AND status IN ('queued', 'running')
+            RETURNING *
+            """,
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row
+
+    row = _write(_cancel)
+    return _job_from_row(row) if row else None
+
+
+def requested_job_cancels(owner: str) -> set[int]:
+    """Ids of the jobs ``owner`` is running that were asked to cancel."""
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT id FROM jobs WHERE owner = ? AND status = 'running' AND cancel_requested = 1",
+        (owner,),
+    ).fetchall()
+    return {row["id"] for row in rows}
+
+
+def release_job(job_id: int, owner: str, progress: dict[str, Any] | None = None) -> None:
+    """Hand a job ``owner`` is running back to the queue, e.g. on shutdown.
+
+    A job asked to cancel meanwhile is marked ``cancelled`` instead.
+    """
+    _write(
+        lambda conn: conn.execute(
+            """
+            UPDATE jobs SET owner = NULL, lease_until = NULL,
+                status = CASE WHEN cancel_requested THEN 'cancelled' ELSE 'queued' END,
+                finished_at = CASE
+                    WHEN cancel_requested THEN CURRENT_TIMESTAMP ELSE finished_at
+                END,
+                progress = COALESCE(?, progress)
+            WHERE id = ? AND owner = ? AND status = 'running'
+            """,
+            (json.dumps(progress) if progress is not None else None, job_id, owner),
+        )
+    )
+
+
+def requeue_expired_jobs() -> list[dict[str, Any]]:
+    """Queue again the running jobs whose owner's lease ran out; returns them.
+
+    Jobs from before leases existed (no ``lease_until``) count as expired.
+    Expired jobs that were asked to cancel are marked ``cancelled`` instead.
+    """
+    def _requeue(conn: sqlite3.Connection) -> list[sqlite3.Row]:
+        expired = "status = 'running' AND (lease_until IS NULL OR lease_until < ?)"
+        now = time.time()
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', owner = NULL, lease_until = NULL, "
+            f"finished_at = CURRENT_TIMESTAMP WHERE cancel_requested = 1 AND {expired}",
+            (now,),
+        )
+        return conn.execute(
+            "UPDATE jobs SET status = 'queued', owner = NULL, lease_until = NULL "
+            f"WHERE {expired} RETURNING *",
+            (now,),
+        ).fetchall()
+
+    rows = _write(_requeue)
+    return sorted((_job_from_row(row) for row in rows), key=lambda job: job["id"])
+
+
+def requeue_unfinished_jobs() -> list[dict[str, Any]]:
+    """Queue again the jobs whose owner died (expired lease); return every queued job.
+
+    Jobs another live process is running keep their lease and are left alone.
+    """
+    requeue_expired_jobs()
+    conn = get_conn()
+    rows = conn.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY id").fetchall()
+    return [_job_from_row(row) for row in rows]
+
+
+def enqueue_work_items(run_id: int, test_idxs: list[int]) -> None:
+    """Queue one work item per case of ``run_id``, resetting items that already exist."""
+    rows = [(run_id, idx) for idx in test_idxs]
+    _write(
+        lambda conn: conn.executemany(
+            "INSERT INTO work_items (run_id, test_idx) VALUES (?, ?) "
+            "ON CONFLICT (run_id, test_idx) DO UPDATE SET status = 'queued', worker_id = NULL, "
+            "lease_expires_at = NULL, attempts = 0, error = NULL",
+            rows,
+        )
+    )
+
+
+def lease_work_items(
+    worker_id: str,
+    limit: int,
+    lease_s: float,
+    max_attempts: int = 3,
+) -> list[dict[str, Any]]:
+    """Lease up to ``limit`` items to ``worker_id`` for ``lease_s`` seconds.
+
+    Queued items are handed out oldest first, along with leased items whose
+    lease expired (their worker stopped heartbeating). Items already leased
+    ``max_attempts`` times are marked ``failed`` instead of being retried.
+    """
+    def _lease(conn: sqlite3.Connection) -> list[dict[str, Any]]:
+        # Take the write lock before reading so two processes never lease the same item
+        conn.execute("BEGIN IMMEDIATE")
+        now = time.time()
+        claimable = "(status = 'queued' OR (status = 'leased' AND lease_expires_at < ?))"
+        conn.execute(
+            "UPDATE work_items SET status = 'failed', worker_id = NULL, lease_expires_at = NULL, "
+            "error = ? || COALESCE(': ' || error, '') "
+            f"WHERE attempts >= ? AND {claimable}",
+            (f"Gave up after {max_attempts} attempts", max_attempts, now),
+        )
+        rows = conn.execute(
+            f"SELECT id, run_id, test_idx, attempts FROM work_items WHERE {claimable} "
+            "ORDER BY id LIMIT ?",
+            (now, limit),
+        ).fetchall()
+        conn.executemany(
+            "UPDATE work_items SET status = 'leased', worker_id = ?, lease_expires_at = ?, "
+            "attempts = attempts + 1 WHERE id = ?",
+            [(worker_id, now + lease_s, row["id"]) for row in rows],
+        )
+        return [{**dict(row), "attempts": row["attempts"] + 1} for row in rows]
+
+    return _write(_lease)
+
+
+def heartbeat_work_items(worker_id: str, item_ids: list[int], lease_s: float) -> set[int]:
+    """Extend ``worker_id``'s leases on ``item_ids``.
+
+    Returns the ids that are still ``worker_id``'s, leased or already finished
+    by it; the others were taken over by another worker or withdrawn.
+    """
+    if not item_ids:
+        return set()
+
+    def _extend(conn: sqlite3.Connection) -> set[int]:
+        mine = f"id IN ({', '.join('?' * len(item_ids))}) AND worker_id = ?"
+        conn.execute(
+            f"UPDATE work_items SET lease_expires_at = ? WHERE {mine} AND status = 'leased'",
+            (time.time() + lease_s, *item_ids, worker_id),
+        )
+        rows = conn.execute(f"SELECT id FROM work_items WHERE {mine}", (*item_ids, worker_id))
+        return {row["id"] for row in rows}
+
+    return _write(_extend)
+
+
+def release_work_items(worker_id: str, item_ids: list[int], error: str | None = None) -> None:
+    """Hand leased items back to the queue.
+
+    Without ``error`` (the worker is shutting down) the attempt is not
+    counted; with one it is, and the error is kept for when the item gives up.
+    """
+    if not item_ids:
+        return
+    marks = ", ".join("?" * len(item_ids))
+    attempts = "attempts" if error is not None else "attempts - 1"
+    _write(
+        lambda conn: conn.execute(
+            f"UPDATE work_items SET status = 'queued', worker_id = NULL, lease_expires_at = NULL, "
+            f"attempts = {attempts}, error = COALESCE(?, error) "
+            f"WHERE id IN ({marks}) AND worker_id = ? AND status = 'leased'",
+            (error, *item_ids, worker_id),
+        )
+    )
+
+
+def complete_work_item(item_id: int, worker_id: str, run_id: int, result: dict[str, Any]) -> bool:
+    """Store a leased item's result and mark it done in one transaction.
+
+    ``result`` takes the keyword arguments of ``insert_run_result`` except
+    ``run_id``. Returns ``False``, storing nothing, if ``worker_id`` no longer
+    holds the lease (it expired and was taken over, or the run was cancelled).
+    """
+    status = "failed" if result.get("error") else "done"
+    row = _run_result_row(run_id=run_id, **result)
+
+    def _complete(conn: sqlite3.Connection) -> bool:
+        cur = conn.execute(
+            "UPDATE work_items SET status = ?, lease_expires_at = NULL, error = ? "
+            "WHERE id = ? AND worker_id = ? AND status = 'leased'",
+            (status, result.get("error"), item_id, worker_id),
+        )
+        if cur.rowcount == 0:
+            return False
+        conn.execute(_INSERT_RUN_RESULT_SQL, row)
+        return True
+
+    return _write(_complete)
+
+
+def count_work_items(run_id: int) -> dict[str, int]:
+    """Number of ``run_id``'s work items in each status."""
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT status, COUNT(*) AS n FROM work_items WHERE run_id = ? GROUP BY status", (run_id,)
+    ).fetchall()
+    counts = {"queued": 0, "leased": 0, "done": 0, "failed": 0}
+    counts.update({row["status"]: row["n"] for row in rows})
+    return counts
+
+
+def get_work_item_errors(run_id: int) -> dict[int, str]:
+    """Errors of ``run_id``'s failed items, by test index."""
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT test_idx, error FROM work_items "
+        "WHERE run_id = ? AND status = 'failed' AND error IS NOT NULL",
+        (run_id,),
+    ).fetchall()
+    return {row["test_idx"]: row["error"] for row in rows}
+
+
+def delete_work_items(run_id: int, pending_only: bool = False) -> None:
+    """Drop ``run_id``'s work items, or only those not finished yet.
+
+    Workers still evaluating a dropped item lose their lease and discard the result.
+    """
+    sql = "DELETE FROM work_items WHERE run_id = ?"
+    if pending_only:
+        sql += " AND status IN ('queued', 'leased')"
+    _write(lambda conn: conn.execute(sql, (run_id,)))
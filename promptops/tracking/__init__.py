@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import atexit
+import os
+
+from .base import TrackedRun, Tracker, TrackingOp
+from .jsonl import JsonlTracker
+from .mlflow import MlflowTracker
+from .noop import NoopTracker
+
+TRACKING_BACKEND = os.getenv("PROMPTOPS_TRACKING", "mlflow")
+
+
+def make_tracker(kind: str | None = None, uri: str | None = None, **kwargs) -> Tracker:
+    """Build a tracker. ``kind`` defaults to ``$PROMPTOPS_TRACKING`` (mlflow)."""
+    match kind or TRACKING_BACKEND:
+        case "mlflow":
+            return MlflowTracker(uri=uri or os.getenv("MLFLOW_TRACKING_URI", "./mlruns"), **kwargs)
+        case "jsonl":
+            return JsonlTracker(
+                uri=uri or os.getenv("PROMPTOPS_TRACKING_PATH", "./promptops_runs.jsonl"),
+                **kwargs,
+            )
+        case "none":
+            return NoopTracker(uri=uri, **kwargs)
+        case other:
+            raise ValueError(
+                f"Unknown tracking backend: {other!r}. Choose from: mlflow, jsonl, none"
+            )
+
+
+_default_trackers: dict[str | None, Tracker] = {}
+
+
+def default_tracker(mlflow_uri: str | None = None) -> Tracker:
+    """Process-wide tracker for callers that do not manage their own.
+
+    One per MLflow URI (ignored by the other backends); drained at exit.
+    """
+    uri = mlflow_uri if TRACKING_BACKEND == "mlflow" else None
+    tracker = _default_trackers.get(uri)
+    if tracker is None:
+        tracker = _default_trackers[uri] = make_tracker(uri=uri)
+        atexit.register(tracker.close)
+    return tracker
+
+
+__all__ = [
+    "JsonlTracker",
+    "MlflowTracker",
+    "NoopTracker",
+    "TrackedRun",
+    "Tracker",
+    "TrackingOp",
+    "default_tracker",
+    "make_tracker",
+]
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import uuid
+import warnings
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict
+
+
+@dataclass
+class TrackingOp:
+    """One queued write. ``kind`` is start, params, metrics, text, end or callback."""
+
+    kind: str
+    run: "TrackedRun"
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+
+class TrackedRun:
+    """Handle to one experiment run.
+
+    Logging calls only enqueue work and return immediately. The backend's run
+    id is assigned by the worker; ``await run.id()`` waits for it and
+    ``when_assigned`` hands it to a callback without waiting.
+    """
+
+    def __init__(self, tracker: "Tracker", name: str | None = None):
+        self.tracker = tracker
+        self.name = name
+        self.key = uuid.uuid4().hex
+        self._id: Future[str | None] = Future()
+
+    async def id(self) -> str | None:
+        """The backend run id, or ``None`` if the backend could not create the run."""
+        return await asyncio.wrap_future(self._id)
+
+    def log_params(self, params: Dict[str, Any]) -> None:
+        self.tracker._submit(TrackingOp("params", self, {"params": params}))
+
+    def log_metrics(self, metrics: Dict[str, float], step: int | None = None) -> None:
+        self.tracker._submit(TrackingOp("metrics", self, {"metrics": metrics, "step": step}))
+
+    def log_text(self, text: str, artifact_file: str) -> None:
+        self.tracker._submit(
+            TrackingOp("text", self, {"text": text, "artifact_file": artifact_file})
+        )
+
+    def when_assigned(self, callback: Callable[[str], None]) -> None:
+        """Call ``callback(run_id)`` on the worker thread once the run exists.
+
+        Not called if the backend could not create the run (or has no ids).
+        """
+        self.tracker._submit(TrackingOp("callback", self, {"callback": callback}))
+
+    def end(self, status: str = "FINISHED") -> None:
+        self.tracker._submit(TrackingOp("end", self, {"status": status}))
+
+    def __enter__(self) -> "TrackedRun":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        self.end("FAILED" if exc_type is not None else "FINISHED")
+
+
+class Tracker(ABC):
+    """Experiment-tracking backend fed by a background writer thread.
+
+    Runs are explicit handles rather than process-wide "active run" state, so
+    concurrent evaluations log to separate runs. The worker drains the queue
+    in batches of up to ``max_batch`` ops and hands each batch to ``_write``.
+    Tracking failures are reported as warnings and never fail a run.
+    """
+
+    kind = "base"
+
+    def __init__(self, uri: str | None = None, max_batch: int = 500):
+        self.uri = uri
+        self.max_batch = max_batch
+        self._queue: queue.Queue[TrackingOp | Future | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start_run(
+        self, name: str | None = None, params: Dict[str, Any] | None = None
+    ) -> TrackedRun:
+        run = TrackedRun(self, name)
+        self._submit(TrackingOp("start", run, {"name": name}))
+        if params:
+            run.log_params(params)
+        return run
+
+    def _submit(self, op: TrackingOp | Future | None) -> None:
+        if self._closed:
+            raise RuntimeError("Tracker is closed")
+        self._ensure_worker()
+        self._queue.put(op)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name=f"promptops-tracking-{self.kind}", daemon=True
+                )
+                self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: list[TrackingOp] = []
+            stop = False
+            waiters: list[Future] = []
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, Future):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            callbacks = [op for op in batch if op.kind == "callback"]
+            batch = [op for op in batch if op.kind != "callback"]
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    warnings.warn(f"{self.kind} tracking write failed: {e}", RuntimeWarning)
+                for op in batch:
+                    # Never leave a caller waiting on a run the backend failed to create
+                    if op.kind == "start" and not op.run._id.done():
+                        op.run._id.set_result(None)
+            for op in callbacks:
+                # Queued after the run's start, which has been written by now
+                run_id = op.run._id.result() if op.run._id.done() else None
+                if run_id is None:
+                    continue
+                try:
+                    op.payload["callback"](run_id)
+                except Exception as e:
+                    warnings.warn(f"{self.kind} tracking callback failed: {e}", RuntimeWarning)
+            for waiter in waiters:
+                waiter.set_result(None)
+            if stop:
+                return
+
+    @abstractmethod
+    def _write(self, batch: list[TrackingOp]) -> None:
+        """Apply ``batch`` in order. Runs on the worker thread."""
+        raise NotImplementedError
+
+    async def flush(self) -> None:
+        """Wait until everything queued so far has been written."""
+        if self._thread is None:
+            return
+        done: Future[None] = Future()
+        self._queue.put(done)
+        await asyncio.wrap_future(done)
+
+    def close(self) -> None:
+        """Blocking variant of ``aclose`` for use outside an event loop."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    async def aclose(self) -> None:
+        """Drain the queue and stop the worker."""
+        await asyncio.to_thread(self.close)
+
+    async def __aenter__(self) -> "Tracker":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
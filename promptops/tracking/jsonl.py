@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+from .base import Tracker, TrackingOp
+
+
+class JsonlTracker(Tracker):
+    """Appends every tracking event as one JSON line to a local file.
+
+    Each line carries ``ts``, ``run`` (the run id), ``event`` and the event's
+    payload. The file is opened in append mode per batch, so several
+    processes can share it.
+    """
+
+    kind = "jsonl"
+
+    def __init__(self, uri: str | None = "./promptops_runs.jsonl", max_batch: int = 500):
+        super().__init__(uri=uri, max_batch=max_batch)
+        self.path = Path(uri or "./promptops_runs.jsonl")
+
+    def _write(self, batch: list[TrackingOp]) -> None:
+        lines = []
+        for op in batch:
+            if op.kind == "start":
+                # The local key doubles as the run id; there is no server to ask
+                op.run._id.set_result(op.run.key)
+            lines.append(
+                json.dumps(
+                    {"ts": time.time(), "run": op.run.key, "event": op.kind, **op.payload},
+                    default=str,
+                )
+            )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
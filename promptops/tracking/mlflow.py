@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import time
+import warnings
+from typing import Any, Dict
+
+from .base import Tracker, TrackingOp
+
+# MlflowClient.log_batch limits per request
+_MAX_METRICS_PER_BATCH = 1000
+_MAX_PARAMS_PER_BATCH = 100
+
+
+class MlflowTracker(Tracker):
+    """Writes to an MLflow tracking store through ``MlflowClient``.
+
+    Consecutive params and metrics for a run are coalesced into ``log_batch``
+    calls. Uses the client API only, so it never touches MLflow's global
+    tracking URI or active-run state.
+    """
+
+    kind = "mlflow"
+
+    def __init__(
+        self,
+        uri: str | None = "./mlruns",
+        experiment_name: str | None = None,
+        max_batch: int = 500,
+    ):
+        super().__init__(uri=uri, max_batch=max_batch)
+        self.experiment_name = experiment_name
+        self._client: Any = None
+        self._experiment_id: str | None = None
+        self._run_ids: Dict[str, str] = {}
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            from mlflow.tracking import MlflowClient
+
+            self._client = MlflowClient(tracking_uri=self.uri)
+            if self.experiment_name is None:
+                self._experiment_id = "0"
+            else:
+                experiment = self._client.get_experiment_by_name(self.experiment_name)
+                self._experiment_id = (
+                    experiment.experiment_id
+                    if experiment is not None
+                    else self._client.create_experiment(self.experiment_name)
+                )
+        return self._client
+
+    def _write(self, batch: list[TrackingOp]) -> None:
+        from mlflow.entities import Metric, Param
+
+        client = self._get_client()
+        pending: Dict[str, tuple[list[Any], list[Any]]] = {}
+
+        def _flush(key: str) -> None:
+            metrics, params = pending.pop(key, ([], []))
+            run_id = self._run_ids.get(key)
+            if run_id is None:
+                return
+            while metrics or params:
+                client.log_batch(
+                    run_id,
+                    metrics=metrics[:_MAX_METRICS_PER_BATCH],
+                    params=params[:_MAX_PARAMS_PER_BATCH],
+                )
+                metrics = metrics[_MAX_METRICS_PER_BATCH:]
+                params = params[_MAX_PARAMS_PER_BATCH:]
+
+        def _apply(op: TrackingOp) -> None:
+            key = op.run.key
+            if op.kind == "start":
+                run = client.create_run(self._experiment_id, run_name=op.payload["name"])
+                self._run_ids[key] = run.info.run_id
+                op.run._id.set_result(run.info.run_id)
+            elif op.kind == "params":
+                params = pending.setdefault(key, ([], []))[1]
+                params.extend(Param(k, str(v)) for k, v in op.payload["params"].items())
+            elif op.kind == "metrics":
+                metrics = pending.setdefault(key, ([], []))[0]
+                timestamp = int(time.time() * 1000)
+                step = op.payload["step"] or 0
+                metrics.extend(
+                    Metric(k, float(v), timestamp, step) for k, v in op.payload["metrics"].items()
+                )
+            else:
+                _flush(key)
+                if op.kind == "text":
+                    run_id = self._run_ids.get(key)
+                    if run_id is not None:
+                        client.log_text(run_id, op.payload["text"], op.payload["artifact_file"])
+                elif op.kind == "end":
+                    run_id = self._run_ids.pop(key, None)
+                    if run_id is not None:
+                        client.set_terminated(run_id, status=op.payload["status"])
+
+        # A failed call only loses its own op (or, for a flush, that run's
+        # pending params and metrics); the rest of the batch is still written
+        for op in batch:
+            try:
+                _apply(op)
+            except Exception as e:
+                warnings.warn(f"mlflow tracking {op.kind} failed: {e}", RuntimeWarning)
+
+        for key in list(pending):
+            try:
+                _flush(key)
+            except Exception as e:
+                warnings.warn(f"mlflow tracking log_batch failed: {e}", RuntimeWarning)
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from .base import Tracker, TrackingOp
+
+
+class NoopTracker(Tracker):
+    """Discards everything. Runs have no id."""
+
+    kind = "none"
+
+    def _submit(self, op: TrackingOp | object | None) -> None:
+        # Skip the worker thread entirely; only run ids need resolving
+        if isinstance(op, TrackingOp) and op.kind == "start":
+            op.run._id.set_result(None)
+
+    def _write(self, batch: list[TrackingOp]) -> None:
+        pass
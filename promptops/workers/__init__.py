@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from .local import LocalWorkers
+from .worker import LEASE_S, WORKER_CONCURRENCY, Worker, default_worker_id, run_worker
+
+__all__ = [
+    "LEASE_S",
+    "WORKER_CONCURRENCY",
+    "LocalWorkers",
+    "Worker",
+    "default_worker_id",
+    "run_worker",
+]
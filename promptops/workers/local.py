@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from pathlib import Path
+from typing import Any
+
+from promptops.store import db
+
+from .worker import LEASE_S, WORKER_CONCURRENCY, run_worker
+
+
+def _worker_main(db_path: str, options: dict[str, Any]) -> None:
+    # Spawned children re-import the store; point them at the parent's database
+    db.DB_PATH = Path(db_path)
+    asyncio.run(run_worker(**options))
+
+
+class LocalWorkers:
+    """Runs ``n`` workers as separate processes on this machine.
+
+    A stand-in for worker machines when trying distributed runs locally or
+    exercising failure handling: ``kill`` stops a worker without letting it
+    release its leases, as a crash would. Used as a context manager around
+    ``run_distributed``; the workers share this process's ``db.DB_PATH``.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        concurrency: int = WORKER_CONCURRENCY,
+        lease_s: float = LEASE_S,
+        poll_interval_s: float = 0.5,
+        max_attempts: int = 3,
+    ):
+        self.n = n
+        self.options = {
+            "concurrency": concurrency,
+            "lease_s": lease_s,
+            "poll_interval_s": poll_interval_s,
+            "max_attempts": max_attempts,
+        }
+        # Spawn rather than fork: the parent has store and tracking threads running
+        self._ctx = multiprocessing.get_context("spawn")
+        self.processes: list[multiprocessing.process.BaseProcess] = []
+
+    def start(self) -> None:
+        db.init_db()
+        for _ in range(self.n):
+            proc = self._ctx.Process(
+                target=_worker_main, args=(str(db.DB_PATH), self.options), daemon=True
+            )
+            proc.start()
+            self.processes.append(proc)
+
+    def kill(self, index: int) -> None:
+        """Kill worker ``index`` outright; its items are retried once their leases expire."""
+        self.processes[index].kill()
+        self.processes[index].join()
+
+    def stop(self, timeout_s: float = 10.0) -> None:
+        """Ask every worker to finish up (SIGTERM), killing those that do not exit in time."""
+        for proc in self.processes:
+            if proc.is_alive():
+                proc.terminate()
+        for proc in self.processes:
+            proc.join(timeout_s)
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+        self.processes = []
+
+    def __enter__(self) -> "LocalWorkers":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import socket
+import uuid
+from typing import Any, Dict
+
+from promptops.core.adapters import AdapterRegistry
+from promptops.core.prompt import Prompt
+from promptops.core.runner import evaluate_run_cases
+from promptops.store import aio as store
+from promptops.tests.testcase import TestCase
+
+WORKER_CONCURRENCY = int(os.getenv("PROMPTOPS_WORKER_CONCURRENCY", "8"))
+LEASE_S = float(os.getenv("PROMPTOPS_WORKER_LEASE_S", "30"))
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class _RunSpec:
+    """A distributed run's prompt, cases and judge settings, loaded once per worker."""
+
+    def __init__(self, spec: dict[str, Any]):
+        self.prompt = Prompt(**spec["prompt"])
+        self.testcases = [TestCase(**tc) for tc in spec["cases"]]
+        self.config = spec["config"]
+
+
+class Worker:
+    """Leases case-level work items from the store and evaluates them.
+
+    Items are leased for ``lease_s`` seconds and the lease is renewed every
+    third of that while they are evaluated, so a crashed worker's items are
+    picked up by another worker once its leases run out. Up to
+    ``concurrency`` cases are in flight at once; leased cases of the same run
+    are evaluated together so batch judging still applies. Each result is
+    stored together with marking its item done, and only while the lease is
+    still held: a case taken over by another worker, or withdrawn by its
+    coordinator, is cancelled at the next heartbeat.
+    """
+
+    def __init__(
+        self,
+        registry: AdapterRegistry,
+        worker_id: str | None = None,
+        concurrency: int = WORKER_CONCURRENCY,
+        lease_s: float = LEASE_S,
+        poll_interval_s: float = 1.0,
+        max_attempts: int = 3,
+    ):
+        self.registry = registry
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, concurrency)
+        self.lease_s = lease_s
+        self.poll_interval_s = poll_interval_s
+        self.max_attempts = max_attempts
+        self.completed = 0
+        self.lost = 0
+        self._specs: Dict[int, _RunSpec] = {}
+        # Leased item ids still being evaluated, per evaluation task
+        self._held: Dict[asyncio.Task[None], set[int]] = {}
+        self._wake = asyncio.Event()
+
+    def _in_flight(self) -> int:
+        return sum(len(ids) for ids in self._held.values())
+
+    async def run(self, stop_when_idle: bool = False) -> int:
+        """Process items until cancelled, or until the queue is empty with
+        ``stop_when_idle``; returns the number of cases completed.
+        """
+        await store.init_db()
+        heartbeat = asyncio.ensure_future(self._heartbeat())
+        try:
+            while True:
+                self._wake.clear()
+                free = self.concurrency - self._in_flight()
+                if free > 0:
+                    items = await store.lease_work_items(
+                        self.worker_id, free, self.lease_s, self.max_attempts
+                    )
+                    self._start(items)
+                    if not items and not self._held and stop_when_idle:
+                        return self.completed
+                # Either every slot is taken or the queue is drained: wait for
+                # a case to finish or for the next poll
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval_s)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Hand unfinished items straight back rather than letting their leases expire
+            unfinished = [item_id for ids in self._held.values() for item_id in ids]
+            tasks = list(self._held)
+            heartbeat.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(heartbeat, *tasks, return_exceptions=True)
+            await store.release_work_items(self.worker_id, unfinished)
+
+    def _start(self, items: list[dict[str, Any]]) -> None:
+        by_run: Dict[int, list[dict[str, Any]]] = {}
+        for item in items:
+            by_run.setdefault(item["run_id"], []).append(item)
+        for run_id, run_items in by_run.items():
+            ids = {item["id"] for item in run_items}
+            task = asyncio.ensure_future(self._evaluate(run_id, run_items, ids))
+            self._held[task] = ids
+            task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task[None]) -> None:
+        self._held.pop(task, None)
+        self._wake.set()
+
+    async def _spec(self, run_id: int) -> _RunSpec:
+        spec = self._specs.get(run_id)
+        if spec is None:
+            raw = await store.get_run_spec(run_id)
+            if raw is None:
+                raise ValueError(f"Run {run_id} has no stored spec")
+            spec = self._specs[run_id] = _RunSpec(raw)
+        return spec
+
+    async def _evaluate(self, run_id: int, items: list[dict[str, Any]], held: set[int]) -> None:
+        item_ids = {item["test_idx"]: item["id"] for item in items}
+
+        async def _store(idx: int, row: dict[str, Any]) -> None:
+            item_id = item_ids[idx]
+            if item_id not in held:
+                # Lost at the last heartbeat
+                return
+            if await store.complete_work_item(item_id, self.worker_id, run_id, row):
+                self.completed += 1
+            else:
+                self.lost += 1
+            held.discard(item_id)
+            self._wake.set()
+
+        try:
+            spec = await self._spec(run_id)
+            adapter = self.registry.get(spec.prompt.provider)
+            await evaluate_run_cases(
+                adapter, spec.prompt, spec.testcases, sorted(item_ids), spec.config, _store
+            )
+        except Exception as e:
+            # Not a case failure (those are stored as results): retry elsewhere
+            await store.release_work_items(
+                self.worker_id, sorted(held), error=f"{type(e).__name__}: {e}"
+            )
+            held.clear()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_s / 3)
+            ids = [item_id for held in self._held.values() for item_id in held]
+            try:
+                kept = await store.heartbeat_work_items(self.worker_id, ids, self.lease_s)
+            except Exception:
+                # A busy store: try again before the leases run out
+                continue
+            for task, held in list(self._held.items()):
+                lost = (held & set(ids)) - kept
+                if not lost:
+                    continue
+                self.lost += len(lost)
+                held -= lost
+                if not held:
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "completed": self.completed,
+            "lost": self.lost,
+            "in_flight": self._in_flight(),
+        }
+
+
+async def run_worker(
+    worker_id: str | None = None,
+    concurrency: int = WORKER_CONCURRENCY,
+    lease_s: float = LEASE_S,
+    poll_interval_s: float = 1.0,
+    max_attempts: int = 3,
+    stop_when_idle: bool = False,
+) -> Dict[str, Any]:
+    """Run a ``Worker`` until SIGINT/SIGTERM (or an empty queue with
+    ``stop_when_idle``), handing its unfinished items back on the way out.
+    Returns the worker's stats.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    assert task is not None
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, task.cancel)
+    async with AdapterRegistry() as registry:
+        worker = Worker(
+            registry,
+            worker_id=worker_id,
+            concurrency=concurrency,
+            lease_s=lease_s,
+            poll_interval_s=poll_interval_s,
+            max_attempts=max_attempts,
+        )
+        try:
+            await worker.run(stop_when_idle)
+        except asyncio.CancelledError:
+            pass
+        return worker.stats()
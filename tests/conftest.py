@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from promptops.store import db
+
+
+@pytest.fixture
+def store_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """A fresh, migrated store in ``tmp_path`` for the duration of one test."""
+    path = tmp_path / "promptops.db"
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.init_db()
+    yield path
+    db.close_db()
+
+
+def pytest_terminal_summary(terminalreporter: pytest.TerminalReporter) -> None:
+    """List the figures benchmarks recorded with ``record_property``."""
+    reports = [r for r in terminalreporter.stats.get("passed", []) if r.user_properties]
+    if not reports:
+        return
+    terminalreporter.section("benchmarks")
+    for report in reports:
+        for name, value in report.user_properties:
+            terminalreporter.write_line(f"{report.nodeid} {name}: {value:,.1f}")
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator
+
+import pytest
+
+from promptops.core.adapters import AdapterRegistry, BaseAdapter, make_adapter
+from promptops.core.adapters.cache import ResponseCache
+
+pytestmark = pytest.mark.benchmark
+
+CALLS = 20
+
+_OPENAI_REPLY = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}
+    ],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+}
+
+_ANTHROPIC_REPLY = {
+    "id": "msg_1",
+    "type": "message",
+    "role": "assistant",
+    "model": "claude-haiku-4-5",
+    "content": [{"type": "text", "text": "ok"}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 10, "output_tokens": 1},
+}
+
+
+class _StubProvider:
+    """Answers OpenAI chat completions and Anthropic messages instantly, counting connections."""
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; don't let Nagle hold the body back
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def setup(self) -> None:
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers["Content-Length"]))
+                openai = self.path.endswith("/chat/completions")
+                data = json.dumps(_OPENAI_REPLY if openai else _ANTHROPIC_REPLY).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def base_url(self, provider: str) -> str:
+        # The OpenAI SDK expects the API version in its base URL; Anthropic's adds it itself
+        return f"{self.url}/v1" if provider == "openai" else self.url
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub() -> Iterator[_StubProvider]:
+    server = _StubProvider()
+    yield server
+    server.close()
+
+
+async def _ms_per_call(call: Callable[[int], Any]) -> float:
+    start = time.perf_counter()
+    for i in range(CALLS):
+        await call(i)
+    return (time.perf_counter() - start) * 1000.0 / CALLS
+
+
+_MODELS = {"openai": "gpt-4o-mini", "anthropic": "claude-haiku-4-5"}
+
+
+@pytest.mark.parametrize("provider", ["openai", "anthropic"])
+def test_registry_clients_cut_per_call_overhead(
+    stub: _StubProvider, record_property: Callable[[str, Any], None], provider: str
+) -> None:
+    model = _MODELS[provider]
+    kwargs = {"api_key": "test-key", "base_url": stub.base_url(provider)}
+    params = {"max_tokens": 8}
+
+    async def _fresh(i: int) -> None:
+        # What every call paid before the registry: a new adapter and SDK client
+        adapter: BaseAdapter = make_adapter(provider, **kwargs)
+        try:
+            await adapter.generate(model, "system", f"prompt {i}", params)
+        finally:
+            await adapter.aclose()
+
+    async def _run() -> tuple[float, int, float, int]:
+        fresh_ms = await _ms_per_call(_fresh)
+        fresh_connections = stub.connections
+
+        async with AdapterRegistry(cache=ResponseCache(None), cache_policy="never") as registry:
+
+            async def _cached(i: int) -> None:
+                adapter = registry.get(provider, **kwargs)
+                await adapter.generate(model, "system", f"prompt {i}", params)
+
+            await _cached(-1)  # the first call builds the client and opens the connection
+            cached_start = stub.connections
+            cached_ms = await _ms_per_call(_cached)
+            return fresh_ms, fresh_connections, cached_ms, stub.connections - cached_start
+
+    fresh_ms, fresh_connections, cached_ms, cached_connections = asyncio.run(_run())
+    record_property("fresh client ms/call", fresh_ms)
+    record_property("registry ms/call", cached_ms)
+
+    # A fresh client opens a connection per call; the registry's client keeps one alive
+    assert fresh_connections == CALLS
+    assert cached_connections == 0
+    assert cached_ms < fresh_ms
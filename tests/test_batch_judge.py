@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from promptops.core.adapters.base import BaseAdapter, ModelResponse
+from promptops.core.prompt import Prompt
+from promptops.core.runner import evaluate_prompt, stream_dataset
+from promptops.eval.judge import JudgeItem, JudgeResult, judge_batch
+from promptops.store import aio as store
+from promptops.tests.testcase import TestCase
+from promptops.tracking import make_tracker
+
+PROMPT = Prompt(name="echo", system="", template="Say {n}", model="gen", provider="custom")
+
+
+class _FlakyJudge(BaseAdapter):
+    """Echoes the prompt; batch verdicts never parse and the single judge fails on one output."""
+
+    def __init__(self, failing_output: str):
+        self.failing_output = failing_output
+
+    async def generate(
+        self, model: str, system: str, prompt: str, params: Dict[str, Any]
+    ) -> ModelResponse:
+        if model == "gen":
+            return ModelResponse(output=prompt)
+        if "### Item" in prompt:
+            return ModelResponse(output="not json")
+        if self.failing_output in prompt:
+            raise RuntimeError("judge unavailable")
+        return ModelResponse(output='{"overall": 0.8, "criteria": {}}')
+
+    async def health_check(self) -> bool:
+        return True
+
+
+def _cases(n: int) -> list[TestCase]:
+    return [TestCase(input={"n": i}) for i in range(n)]
+
+
+def test_failed_fallback_verdict_fails_only_its_case(store_db: Path) -> None:
+    adapter = _FlakyJudge("Say 3\n")
+    batch = asyncio.run(
+        evaluate_prompt(
+            adapter, PROMPT, _cases(11), "judge", judge_mode="batch", judge_batch_size=4
+        )
+    )
+    single = asyncio.run(evaluate_prompt(adapter, PROMPT, _cases(11), "judge"))
+
+    for result in (batch, single):
+        assert result["completed"] == 10
+        assert result["error_count"] == 1
+        assert [i for i, e in enumerate(result["errors"]) if e] == [3]
+
+
+def test_streamed_batch_records_fallback_failures_per_case(store_db: Path) -> None:
+    async def _run() -> list[dict[str, Any]]:
+        return [
+            event
+            async for event in stream_dataset(
+                _FlakyJudge("Say 3\n"),
+                PROMPT,
+                _cases(11),
+                "judge",
+                judge_mode="batch",
+                judge_batch_size=4,
+                tracker=make_tracker("none"),
+            )
+        ]
+
+    events = asyncio.run(_run())
+    failed = [e["test_idx"] for e in events if e["event"] == "case" and e["error"]]
+    assert failed == [3]
+    assert events[-1]["completed"] == 10
+
+
+class _SlowFailures(BaseAdapter):
+    """Generates cases 0-5 at once, fails 6 and 7 shortly after and hangs on the rest."""
+
+    async def generate(
+        self, model: str, system: str, prompt: str, params: Dict[str, Any]
+    ) -> ModelResponse:
+        if model == "judge":
+            return ModelResponse(output='{"overall": 0.8, "criteria": {}}')
+        n = int(prompt.split()[-1])
+        if n in (6, 7):
+            await asyncio.sleep(0.05)
+            raise RuntimeError("generation failed")
+        if n > 7:
+            await asyncio.sleep(30)
+        return ModelResponse(output=prompt)
+
+    async def health_check(self) -> bool:
+        return True
+
+
+def test_streamed_error_budget_still_judges_generated_cases(store_db: Path) -> None:
+    async def _run() -> list[dict[str, Any]]:
+        return [
+            event
+            async for event in stream_dataset(
+                _SlowFailures(),
+                PROMPT,
+                _cases(10),
+                "judge",
+                judge_mode="batch",
+                judge_batch_size=16,
+                tracker=make_tracker("none"),
+                max_errors=1,
+            )
+        ]
+
+    events = asyncio.run(asyncio.wait_for(_run(), 10))
+    cases = {e["test_idx"]: e for e in events if e["event"] == "case"}
+    assert sorted(i for i, e in cases.items() if e["error"] is None) == [0, 1, 2, 3, 4, 5]
+    assert all(cases[i]["error"].startswith("RuntimeError") for i in (6, 7))
+    assert all(cases[i]["error"].startswith("ErrorBudgetExceeded") for i in (8, 9))
+
+
+class _BatchJudge(BaseAdapter):
+    """Answers every packed judge request with a verdict per item."""
+
+    async def generate(
+        self, model: str, system: str, prompt: str, params: Dict[str, Any]
+    ) -> ModelResponse:
+        indices = [line.split()[-1] for line in prompt.splitlines() if line.startswith("### Item")]
+        verdicts = [f'{{"index": {i}, "overall": 0.9, "criteria": {{}}}}' for i in indices]
+        return ModelResponse(output=f"[{', '.join(verdicts)}]")
+
+    async def health_check(self) -> bool:
+        return True
+
+
+def test_batch_judge_reads_and_writes_the_cache_once(
+    store_db: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: Counter[str] = Counter()
+    names = ("get_judge_verdict", "get_judge_verdicts", "put_judge_verdict", "put_judge_verdicts")
+    for name in names:
+        original = getattr(store, name)
+
+        async def _counted(*args: Any, _name: str = name, _original: Any = original) -> Any:
+            calls[_name] += 1
+            return await _original(*args)
+
+        monkeypatch.setattr(store, name, _counted)
+
+    items = [JudgeItem(user_input={"n": i}, assistant_output=f"Say {i}") for i in range(20)]
+
+    def _judge() -> list[JudgeResult | BaseException]:
+        return asyncio.run(judge_batch(_BatchJudge(), "judge", {}, items, batch_size=8))
+
+    first = _judge()
+    assert calls == {"get_judge_verdicts": 1, "put_judge_verdicts": 1}
+    second = _judge()
+    assert calls == {"get_judge_verdicts": 2, "put_judge_verdicts": 1}
+    assert all(isinstance(r, JudgeResult) and r.score == 0.9 for r in first)
+    assert all(isinstance(r, JudgeResult) and r.cached for r in second)
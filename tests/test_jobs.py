@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from promptops.jobs import Job, JobManager
+from promptops.store import db
+
+
+async def _wait_final(manager: JobManager, job_id: int) -> dict[str, Any]:
+    for _ in range(500):
+        row = await manager.get(job_id)
+        if row is not None and row["status"] in ("completed", "failed", "cancelled"):
+            return row
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_two_managers_run_each_job_once(store_db: Path) -> None:
+    runs: Counter[int] = Counter()
+
+    async def _handler(job: Job) -> dict[str, Any]:
+        runs[job.id] += 1
+        await asyncio.sleep(0.02)
+        return {"by": job._manager.owner}
+
+    async def _run() -> list[dict[str, Any]]:
+        first = JobManager(max_concurrent=2, owner="first")
+        second = JobManager(max_concurrent=2, owner="second")
+        for manager in (first, second):
+            manager.register("echo", _handler)
+        ids = [(await first.submit("echo", {"i": i}))["id"] for i in range(8)]
+        # The second manager finds every job still queued and races the first for them
+        await second.start()
+        await first.start()
+        try:
+            return [await _wait_final(first, job_id) for job_id in ids]
+        finally:
+            await first.close()
+            await second.close()
+
+    rows = asyncio.run(_run())
+    assert all(row["status"] == "completed" for row in rows)
+    assert set(runs.values()) == {1}
+    owners = {db.get_job(row["id"])["owner"] for row in rows}
+    assert owners <= {"first", "second"}
+
+
+def test_only_expired_leases_are_recovered(store_db: Path) -> None:
+    dead = db.create_job("echo", {})
+    alive = db.create_job("echo", {})
+    assert db.claim_job(dead, "crashed", lease_s=-1.0) is not None
+    assert db.claim_job(alive, "elsewhere", lease_s=60.0) is not None
+    # Already claimed: a second claim must fail
+    assert db.claim_job(alive, "thief", lease_s=60.0) is None
+
+    recovered = [row["id"] for row in db.requeue_unfinished_jobs()]
+    assert recovered == [dead]
+    assert db.get_job(alive)["status"] == "running"
+    assert db.get_job(alive)["owner"] == "elsewhere"
+
+
+def test_lost_lease_cancels_the_handler(store_db: Path) -> None:
+    started = asyncio.Event()
+
+    async def _handler(job: Job) -> dict[str, Any]:
+        started.set()
+        await asyncio.sleep(30)
+        return {}
+
+    async def _run() -> tuple[Job, dict[str, Any]]:
+        manager = JobManager(owner="slow", lease_s=0.15)
+        manager.register("sleep", _handler)
+        await manager.start()
+        try:
+            job_id = (await manager.submit("sleep", {}))["id"]
+            job = manager._jobs[job_id]
+            await started.wait()
+            # Another process takes the job over as if our lease had run out
+            await asyncio.to_thread(
+                db._write,
+                lambda conn: conn.execute(
+                    "UPDATE jobs SET owner = 'other', lease_until = 1e12 WHERE id = ?", (job_id,)
+                ),
+            )
+            await asyncio.wait_for(asyncio.shield(job.task), 2.0)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await manager.close()
+        return job, db.get_job(job_id)
+
+    job, row = asyncio.run(_run())
+    assert job.lost
+    assert row["owner"] == "other" and row["status"] == "running"
+
+
+def test_cancel_while_claiming_never_starts_the_handler(store_db: Path) -> None:
+    started: list[int] = []
+
+    async def _handler(job: Job) -> dict[str, Any]:
+        started.append(job.id)
+        return {}
+
+    async def _run() -> dict[str, Any]:
+        manager = JobManager(max_concurrent=1, owner="me")
+        manager.register("echo", _handler)
+        await manager.start()
+        try:
+            job_id = (await manager.submit("echo", {}))["id"]
+            # Let the worker mark the job running and start claiming it
+            await asyncio.sleep(0)
+            job = manager._jobs[job_id]
+            assert job.status == "running" and job.task is None
+            await manager.cancel(job_id)
+            return await _wait_final(manager, job_id)
+        finally:
+            await manager.close()
+
+    row = asyncio.run(_run())
+    assert row["status"] == "cancelled"
+    assert started == []
+
+
+def test_cancel_reaches_a_job_owned_by_another_manager(store_db: Path) -> None:
+    started = asyncio.Event()
+    cancelled: list[int] = []
+
+    async def _handler(job: Job) -> dict[str, Any]:
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(job.id)
+            raise
+        return {}
+
+    async def _run() -> tuple[dict[str, Any], dict[str, Any]]:
+        owner = JobManager(owner="owner", lease_s=0.15)
+        other = JobManager(owner="other", lease_s=0.15)
+        owner.register("sleep", _handler)
+        other.register("sleep", _handler)
+        job_id = (await owner.submit("sleep", {}))["id"]
+        await owner.start()
+        await other.start()
+        try:
+            await started.wait()
+            # The cancel reaches an API process that is not running the job
+            response = await other.cancel(job_id)
+            return response, await _wait_final(owner, job_id)
+        finally:
+            await owner.close()
+            await other.close()
+
+    response, row = asyncio.run(_run())
+    assert response["status"] == "running" and response["cancel_requested"]
+    assert row["status"] == "cancelled"
+    assert cancelled == [row["id"]]
+    assert db.get_job(row["id"])["status"] == "cancelled"
+
+
+def test_cancelled_queued_job_is_never_claimed(store_db: Path) -> None:
+    job_id = db.create_job("echo", {})
+    assert db.request_job_cancel(job_id)["status"] == "cancelled"
+    assert db.claim_job(job_id, "late", lease_s=60.0) is None
+    assert [row["id"] for row in db.requeue_unfinished_jobs()] == []
+
+
+def test_released_or_expired_jobs_asked_to_cancel_are_not_requeued(store_db: Path) -> None:
+    released = db.create_job("echo", {})
+    expired = db.create_job("echo", {})
+    db.claim_job(released, "shutting-down", lease_s=60.0)
+    db.claim_job(expired, "crashed", lease_s=-1.0)
+    for job_id in (released, expired):
+        assert db.request_job_cancel(job_id)["status"] == "running"
+
+    db.release_job(released, "shutting-down")
+    assert db.requeue_expired_jobs() == []
+    assert db.get_job(released)["status"] == "cancelled"
+    assert db.get_job(expired)["status"] == "cancelled"
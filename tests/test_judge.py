@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict
+
+from promptops.core.adapters.base import BaseAdapter, ModelResponse
+from promptops.eval.judge import JudgeResult, judge_output
+
+
+class _ScriptedJudge(BaseAdapter):
+    """Returns the scripted judge outputs in order, counting calls."""
+
+    def __init__(self, outputs: list[str]):
+        self.outputs = outputs
+        self.calls = 0
+
+    async def generate(
+        self, model: str, system: str, prompt: str, params: Dict[str, Any]
+    ) -> ModelResponse:
+        self.calls += 1
+        return ModelResponse(output=self.outputs.pop(0))
+
+    async def health_check(self) -> bool:
+        return True
+
+
+def _judge(adapter: BaseAdapter, **kwargs: Any) -> JudgeResult:
+    return asyncio.run(
+        judge_output(adapter, "judge", {}, {"q": 1}, "answer", use_cache=False, **kwargs)
+    )
+
+
+def test_one_parseable_verdict_costs_one_call(store_db: Path) -> None:
+    adapter = _ScriptedJudge(['{"overall": 0.7, "criteria": {}}'])
+    verdict = _judge(adapter)
+    assert adapter.calls == 1
+    assert verdict.score == 0.7 and verdict.samples == 1 and verdict.parse_failures == 0
+
+
+def test_unparseable_verdicts_escalate(store_db: Path) -> None:
+    adapter = _ScriptedJudge(["no verdict", "still none", '{"overall": 0.6, "criteria": {}}'])
+    verdict = _judge(adapter)
+    assert adapter.calls == 3
+    assert verdict.score == 0.6 and verdict.samples == 3 and verdict.parse_failures == 2
+
+
+def test_disagreement_escalates_with_more_min_samples(store_db: Path) -> None:
+    adapter = _ScriptedJudge(['{"overall": 0.2}', '{"overall": 0.9}', '{"overall": 0.8}'])
+    verdict = _judge(adapter, min_samples=2)
+    assert adapter.calls == 3
+    assert verdict.samples == 3 and verdict.score_stdev is not None
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from promptops.core.prompt import Prompt
+from promptops.core.runner import run_distributed
+from promptops.store import db
+from promptops.tests.testcase import TestCase
+from promptops.tracking import make_tracker
+from promptops.workers import LocalWorkers
+
+PROMPT = Prompt(name="echo", system="", template="Say {n}", model="gen")
+VERDICT = json.dumps({"overall": 0.8, "criteria": {}})
+
+
+class _StubOllama:
+    """An Ollama host for the worker processes: echoes prompts and answers judge calls."""
+
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+        self.generated: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send(self, body: dict[str, Any]) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                self._send({"models": [{"model": "gen:latest"}, {"model": "judge:latest"}]})
+
+            def do_POST(self) -> None:
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if payload["model"] == "judge":
+                    self._send({"response": VERDICT, "prompt_eval_count": 50, "eval_count": 10})
+                    return
+                with stub._lock:
+                    stub.generated[payload["prompt"]] += 1
+                time.sleep(stub.delay_s)
+                self._send(
+                    {"response": payload["prompt"], "prompt_eval_count": 5, "eval_count": 2}
+                )
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def ollama(
+    store_db: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[_StubOllama]:
+    stub = _StubOllama(delay_s=0.05)
+    # Spawned workers inherit the environment: point their adapters and cache here
+    monkeypatch.setenv("OLLAMA_URL", stub.url)
+    monkeypatch.setenv("PROMPTOPS_CACHE_DB", str(tmp_path / "cache.db"))
+    yield stub
+    stub.close()
+
+
+def _cases(n: int) -> list[TestCase]:
+    return [TestCase(input={"n": i}) for i in range(n)]
+
+
+async def _run(cases: list[TestCase]) -> dict[str, Any]:
+    return await run_distributed(
+        PROMPT, cases, "judge", tracker=make_tracker("none"), poll_interval_s=0.05
+    )
+
+
+def test_local_workers_complete_a_distributed_run(ollama: _StubOllama) -> None:
+    with LocalWorkers(2, concurrency=4, lease_s=3.0, poll_interval_s=0.05):
+        result = asyncio.run(asyncio.wait_for(_run(_cases(16)), timeout=60))
+
+    rows = db.get_run_results(result["run_id"])
+    assert [row["test_idx"] for row in rows] == list(range(16))
+    assert all(row["error"] is None and row["output"] == f"Say {row['test_idx']}" for row in rows)
+    assert result["completed"] == 16
+    assert result["error_count"] == 0
+    assert sum(ollama.generated.values()) == 16
+    # Work items are removed once the run is finalized
+    counts = db.count_work_items(result["run_id"])
+    assert counts == {"queued": 0, "leased": 0, "done": 0, "failed": 0}
+
+
+def test_killed_worker_cases_are_retried(ollama: _StubOllama) -> None:
+    ollama.delay_s = 0.5
+
+    async def _run_and_kill(workers: LocalWorkers) -> tuple[dict[str, Any], list[str]]:
+        run = asyncio.ensure_future(_run(_cases(6)))
+        victim = str(workers.processes[0].pid)
+        conn = db.get_conn()
+        in_flight: list[str] = []
+        for _ in range(600):
+            rows = conn.execute(
+                "SELECT test_idx FROM work_items WHERE status = 'leased' AND worker_id LIKE ?",
+                (f"%-{victim}-%",),
+            ).fetchall()
+            in_flight = [PROMPT.render(n=row["test_idx"]) for row in rows]
+            if in_flight and all(ollama.generated[p] for p in in_flight):
+                break
+            await asyncio.sleep(0.02)
+        assert in_flight, "the first worker never started a case"
+        # Crash it mid-generation: its leases expire and the other worker retries the cases
+        workers.kill(0)
+        return await asyncio.wait_for(run, timeout=60), in_flight
+
+    with LocalWorkers(2, concurrency=2, lease_s=1.0, poll_interval_s=0.05) as workers:
+        result, in_flight = asyncio.run(_run_and_kill(workers))
+
+    rows = db.get_run_results(result["run_id"])
+    assert len(rows) == 6
+    assert all(row["error"] is None for row in rows)
+    assert result["error_count"] == 0
+    # The cases the killed worker was generating were generated again elsewhere
+    assert all(ollama.generated[p] >= 2 for p in in_flight)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Iterator
+
+import pytest
+
+from promptops.core.adapters import AdapterRegistry, OllamaAdapter
+from promptops.core.adapters.cache import ResponseCache
+
+
+class _StubOllama:
+    """A fake Ollama host: fixed latency, plus a cold-load delay for models not yet resident."""
+
+    def __init__(self, delay_s: float, resident: set[str], load_s: float = 0.1):
+        self.delay_s = delay_s
+        self.load_s = load_s
+        self.resident = set(resident)
+        self.generated = 0
+        self.loads = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def _send(self, body: dict[str, Any]) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                models = [{"model": m} for m in sorted(stub.resident)]
+                self._send({"models": models})
+
+            def do_POST(self) -> None:
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                model = payload["model"]
+                if ":" not in model:
+                    model = f"{model}:latest"
+                with stub._lock:
+                    stub.generated += 1
+                    cold = model not in stub.resident
+                    if cold:
+                        stub.loads += 1
+                        stub.resident.add(model)
+                time.sleep(stub.delay_s + (stub.load_s if cold else 0.0))
+                self._send({"response": "ok", "prompt_eval_count": 10, "eval_count": 5})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def hosts() -> Iterator[list[_StubOllama]]:
+    # The model starts out loaded on the first host only. Cold loads stay under the
+    # scheduler's latency tolerance so they do not read as congestion.
+    stubs = [_StubOllama(0.1, {"llama3.1:latest"} if i == 0 else set()) for i in range(3)]
+    yield stubs
+    for stub in stubs:
+        stub.close()
+
+
+def _closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+async def _burst(adapter: Any, calls: int) -> float:
+    started = time.monotonic()
+    await asyncio.gather(
+        *[
+            adapter.generate("llama3.1", "", f"prompt {i}", {"temperature": 0.7})
+            for i in range(calls)
+        ]
+    )
+    return time.monotonic() - started
+
+
+def test_registry_spreads_a_burst_over_the_pool(hosts: list[_StubOllama]) -> None:
+    alone = _StubOllama(0.1, {"llama3.1:latest"})
+
+    async def _run() -> tuple[float, float]:
+        async with AdapterRegistry(cache=ResponseCache(None)) as registry:
+            single = await _burst(registry.get("ollama", base_url=alone.url), 40)
+            pooled = await _burst(registry.get("ollama", base_url=[h.url for h in hosts]), 40)
+            return single, pooled
+
+    try:
+        single, pooled = asyncio.run(_run())
+    finally:
+        alone.close()
+    counts = [h.generated for h in hosts]
+    assert sum(counts) == 40
+    # The resident host takes the most, but the scheduler's limits scale with
+    # the pool so the cold hosts are used too
+    assert all(count > 0 for count in counts)
+    assert counts[0] == max(counts)
+    assert pooled < single
+
+
+def test_single_host_limits_are_unchanged(hosts: list[_StubOllama]) -> None:
+    async def _run() -> dict[str, Any]:
+        async with AdapterRegistry(cache=ResponseCache(None)) as registry:
+            await _burst(registry.get("ollama", base_url=hosts[0].url), 8)
+            await _burst(registry.get("ollama", base_url=[h.url for h in hosts]), 8)
+            return registry.scheduler.stats()["models"]
+
+    models = asyncio.run(_run())
+    assert models["ollama/llama3.1"]["limit"] <= 4
+    assert models["ollama/llama3.1 (3 hosts)"]["limit"] > 4
+
+
+def test_unreachable_host_is_left_out(hosts: list[_StubOllama]) -> None:
+    async def _run() -> dict[str, Any]:
+        async with OllamaAdapter([_closed_port_url(), hosts[0].url]) as adapter:
+            await _burst(adapter, 10)
+            return adapter.stats()["endpoints"]
+
+    endpoints = asyncio.run(_run())
+    dead, alive = endpoints.values()
+    assert not dead["healthy"] and dead["requests"] == 0
+    assert alive["requests"] == 10 and hosts[0].generated == 10
+
+
+def test_sequential_calls_stay_on_the_resident_host(hosts: list[_StubOllama]) -> None:
+    async def _run() -> None:
+        async with OllamaAdapter([h.url for h in hosts]) as adapter:
+            for i in range(5):
+                await adapter.generate("llama3.1", "", f"prompt {i}", {})
+
+    asyncio.run(_run())
+    assert [h.generated for h in hosts] == [5, 0, 0]
+    assert sum(h.loads for h in hosts) == 0
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from promptops.store import db
+
+
+def _plans(query: Callable[[], Any]) -> list[tuple[str, list[str]]]:
+    """Run ``query`` and return each statement it executed with its query plan."""
+    conn = db.get_conn()
+    statements: list[str] = []
+    # The trace callback sees the SQL with its parameters bound, as actually run
+    conn.set_trace_callback(statements.append)
+    try:
+        query()
+    finally:
+        conn.set_trace_callback(None)
+    return [
+        (sql, [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")])
+        for sql in statements
+        if sql.lstrip().upper().startswith("SELECT")
+    ]
+
+
+@pytest.mark.parametrize(
+    ("query", "index"),
+    [
+        (lambda: db.get_best_for_prompt("summarize"), "idx_runs_prompt_objective"),
+        (lambda: db.recent_runs(50), "idx_runs_created_at"),
+        (lambda: db.get_run_results(1), "uq_run_results_run_test"),
+        (lambda: db.get_suite_cases(1), "idx_suite_cases_suite_order"),
+    ],
+    ids=["get_best_for_prompt", "recent_runs", "get_run_results", "get_suite_cases"],
+)
+def test_hot_queries_use_an_index(store_db: Path, query: Callable[[], Any], index: str) -> None:
+    plans = _plans(query)
+    assert plans
+    for sql, details in plans:
+        assert any(index in detail for detail in details), (sql, details)
+        # The index must also deliver the ORDER BY, not just the filter
+        assert not any("TEMP B-TREE" in detail for detail in details), (sql, details)
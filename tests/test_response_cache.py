@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict
+
+from promptops.core.adapters.base import BaseAdapter, ModelResponse
+from promptops.core.adapters.cache import CachedAdapter, ResponseCache
+
+
+class _Echo(BaseAdapter):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate(
+        self, model: str, system: str, prompt: str, params: Dict[str, Any]
+    ) -> ModelResponse:
+        self.calls += 1
+        return ModelResponse(output=prompt)
+
+    async def health_check(self) -> bool:
+        return True
+
+
+def test_disk_tier_round_trip(tmp_path: Path) -> None:
+    async def _run() -> ModelResponse | None:
+        cache = ResponseCache(tmp_path / "cache.db")
+        await cache.put("k", ModelResponse(output="hello"))
+        cache.close()
+        # A fresh cache only has the disk tier
+        reopened = ResponseCache(tmp_path / "cache.db")
+        try:
+            return await reopened.get("k")
+        finally:
+            reopened.close()
+
+    hit = asyncio.run(_run())
+    assert hit is not None and hit.output == "hello"
+    conn = sqlite3.connect(tmp_path / "cache.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_memory_hits_do_not_wait_for_disk_io(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path / "cache.db")
+
+    async def _run() -> ModelResponse | None:
+        await cache.put("warm", ModelResponse(output="warm"))
+        # As if a slow write or eviction scan held the SQLite connection
+        cache._disk_lock.acquire()
+        try:
+            return await asyncio.wait_for(cache.get("warm"), 1.0)
+        finally:
+            cache._disk_lock.release()
+
+    try:
+        hit = asyncio.run(_run())
+    finally:
+        cache.close()
+    assert hit is not None and hit.output == "warm"
+
+
+def test_cache_errors_are_misses(tmp_path: Path) -> None:
+    # A directory cannot be opened as a database: every disk access fails
+    broken = ResponseCache(tmp_path, max_memory_entries=0)
+    inner = _Echo()
+    adapter = CachedAdapter(inner, broken)
+
+    async def _run() -> list[ModelResponse]:
+        return [await adapter.generate("m", "", "hi", {"temperature": 0}) for _ in range(2)]
+
+    first, second = asyncio.run(_run())
+    assert first.output == second.output == "hi"
+    assert not second.cached
+    assert inner.calls == 2
+    assert broken.stats()["errors"] == 4
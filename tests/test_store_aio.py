@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any
+
+from promptops.store import aio as store
+
+CASES = 20_000
+TICK_S = 0.005
+
+
+def _results(n: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "test_idx": i,
+            "input_data": {"question": f"question {i}", "context": "x" * 200},
+            "expected": "expected answer",
+            "output": "model answer " * 20,
+            "judge_score": 0.8,
+            "judge_criteria": {"accuracy": 0.8},
+            "judge_reasoning": "fine",
+            "metrics": {"latency_ms": 120.0, "total_tokens": 300},
+        }
+        for i in range(n)
+    ]
+
+
+async def _max_lag(stop: asyncio.Event) -> float:
+    """Largest delay past its deadline of a timer ticking every ``TICK_S``."""
+    lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lag = max(lag, time.perf_counter() - start - TICK_S)
+    return lag
+
+
+def test_persisting_a_large_run_does_not_stall_the_loop(store_db: Path) -> None:
+    results = _results(CASES)
+
+    async def _run() -> tuple[float, float, int]:
+        stop = asyncio.Event()
+        ticker = asyncio.ensure_future(_max_lag(stop))
+        # Let the ticker take its first measurement before the write starts
+        await asyncio.sleep(TICK_S * 2)
+        start = time.perf_counter()
+        run_id, _, _ = await asyncio.gather(
+            store.insert_run_with_results(
+                {"prompt_name": "big", "prompt_hash": "h", "model": "m", "objective": 1.0},
+                results,
+            ),
+            # Requests that arrive meanwhile, like /runs polling the dashboard
+            store.recent_runs(50),
+            store.get_best_for_prompt("big"),
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        return elapsed, await ticker, run_id
+
+    elapsed, lag, run_id = asyncio.run(_run())
+    assert len(asyncio.run(store.get_run_results(run_id))) == CASES
+    # Done on the loop, the write would have stalled it for its whole duration
+    assert lag < max(0.1, elapsed / 4), (lag, elapsed)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from promptops.store import db
+
+pytestmark = pytest.mark.benchmark
+
+RUN = {"prompt_name": "bench", "prompt_hash": "h", "model": "m", "objective": 1.0}
+
+
+def _results(n: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "test_idx": i,
+            "input_data": {"question": f"question {i}"},
+            "expected": "expected answer",
+            "output": "model answer",
+            "judge_score": 0.8,
+            "judge_criteria": {"accuracy": 0.8},
+            "judge_reasoning": "fine",
+            "metrics": {"latency_ms": 120.0, "total_tokens": 300},
+        }
+        for i in range(n)
+    ]
+
+
+def _rows_per_s(write: Callable[[], Any], rows: int) -> float:
+    start = time.perf_counter()
+    write()
+    return rows / (time.perf_counter() - start)
+
+
+@pytest.mark.parametrize("rows", [1_000, 10_000, 100_000])
+def test_bulk_run_results_rows_per_s(
+    store_db: Path, record_property: Callable[[str, Any], None], rows: int
+) -> None:
+    results = _results(rows)
+    rate = _rows_per_s(lambda: db.insert_run_with_results(RUN, results), rows)
+    record_property("rows/s", rate)
+
+    (count,) = db.get_conn().execute("SELECT COUNT(*) FROM run_results").fetchone()
+    assert count == rows
+    # One transaction per run: throughput must not collapse as the run grows
+    assert rate > 5_000
+
+
+def test_bulk_beats_per_row_inserts(
+    store_db: Path, record_property: Callable[[str, Any], None]
+) -> None:
+    results = _results(1_000)
+    run_id = db.insert_run(RUN)
+
+    def _one_by_one() -> None:
+        for result in results:
+            db.insert_run_result(run_id, **result)
+
+    per_row = _rows_per_s(_one_by_one, len(results))
+    bulk = _rows_per_s(lambda: db.insert_run_with_results(RUN, results), len(results))
+    suite_id = db.create_suite("bench")
+    cases = [{"input": r["input_data"], "expected": r["expected"]} for r in results]
+    suite = _rows_per_s(lambda: db.add_suite_cases(suite_id, cases), len(cases))
+    record_property("per-row rows/s", per_row)
+    record_property("bulk rows/s", bulk)
+    record_property("suite cases rows/s", suite)
+
+    assert bulk > per_row * 2
+    assert suite > per_row * 2
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from pathlib import Path
+from typing import Any
+
+from promptops.store import db
+
+WRITERS = 4
+READERS = 4
+RUNS_PER_WRITER = 25
+CASES_PER_RUN = 20
+
+
+def _results(n: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "test_idx": i,
+            "input_data": {"q": i},
+            "expected": None,
+            "output": f"answer {i}",
+            "judge_score": 1.0,
+            "judge_criteria": None,
+            "judge_reasoning": None,
+            "metrics": {},
+        }
+        for i in range(n)
+    ]
+
+
+def _write_runs(name: str) -> None:
+    for _ in range(RUNS_PER_WRITER):
+        db.insert_run_with_results(
+            {"prompt_name": name, "prompt_hash": "h", "model": "m", "objective": 1.0},
+            _results(CASES_PER_RUN),
+        )
+
+
+def _other_process(path: str, ready: Any) -> None:
+    # Another API worker: its own writer thread contends through WAL and the busy timeout
+    db.DB_PATH = Path(path)
+    ready.set()
+    _write_runs("process")
+    db.close_db()
+
+
+def test_parallel_readers_and_writers(store_db: Path) -> None:
+    errors: list[BaseException] = []
+    partial: list[tuple[int, int]] = []
+    writing = threading.Event()
+    writing.set()
+
+    def _guard(fn: Any, *args: Any) -> None:
+        try:
+            fn(*args)
+        except BaseException as e:
+            errors.append(e)
+            writing.clear()
+
+    def _read() -> None:
+        while writing.is_set():
+            for run in db.recent_runs(20):
+                # A run and its results commit together, so a reader never sees half of one
+                count = len(db.get_run_results(run["id"]))
+                if count != CASES_PER_RUN:
+                    partial.append((run["id"], count))
+            db.get_best_for_prompt("thread-0")
+
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Event()
+    process = ctx.Process(target=_other_process, args=(str(store_db), ready))
+    process.start()
+    assert ready.wait(timeout=30)
+    readers = [threading.Thread(target=_guard, args=(_read,)) for _ in range(READERS)]
+    writers = [
+        threading.Thread(target=_guard, args=(_write_runs, f"thread-{i}")) for i in range(WRITERS)
+    ]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    process.join(timeout=60)
+    writing.clear()
+    for thread in readers:
+        thread.join()
+
+    assert not errors, errors
+    assert not partial, partial
+    assert process.exitcode == 0
+    conn = db.get_conn()
+    runs = (WRITERS + 1) * RUNS_PER_WRITER
+    assert conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == runs
+    assert conn.execute("SELECT COUNT(*) FROM run_results").fetchone()[0] == runs * CASES_PER_RUN
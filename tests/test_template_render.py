@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import string
+import time
+from typing import Any, Callable
+
+import pytest
+
+from promptops.core.prompt import Prompt
+
+pytestmark = pytest.mark.benchmark
+
+RENDERS = 100_000
+
+PROMPT = Prompt(
+    name="support",
+    system="You are a helpful support agent.",
+    template=(
+        "Customer: {customer}\nProduct: {product}\nPriority: {priority!s:>6}\n\n"
+        "Question:\n{question}\n\nAnswer in {language}, quoting {missing} where relevant."
+    ),
+    model="llama3.1",
+)
+
+
+def _inputs(n: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "customer": f"customer {i}",
+            "product": "router",
+            "priority": i % 3,
+            "question": f"Why does my router drop the connection every {i % 60} minutes?",
+            "language": "English",
+        }
+        for i in range(n)
+    ]
+
+
+def _render_per_call(template: str, **kwargs: Any) -> str:
+    # Prompt.render before templates were compiled: a formatter class per call
+    class _SafeFormatter(string.Formatter):
+        def get_value(self, key, args, kwargs):
+            if isinstance(key, str) and key in kwargs:
+                return kwargs[key]
+            return "{" + str(key) + "}"
+
+    return _SafeFormatter().format(template, **kwargs)
+
+
+def _renders_per_s(render: Callable[[], list[str]]) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    rendered = render()
+    return RENDERS / (time.perf_counter() - start), rendered
+
+
+def test_compiled_templates_render_100k(record_property: Callable[[str, Any], None]) -> None:
+    inputs = _inputs(RENDERS)
+
+    per_call_rate, expected = _renders_per_s(
+        lambda: [_render_per_call(PROMPT.template, **values) for values in inputs]
+    )
+    render_rate, rendered = _renders_per_s(
+        lambda: [PROMPT.render(**values) for values in inputs]
+    )
+    batch_rate, batch = _renders_per_s(lambda: PROMPT.render_many(inputs))
+    record_property("per-call formatter renders/s", per_call_rate)
+    record_property("Prompt.render renders/s", render_rate)
+    record_property("Prompt.render_many renders/s", batch_rate)
+
+    # Same output, missing placeholders included
+    assert rendered == expected
+    assert batch == expected
+    assert "{missing}" in batch[0]
+    assert render_rate > per_call_rate
+    assert batch_rate > per_call_rate
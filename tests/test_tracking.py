@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import warnings
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from promptops.core.adapters.base import BaseAdapter, ModelResponse
+from promptops.core.prompt import Prompt
+from promptops.core.runner import run_dataset
+from promptops.store import db
+from promptops.tests.testcase import TestCase
+from promptops.tracking import MlflowTracker, Tracker, TrackingOp
+
+
+class _Echo(BaseAdapter):
+    async def generate(
+        self, model: str, system: str, prompt: str, params: Dict[str, Any]
+    ) -> ModelResponse:
+        if model == "judge":
+            return ModelResponse(output='{"overall": 0.5, "criteria": {}}')
+        return ModelResponse(output=prompt)
+
+    async def health_check(self) -> bool:
+        return True
+
+
+class _SlowTracker(Tracker):
+    """Assigns run ids only once ``release`` is set, like a stalled tracking server."""
+
+    kind = "slow"
+
+    def __init__(self) -> None:
+        super().__init__(uri="slow://")
+        self.release = threading.Event()
+
+    def _write(self, batch: list[TrackingOp]) -> None:
+        for op in batch:
+            if op.kind == "start":
+                self.release.wait(10)
+                op.run._id.set_result(f"tracked-{op.run.key}")
+
+
+def test_run_finishes_without_waiting_for_the_tracking_id(store_db: Path) -> None:
+    tracker = _SlowTracker()
+    prompt = Prompt(name="echo", system="", template="Say {n}", model="gen", provider="custom")
+
+    async def _run() -> dict[str, Any]:
+        return await asyncio.wait_for(
+            run_dataset(
+                _Echo(), prompt, [TestCase(input={"n": 1})], "judge", tracker=tracker
+            ),
+            5,
+        )
+
+    summary = asyncio.run(_run())
+    assert db.get_run(summary["run_id"])["run_id"] is None
+
+    tracker.release.set()
+    tracker.close()
+    assert db.get_run(summary["run_id"])["run_id"].startswith("tracked-")
+
+
+class _FlakyClient:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+
+    def create_run(self, experiment_id: str, run_name: str | None = None) -> Any:
+        self.calls.append(f"create:{run_name}")
+        return SimpleNamespace(info=SimpleNamespace(run_id=run_name))
+
+    def log_batch(self, run_id: str, metrics: list[Any], params: list[Any]) -> None:
+        if run_id == "bad":
+            raise RuntimeError("server rejected batch")
+        self.calls.append(f"batch:{run_id}")
+
+    def log_text(self, run_id: str, text: str, artifact_file: str) -> None:
+        raise RuntimeError("artifact store unavailable")
+
+    def set_terminated(self, run_id: str, status: str) -> None:
+        self.calls.append(f"end:{run_id}")
+
+
+def test_mlflow_failures_only_lose_their_own_ops() -> None:
+    tracker = MlflowTracker(uri=None)
+    client = tracker._client = _FlakyClient()
+    tracker._experiment_id = "0"
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        for name in ("bad", "good"):
+            with tracker.start_run(name=name, params={"a": 1}) as run:
+                run.log_metrics({"m": 1.0})
+                run.log_text("outputs", "outputs.txt")
+        tracker.close()
+
+    assert client.calls == [
+        "create:bad",
+        "end:bad",
+        "create:good",
+        "batch:good",
+        "end:good",
+    ]
+    # One per failed op: the bad run's flush before its text, the good run's text
+    assert len(caught) == 2